@@ -0,0 +1,187 @@
+"""
+Benchmarks der Cloud-Seite: Leeren des Offline-Spools gegen den Stub-Server
+und Latenzen der Cloud-API bei einer großen Datenbank
+"""
+import asyncio
+import base64
+import gzip
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+import numpy as np
+from common import import_api, latency_summary, require, timed
+from utils import hr_codec
+
+def _workout(samples, start, name="Grundlagen Workout"):
+    """Workout wie vom Gerät gespeichert, Puls gepackt (siehe WorkoutManager.save_progress)"""
+    blob = hr_codec.encode(start.timestamp() + np.arange(samples), 110 + np.arange(samples) % 50)
+    return {
+        'workout_name': name,
+        'completed_exercises': 4,
+        'date': start.isoformat(),
+        'heart_rate_packed': base64.b64encode(blob).decode('ascii')
+    }
+
+def bench_cloud_sync(scale):
+    """Offline-Spool füllen und per CloudSync.sync_pending an den Stub übertragen"""
+    require('requests')
+    from cloud.stub_server import StubCloudServer
+    from cloud.sync_manager import CloudSync
+
+    items = scale['sync_items']
+    samples = scale['sync_hr_samples']
+    stub = StubCloudServer().start()
+    try:
+        with tempfile.TemporaryDirectory() as spool_dir:
+            sync = CloudSync(api_url=stub.url, device_id="bench", spool_dir=spool_dir)
+            start = datetime(2024, 1, 1)
+            appends = []
+            for i in range(items):
+                workout = {**_workout(samples, start + timedelta(hours=i)), 'id': uuid.uuid4().hex}
+                appends.append(timed(sync.sync_workout_data, workout)[1])
+            spool_bytes = sync.spool.total_bytes
+
+            passes = []
+            started = time.perf_counter()
+            while len(sync.spool):
+                sent, duration = timed(sync.sync_pending)
+                passes.append(duration)
+                if not sent:
+                    break
+            elapsed = time.perf_counter() - started
+            remaining = len(sync.spool)
+            sync.session.close()
+    finally:
+        stub.stop()
+
+    wire_bytes = sum(size for _, size, _ in stub.requests)
+    return {
+        'params': {'items': items, 'hr_samples_per_item': samples,
+                   'max_batch_items': sync.max_batch_items},
+        'metrics': {
+            'items_per_s': round(len(stub.workouts) / elapsed, 1),
+            'drain_s': round(elapsed, 3),
+            'requests': len(stub.requests),
+            'spool_bytes': spool_bytes,
+            'wire_bytes': wire_bytes,
+            'compression_ratio': round(spool_bytes / max(wire_bytes, 1), 2),
+            'remaining': remaining,
+            **latency_summary(appends, 'spool_append_'),
+            **latency_summary(passes, 'pass_')
+        }
+    }
+
+async def _seed(database, devices, workouts_per_device, samples):
+    """Schreibt die Testdaten direkt per executemany; die Trigger pflegen device_stats"""
+    start = datetime(2024, 1, 1)
+    values = (110 + np.arange(samples) % 50).tolist()
+    offsets = np.arange(samples, dtype=np.float64)
+    async with database.SessionLocal() as db:
+        conn = await db.connection()
+        for device in range(devices):
+            rows = []
+            for w in range(workouts_per_device):
+                timestamp = start + timedelta(days=w, minutes=device)
+                blob = hr_codec.encode((timestamp.timestamp() + offsets).tolist(), values)
+                rows.append({
+                    'client_id': f"seed-{device}-{w}",
+                    'device_id': f"device-{device:04d}",
+                    'timestamp': timestamp,
+                    'workout_name': "Grundlagen Workout",
+                    'completed_exercises': 4,
+                    'hr_samples': blob,
+                    **hr_codec.summarize(blob)
+                })
+            await conn.execute(database.WorkoutData.__table__.insert(), rows)
+        await db.commit()
+
+async def _requests(client, count, request):
+    durations = []
+    for i in range(count):
+        started = time.perf_counter()
+        response = await request(client, i)
+        durations.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.request.url}: HTTP {response.status_code}")
+    return durations
+
+async def _api_bench(api, scale):
+    import database
+    import httpx
+
+    devices = scale['api_devices']
+    workouts_per_device = scale['api_workouts_per_device']
+    samples = scale['api_hr_samples']
+    count = scale['api_requests']
+
+    await database.init_db()
+    _, seed_seconds = await _timed_async(_seed(database, devices, workouts_per_device, samples))
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        def sync_request(size):
+            async def request(client, i):
+                start = datetime(2025, 1, 1) + timedelta(minutes=i)
+                body = json.dumps({'device_id': f"device-{i % devices:04d}", 'workouts': [
+                    {'id': uuid.uuid4().hex, 'device_id': f"device-{i % devices:04d}",
+                     'data': _workout(samples, start)} for _ in range(size)]}).encode()
+                return await client.post("/workout/sync/batch", content=gzip.compress(body),
+                                          headers={'Content-Type': 'application/json',
+                                                   'Content-Encoding': 'gzip'})
+            return request
+
+        async def devices_cold(client, i):
+            api.response_cache.invalidate(api.response_cache.ALL_DEVICES)
+            return await client.get("/api/devices")
+
+        async def devices_warm(client, i):
+            return await client.get("/api/devices")
+
+        async def history_cold(client, i):
+            device = f"device-{(i * 7) % devices:04d}"
+            api.response_cache.invalidate(device)
+            return await client.get(f"/workout/history/{device}")
+
+        async def history_warm(client, i):
+            return await client.get("/workout/history/device-0000")
+
+        metrics = {'seed_s': round(seed_seconds, 2)}
+        for name, request, repeat in (
+                ('sync_1_', sync_request(1), count),
+                ('sync_50_', sync_request(50), max(count // 10, 5)),
+                ('devices_cold_', devices_cold, max(count // 10, 5)),
+                ('devices_warm_', devices_warm, count),
+                ('history_cold_', history_cold, count),
+                ('history_warm_', history_warm, count)):
+            metrics.update(latency_summary(await _requests(client, repeat, request), name))
+
+    await database.engine.dispose()
+    return {
+        'params': {'devices': devices, 'workouts': devices * workouts_per_device,
+                   'hr_samples': devices * workouts_per_device * samples, 'requests': count},
+        'metrics': metrics
+    }
+
+async def _timed_async(coroutine):
+    started = time.perf_counter()
+    result = await coroutine
+    return result, time.perf_counter() - started
+
+def bench_api(scale):
+    """Latenzen von Sync, Geräteliste und Verlauf der Cloud-API (in-process über ASGI)"""
+    require('fastapi', 'sqlalchemy', 'aiosqlite', 'httpx')
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['GYMPI_DATABASE_URL'] = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        try:
+            api = import_api()
+            return asyncio.run(_api_bench(api, scale))
+        finally:
+            del os.environ['GYMPI_DATABASE_URL']
+
+BENCHMARKS = {
+    'cloud_sync': bench_cloud_sync,
+    'api': bench_api
+}
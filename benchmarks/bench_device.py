@@ -0,0 +1,264 @@
+"""
+Benchmarks der Geräte-Pipeline: Wiederholungserkennung, Pulsverarbeitung,
+Display-Frames, Speichern des Trainingsfortschritts, Sensor-Aufzeichnung
+und Start bis zum ersten Bild
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from common import SRC_DIR, BlockBackend, latency_summary, require, timed
+
+def _recorded(backend, seconds):
+    """Erzeugt `seconds` Sekunden Messwerte eines synthetischen Backends"""
+    backend.read(0.0)
+    return backend.read(seconds)
+
+def bench_rep_detection(scale):
+    """Einlesen in den Ringpuffer plus Wiederholungszählung pro Messwert"""
+    from sensors.backends import SyntheticMotionBackend
+    from sensors.motion import BURST_POLL_SECONDS, MotionSensor
+
+    sample_rate = 200
+    seconds = scale['motion_seconds']
+    synthetic = SyntheticMotionBackend(sample_rate=sample_rate, rep_period=2.0)
+    timestamps, data = _recorded(synthetic, seconds)
+    block_size = int(sample_rate * BURST_POLL_SECONDS)
+
+    sensor = MotionSensor(sample_rate=sample_rate,
+                          backend=BlockBackend(timestamps, data, block_size))
+
+    durations = []
+    samples = 0
+    start = time.perf_counter()
+    while samples < len(timestamps):
+        count, duration = timed(sensor._read_sample)
+        durations.append(duration)
+        samples += count
+    elapsed = time.perf_counter() - start
+
+    expected = len(synthetic.rep_times(timestamps[0], timestamps[-1]))
+    return {
+        'params': {'sample_rate': sample_rate, 'samples': samples, 'block_size': block_size},
+        'metrics': {
+            'samples_per_s': round(samples / elapsed),
+            **latency_summary(durations, 'block_'),
+            'reps_detected': sensor.rep_counter.count,
+            'reps_expected': expected
+        }
+    }
+
+def bench_heart_rate(scale):
+    """Übernahme der FIFO-Blöcke und Pulsberechnung im gleitenden Fenster"""
+    from sensors.backends import SyntheticPPGBackend
+    from sensors.heart_rate import HeartRateSensor
+
+    sample_rate = 100
+    seconds = scale['ppg_seconds']
+    hr_interval = 0.25  # wie DeviceRuntime: Puls alle 250 ms abfragen
+    synthetic = SyntheticPPGBackend(sample_rate=sample_rate, bpm=120, swing=20, swing_period=300)
+    timestamps, data = _recorded(synthetic, seconds)
+    backend = BlockBackend(timestamps, data, sample_rate * hr_interval)
+    sensor = HeartRateSensor(sample_rate=sample_rate, backend=backend)
+
+    durations = []
+    errors = []
+    calls = int(len(timestamps) / backend.block_size)
+    start = time.perf_counter()
+    for _ in range(calls):
+        bpm, duration = timed(sensor.read_heart_rate)
+        durations.append(duration)
+        if bpm is not None:
+            errors.append(abs(bpm - float(synthetic.true_bpm(backend.timestamps[backend.position - 1]))))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'params': {'sample_rate': sample_rate, 'samples': calls * backend.block_size,
+                   'block_size': backend.block_size},
+        'metrics': {
+            'samples_per_s': round(calls * backend.block_size / elapsed),
+            **latency_summary(durations, 'read_'),
+            'mae_bpm': round(float(np.mean(errors)), 2) if errors else None
+        }
+    }
+
+def bench_display_frame(scale):
+    """show_workout plus update() bis zum Treiber, wie im Trainingsbetrieb"""
+    require('PIL')
+    from display.epaper import EpaperDisplay
+    from display.sim_driver import RecordingDriver
+
+    frames = scale['display_frames']
+    driver = RecordingDriver()
+    display = EpaperDisplay(driver=driver)
+    exercises = ["Liegestütze", "Kniebeugen", "Planks", "Mountain Climbers"]
+
+    compose = []
+    update = []
+    for i in range(frames):
+        exercise = exercises[(i // 50) % len(exercises)]
+        _, duration = timed(display.show_workout, exercise, 3, i % 15, 1 + (i // 15) % 3, 100 + i % 60)
+        compose.append(duration)
+        _, duration = timed(display.update)
+        update.append(duration)
+
+    _, full = timed(display.update, full=True)
+    return {
+        'params': {'frames': frames},
+        'metrics': {
+            **latency_summary(np.add(compose, update), 'frame_'),
+            **latency_summary(compose, 'compose_'),
+            **latency_summary(update, 'update_'),
+            'full_update_ms': round(full * 1000, 3),
+            'partial_refreshes': driver.partial_refreshes,
+            'full_refreshes': driver.full_refreshes
+        }
+    }
+
+def bench_save_progress(scale):
+    """
+    save_progress und Historienabfrage bei wachsender Historie
+
+    Gemessen wird jeweils über die letzten Speichervorgänge vor den
+    Messpunkten, damit ein Anstieg mit der Historiengröße sichtbar wird.
+    """
+    from utils import hr_codec
+    from workout.workout_manager import WorkoutManager
+
+    sessions = scale['sessions']
+    checkpoints = [n for n in (100, 1000, 5000, 10000, 50000) if n <= sessions]
+    window = 100
+    hr_samples = scale['session_hr_samples']
+    # Puls gepackt wie von DeviceRuntime gespeichert
+    heart_rate_data = hr_codec.encode(1.7e9 + np.arange(hr_samples), 120 + np.arange(hr_samples) % 40)
+    summary = {'total_sets': 12, 'total_reps': 150, 'duration_mins': 30, 'avg_heart_rate': 135}
+
+    metrics = {}
+    with tempfile.TemporaryDirectory() as state_dir:
+        manager = WorkoutManager(state_dir=state_dir)
+        manager.load_workout("default_workout")
+        durations = []
+        for n in range(1, sessions + 1):
+            _, duration = timed(manager.save_progress, heart_rate_data, summary)
+            durations.append(duration)
+            if n in checkpoints:
+                metrics.update(latency_summary(durations[-window:], f'save_at_{n}_'))
+                history = [timed(manager.get_workout_history, 3)[1] for _ in range(20)]
+                metrics[f'history_at_{n}_mean_ms'] = latency_summary(history)['mean_ms']
+
+        _, reopen = timed(WorkoutManager, state_dir=state_dir)
+        metrics['reopen_ms'] = round(reopen * 1000, 3)
+        metrics['state_bytes'] = sum(os.path.getsize(os.path.join(root, name))
+                                     for root, _, names in os.walk(state_dir) for name in names)
+
+    return {
+        'params': {'sessions': sessions, 'hr_samples_per_session': hr_samples},
+        'metrics': metrics
+    }
+
+def bench_session_recorder(scale):
+    """Aufzeichnung von Puls (4 Hz) und IMU (200 Hz) einer Einheit und Lesen des Pulses"""
+    from sensors.backends import SyntheticMotionBackend
+    from workout.session_recorder import SessionReader, SessionRecorder
+
+    seconds = scale['motion_seconds']
+    imu_timestamps, imu = _recorded(SyntheticMotionBackend(sample_rate=200), seconds)
+    hr_timestamps = np.arange(0, seconds, 0.25)
+    block = 4  # wie die Abtastung: ein Burst alle 20 ms
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session.gpsr')
+        recorder = SessionRecorder(path, 0.0)
+        hr_index = 0
+        started = time.perf_counter()
+        for position in range(0, len(imu_timestamps), block):
+            burst = slice(position, position + block)
+            recorder.add_motion(imu_timestamps[burst], imu[burst])
+            while hr_index < len(hr_timestamps) and hr_timestamps[hr_index] <= imu_timestamps[burst][-1]:
+                recorder.add_heart_rate(hr_timestamps[hr_index], 120.0)
+                hr_index += 1
+        recorder.close()
+        elapsed = time.perf_counter() - started
+
+        samples = recorder.imu_count + recorder.hr_count
+        size = os.path.getsize(path)
+        with SessionReader(path) as reader:
+            blob, read = timed(reader.heart_rate_blob)
+            motion, read_motion = timed(reader.motion)
+
+    return {
+        'params': {'seconds': seconds, 'imu_samples': recorder.imu_count, 'hr_samples': recorder.hr_count},
+        'metrics': {
+            'samples_per_s': round(samples / elapsed),
+            'file_bytes': size,
+            'bytes_per_sample': round(size / samples, 2),
+            'hr_blob_bytes': len(blob),
+            'read_hr_ms': round(read * 1000, 3),
+            'read_motion_ms': round(read_motion * 1000, 3)
+        }
+    }
+
+# Läuft in einem frischen Interpreter, damit die Importe mitgemessen werden.
+# 'boot' ist der Start von main.py (Startbildschirm zuerst), 'sequential'
+# baut erst alle Komponenten und zeigt danach den Startbildschirm.
+_STARTUP_SCRIPT = """
+import json, sys, time
+import main
+from display.sim_driver import RecordingDriver
+
+mode, state_dir, spool_dir = sys.argv[1:]
+options = dict(display_driver=RecordingDriver(), state_dir=state_dir, spool_dir=spool_dir,
+               api_url="http://127.0.0.1:9")
+
+def run():
+    if mode == 'boot':
+        components, stats = main.boot('synthetic', **options)
+    else:
+        components = main.build_components('synthetic', **options)
+        components[0].show_message("GymPi", "Bereit zum Training")
+        components[0].update()
+        ready = (time.perf_counter() - main.BOOT_STARTED) * 1000
+        stats = {'time_to_first_frame_ms': ready, 'ready_ms': ready}
+    components[1].close()
+    components[4].stop_sync_thread()
+    return stats
+
+print(json.dumps(run()))
+"""
+
+def bench_startup(scale):
+    """Zeit bis zum Startbildschirm und bis alle Komponenten bereit sind, je Prozessstart"""
+    require('PIL', 'requests')
+    runs = scale['startup_runs']
+    results = {'boot': [], 'sequential': []}
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(runs):
+            for mode, samples in results.items():
+                state_dir = os.path.join(directory, f'{mode}-{i}', 'state')
+                spool_dir = os.path.join(directory, f'{mode}-{i}', 'spool')
+                output = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT, mode, state_dir, spool_dir],
+                                        cwd=SRC_DIR, capture_output=True, text=True, check=True).stdout
+                samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    metrics = {}
+    for mode, samples in results.items():
+        for key in ('time_to_first_frame_ms', 'ready_ms'):
+            values = [sample[key] for sample in samples]
+            metrics[f'{mode}_{key[:-3]}_mean_ms'] = round(float(np.mean(values)), 1)
+            metrics[f'{mode}_{key[:-3]}_max_ms'] = round(float(np.max(values)), 1)
+    return {
+        'params': {'runs': runs},
+        'metrics': metrics
+    }
+
+BENCHMARKS = {
+    'rep_detection': bench_rep_detection,
+    'heart_rate': bench_heart_rate,
+    'display_frame': bench_display_frame,
+    'save_progress': bench_save_progress,
+    'session_recorder': bench_session_recorder,
+    'startup': bench_startup
+}
@@ -0,0 +1,91 @@
+import importlib
+import os
+import sys
+import time
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_DIR, 'src')
+API_DIR = os.path.join(SRC_DIR, 'cloud', 'api')
+
+# Gerätecode wie in src/main.py über Top-Level-Pakete importieren
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+class Skip(Exception):
+    """Benchmark kann in dieser Umgebung nicht laufen (z.B. fehlende Abhängigkeit)"""
+
+def require(*modules):
+    """Bricht mit Skip ab, wenn eines der Module nicht installiert ist"""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            raise Skip(f"{name} nicht installiert ({e})")
+
+def latency_summary(durations, prefix=''):
+    """Mittelwert und Perzentile einer Liste von Dauern (Sekunden) in ms"""
+    ms = np.asarray(durations, dtype=np.float64) * 1000
+    if not len(ms):
+        return {}
+    return {
+        f'{prefix}mean_ms': round(float(ms.mean()), 3),
+        f'{prefix}p50_ms': round(float(np.percentile(ms, 50)), 3),
+        f'{prefix}p95_ms': round(float(np.percentile(ms, 95)), 3),
+        f'{prefix}max_ms': round(float(ms.max()), 3)
+    }
+
+def timed(fn, *args, **kwargs):
+    """Führt fn aus und liefert (Ergebnis, Dauer in Sekunden)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+class BlockBackend:
+    """
+    Spielt vorab erzeugte Messwerte blockweise ab, unabhängig von der Uhr
+
+    Damit misst ein Benchmark nur die Verarbeitung und nicht die Erzeugung
+    der Signale. Am Ende beginnt die Wiedergabe von vorn, die Zeitstempel
+    laufen dabei weiter.
+    """
+    burst = True
+
+    def __init__(self, timestamps, data, block_size):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.data = data
+        self.block_size = max(1, int(block_size))
+        self.position = 0
+        self.offset = 0.0
+        self.span = self.timestamps[-1] - self.timestamps[0] + \
+            (self.timestamps[1] - self.timestamps[0] if len(self.timestamps) > 1 else 1.0)
+
+    def read(self, now):
+        if self.position >= len(self.timestamps):
+            self.position = 0
+            self.offset += self.span
+        end = self.position + self.block_size
+        timestamps = self.timestamps[self.position:end] + self.offset
+        block = self.data[self.position:end]
+        self.position = end
+        return timestamps, block
+
+    def close(self):
+        pass
+
+def import_api():
+    """
+    Importiert die FastAPI-App aus src/cloud/api
+
+    Die API-Module liegen auf oberster Ebene (main, database, ...); ein
+    bereits geladenes Geräte-`main` wird dafür beiseitegelegt.
+    """
+    device_main = sys.modules.pop('main', None)
+    sys.path.insert(0, API_DIR)
+    try:
+        return importlib.import_module('main')
+    finally:
+        sys.path.remove(API_DIR)
+        sys.modules.pop('main', None)
+        if device_main is not None:
+            sys.modules['main'] = device_main
@@ -0,0 +1,175 @@
+"""
+Benchmark-Suite für Geräte-Pipeline und Cloud-API
+
+Schreibt die Ergebnisse als JSON (mit Commit, Zeitpunkt und Umgebung), damit
+sich Messungen verschiedener Commits vergleichen lassen. Benchmarks, deren
+Abhängigkeiten fehlen, werden als "skipped" vermerkt statt abzubrechen.
+
+Beispiele:
+    python benchmarks/run.py
+    python benchmarks/run.py --quick --only rep_detection heart_rate
+    python benchmarks/run.py --output new.json --compare benchmarks/results/<commit>.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import traceback
+from datetime import datetime
+from common import REPO_DIR, Skip
+import bench_cloud
+import bench_device
+
+BENCHMARKS = {**bench_device.BENCHMARKS, **bench_cloud.BENCHMARKS}
+
+# Größe der Messungen; "full" entspricht den Zielgrößen (10k Workouts im
+# Verlauf, 1k Geräte mit 1M Pulswerten in der Cloud-Datenbank)
+SCALES = {
+    'quick': {
+        'motion_seconds': 300,
+        'ppg_seconds': 300,
+        'display_frames': 300,
+        'sessions': 1000,
+        'session_hr_samples': 120,
+        'sync_items': 200,
+        'sync_hr_samples': 600,
+        'api_devices': 100,
+        'api_workouts_per_device': 5,
+        'api_hr_samples': 200,
+        'api_requests': 50,
+        'startup_runs': 3
+    },
+    'full': {
+        'motion_seconds': 1800,
+        'ppg_seconds': 1800,
+        'display_frames': 2000,
+        'sessions': 10000,
+        'session_hr_samples': 120,
+        'sync_items': 1000,
+        'sync_hr_samples': 1800,
+        'api_devices': 1000,
+        'api_workouts_per_device': 5,
+        'api_hr_samples': 200,
+        'api_requests': 200,
+        'startup_runs': 10
+    }
+}
+
+# Kennzahlen, bei denen ein größerer Wert besser ist; alle übrigen mit
+# Einheit (ms, s, bytes) gelten als "kleiner ist besser"
+HIGHER_IS_BETTER = ('_per_s', 'compression_ratio')
+LOWER_IS_BETTER = ('_ms', '_s', '_bytes')
+# Einzelne Ausreißer schwanken stark und werden nur angezeigt
+NOT_COMPARED = ('_max_ms',)
+
+def git_commit():
+    """Aktueller Commit und ob der Arbeitsbaum Änderungen enthält"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    cwd=REPO_DIR, capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def run_benchmark(name, scale):
+    print(f"{name} ...", end=' ', flush=True)
+    started = time.perf_counter()
+    try:
+        result = {'status': 'ok', **BENCHMARKS[name](scale)}
+    except Skip as e:
+        result = {'status': 'skipped', 'reason': str(e)}
+    except Exception as e:
+        traceback.print_exc()
+        result = {'status': 'error', 'reason': f"{type(e).__name__}: {e}"}
+    result['seconds'] = round(time.perf_counter() - started, 2)
+    print(result['status'] if result['status'] != 'ok' else f"{result['seconds']} s")
+    return result
+
+def run(names, scale_name):
+    commit, dirty = git_commit()
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'scale': scale_name,
+        'results': {name: run_benchmark(name, SCALES[scale_name]) for name in names}
+    }
+
+def _direction(metric):
+    if metric.endswith(NOT_COMPARED):
+        return 0
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+def compare(baseline, current, threshold):
+    """
+    Gegenüberstellung zweier Ergebnisdateien
+    Verglichen werden nur Benchmarks, die mit denselben Parametern liefen.
+
+    Returns:
+        Liste von (Benchmark, Kennzahl, alt, neu, Änderung in %, Regression?)
+    """
+    rows = []
+    for name, result in current['results'].items():
+        old = baseline.get('results', {}).get(name, {})
+        if result['status'] != 'ok' or old.get('status') != 'ok' or old.get('params') != result['params']:
+            continue
+        for metric, value in result['metrics'].items():
+            before = old['metrics'].get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(before, (int, float)) or not before:
+                continue
+            change = (value - before) / abs(before) * 100
+            direction = _direction(metric)
+            regression = direction != 0 and -direction * change > threshold
+            rows.append((name, metric, before, value, round(change, 1), regression))
+    return rows
+
+def print_comparison(rows, baseline, threshold):
+    print(f"\nVergleich mit {baseline.get('commit')} ({baseline.get('timestamp')}), "
+          f"Schwelle {threshold}%:")
+    for name, metric, before, value, change, regression in rows:
+        marker = "  REGRESSION" if regression else ""
+        print(f"  {name:14} {metric:28} {before:>12} -> {value:>12} ({change:+.1f}%){marker}")
+    regressions = sum(1 for row in rows if row[5])
+    print(f"{regressions} Regression(en)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GymPi-Benchmarks ausführen")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Nur diese Benchmarks")
+    parser.add_argument('--quick', action='store_true', help="Kleinere Datenmengen für einen schnellen Lauf")
+    parser.add_argument('--output', help="Ergebnisdatei, Standard benchmarks/results/<commit>.json")
+    parser.add_argument('--compare', help="Frühere Ergebnisdatei zum Vergleich")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Verschlechterung in %%, ab der eine Regression gemeldet wird")
+    args = parser.parse_args(argv)
+
+    report = run(args.only or list(BENCHMARKS), 'quick' if args.quick else 'full')
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results', f"{report['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Ergebnisse gespeichert: {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = print_comparison(compare(baseline, report, args.threshold), baseline, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, LargeBinary, Index, event, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+from datetime import datetime
+import json
+import os
+import shared  # noqa: F401 (macht src/utils importierbar)
+from utils import hr_codec
+
+# Datenbank Setup: asynchroner Zugriff über aiosqlite mit Connection-Pool,
+# damit Abfragen den Event-Loop nicht blockieren. GYMPI_DATABASE_URL
+# verweist z.B. für Benchmarks auf eine eigene Datenbank
+DATABASE_URL = os.getenv("GYMPI_DATABASE_URL", "sqlite+aiosqlite:///./gympi.db")
+engine = create_async_engine(DATABASE_URL, pool_size=5, max_overflow=10, pool_pre_ping=True)
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+Base = declarative_base()
+
+# WAL erlaubt Lesen parallel zu einem Schreibvorgang; busy_timeout lässt
+# gleichzeitige Syncs warten statt mit "database is locked" abzubrechen
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -16000,
+    'temp_store': 'MEMORY',
+    'mmap_size': 64 * 1024 * 1024
+}
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+# Modelle
+class WorkoutData(Base):
+    __tablename__ = "workout_data"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Vom Gerät vergebene ID, macht wiederholte Uploads idempotent
+    client_id = Column(String, unique=True, index=True)
+    device_id = Column(String, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    workout_name = Column(String)
+    completed_exercises = Column(Integer)
+    # Veraltet: JSON-Liste der Messwerte, nach der Migration leer
+    heart_rate_data = Column(JSON)
+
+    # Herzfrequenz als gepackter BLOB (siehe hr_codec) plus Kennzahlen,
+    # damit Statistiken direkt in SQL berechnet werden können
+    hr_samples = Column(LargeBinary)
+    hr_count = Column(Integer, default=0)
+    hr_sum = Column(Float, default=0.0)
+    hr_min = Column(Integer)
+    hr_max = Column(Integer)
+    hr_start = Column(Float)
+    hr_end = Column(Float)
+
+    # Leistungsdaten des Geräts während des Workouts (Latenz-Histogramme
+    # pro Stufe und Zähler, siehe perf_stats.py), optional
+    perf = Column(JSON(none_as_null=True))
+
+    # Für die Keyset-Paginierung des Verlaufs: Gerät, dann (timestamp, id)
+    __table_args__ = (
+        Index('ix_workout_data_device_timestamp_id', 'device_id', 'timestamp', 'id'),
+    )
+
+class DeviceStats(Base):
+    """Laufend gepflegte Kennzahlen pro Gerät (per Trigger bei jedem Insert)"""
+    __tablename__ = "device_stats"
+
+    device_id = Column(String, primary_key=True)
+    workout_count = Column(Integer, nullable=False, default=0)
+    exercise_sum = Column(Integer, nullable=False, default=0)
+    hr_sum = Column(Float, nullable=False, default=0.0)
+    hr_count = Column(Integer, nullable=False, default=0)
+    last_seen = Column(DateTime)
+
+# Trigger halten device_stats in derselben Transaktion wie der Insert
+# aktuell. Per ON CONFLICT DO NOTHING übersprungene Duplikate lösen
+# keinen Trigger aus und werden daher nicht mitgezählt.
+DEVICE_STATS_TRIGGERS = {
+    'trg_workout_data_stats_insert': """
+        CREATE TRIGGER trg_workout_data_stats_insert AFTER INSERT ON workout_data
+        BEGIN
+            INSERT INTO device_stats (device_id, workout_count, exercise_sum, hr_sum, hr_count, last_seen)
+            VALUES (NEW.device_id, 1, COALESCE(NEW.completed_exercises, 0),
+                    COALESCE(NEW.hr_sum, 0), COALESCE(NEW.hr_count, 0), NEW.timestamp)
+            ON CONFLICT(device_id) DO UPDATE SET
+                workout_count = workout_count + 1,
+                exercise_sum = exercise_sum + excluded.exercise_sum,
+                hr_sum = hr_sum + excluded.hr_sum,
+                hr_count = hr_count + excluded.hr_count,
+                last_seen = MAX(COALESCE(last_seen, ''), COALESCE(excluded.last_seen, ''));
+        END
+    """,
+    'trg_workout_data_stats_delete': """
+        CREATE TRIGGER trg_workout_data_stats_delete AFTER DELETE ON workout_data
+        BEGIN
+            UPDATE device_stats SET
+                workout_count = workout_count - 1,
+                exercise_sum = exercise_sum - COALESCE(OLD.completed_exercises, 0),
+                hr_sum = hr_sum - COALESCE(OLD.hr_sum, 0),
+                hr_count = hr_count - COALESCE(OLD.hr_count, 0)
+            WHERE device_id = OLD.device_id;
+        END
+    """
+}
+
+# Nachträglich ergänzte Spalten mit ihrem SQLite-Typ
+ADDED_COLUMNS = {
+    'client_id': 'VARCHAR',
+    'hr_samples': 'BLOB',
+    'hr_count': 'INTEGER DEFAULT 0',
+    'hr_sum': 'FLOAT DEFAULT 0',
+    'hr_min': 'INTEGER',
+    'hr_max': 'INTEGER',
+    'hr_start': 'FLOAT',
+    'hr_end': 'FLOAT',
+    'perf': 'JSON'
+}
+
+def migrate_schema(conn):
+    """Ergänzt Spalten und Indizes, die in bestehenden Datenbanken fehlen"""
+    columns = {c['name'] for c in inspect(conn).get_columns(WorkoutData.__tablename__)}
+    for name, column_type in ADDED_COLUMNS.items():
+        if name not in columns:
+            conn.execute(text(f"ALTER TABLE workout_data ADD COLUMN {name} {column_type}"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_workout_data_client_id "
+        "ON workout_data (client_id)"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_workout_data_device_timestamp_id "
+        "ON workout_data (device_id, timestamp, id)"
+    ))
+    conn.commit()
+
+def migrate_heart_rate_storage(conn, chunk_size=500):
+    """
+    Überführt JSON-Herzfrequenzdaten bestehender Zeilen in das BLOB-Format
+
+    Arbeitet in Blöcken mit je eigenem Commit, damit auch große Datenbanken
+    ohne viel Speicher migriert werden können. Bereits migrierte Zeilen
+    werden übersprungen.
+    """
+    migrated = 0
+    while True:
+        rows = conn.execute(text(
+            "SELECT id, heart_rate_data FROM workout_data "
+            "WHERE heart_rate_data IS NOT NULL AND hr_samples IS NULL LIMIT :limit"
+        ), {'limit': chunk_size}).fetchall()
+        if not rows:
+            conn.commit()
+            return migrated
+
+        updates = []
+        for row_id, raw in rows:
+            samples = json.loads(raw)
+            # Ältere Zeilen enthalten doppelt kodiertes JSON
+            if isinstance(samples, str):
+                samples = json.loads(samples)
+            samples = [s for s in samples or [] if 'timestamp' in s and 'value' in s]
+            blob = hr_codec.encode_samples(samples)
+            updates.append({'id': row_id, 'hr_samples': blob, **hr_codec.summarize(blob)})
+
+        conn.execute(text(
+            "UPDATE workout_data SET hr_samples = :hr_samples, hr_count = :hr_count, "
+            "hr_sum = :hr_sum, hr_min = :hr_min, hr_max = :hr_max, "
+            "hr_start = :hr_start, hr_end = :hr_end, heart_rate_data = NULL "
+            "WHERE id = :id"
+        ), updates)
+        conn.commit()
+        migrated += len(updates)
+
+def install_device_stats(conn):
+    """
+    Legt die Trigger für device_stats an und befüllt die Tabelle einmalig
+    aus den vorhandenen Workouts
+    """
+    existing = {row[0] for row in conn.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+    ))}
+    if 'trg_workout_data_stats_insert' not in existing:
+        conn.execute(text("DELETE FROM device_stats"))
+        conn.execute(text(
+            "INSERT INTO device_stats (device_id, workout_count, exercise_sum, hr_sum, hr_count, last_seen) "
+            "SELECT device_id, COUNT(*), COALESCE(SUM(completed_exercises), 0), "
+            "COALESCE(SUM(hr_sum), 0), COALESCE(SUM(hr_count), 0), MAX(timestamp) "
+            "FROM workout_data GROUP BY device_id"
+        ))
+    for name, ddl in DEVICE_STATS_TRIGGERS.items():
+        if name not in existing:
+            conn.execute(text(ddl))
+    conn.commit()
+
+async def init_db():
+    # Datenbank erstellen und migrieren; die Migrationen sind synchroner
+    # Code und laufen über run_sync auf einer Pool-Connection
+    async with engine.connect() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.commit()
+        await conn.run_sync(migrate_schema)
+        await conn.run_sync(migrate_heart_rate_storage)
+        await conn.run_sync(install_device_stats)
+
+# Datenbank-Session Dependency
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
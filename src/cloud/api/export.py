@@ -0,0 +1,166 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from database import WorkoutData, SessionLocal
+import shared  # noqa: F401 (macht src/utils importierbar)
+from utils import hr_codec
+
+# Zeilen pro Block: so viele Workouts liegen beim Export höchstens
+# gleichzeitig im Speicher, unabhängig von der Gesamtgröße
+CHUNK_ROWS = 500
+
+SUMMARY_COLUMNS = (
+    WorkoutData.id, WorkoutData.client_id, WorkoutData.device_id, WorkoutData.timestamp,
+    WorkoutData.workout_name, WorkoutData.completed_exercises, WorkoutData.hr_count,
+    WorkoutData.hr_sum, WorkoutData.hr_min, WorkoutData.hr_max, WorkoutData.hr_start,
+    WorkoutData.hr_end
+)
+FIELDS = ('id', 'client_id', 'device_id', 'timestamp', 'workout_name', 'completed_exercises',
+          'hr_count', 'avg_heart_rate', 'hr_min', 'hr_max', 'hr_start', 'hr_end')
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def build_query(device_id=None, start=None, end=None, heart_rate=False):
+    """Abfrage in Index-Reihenfolge (Gerät, Zeit, id), optional mit Messwerten"""
+    columns = SUMMARY_COLUMNS + ((WorkoutData.hr_samples,) if heart_rate else ())
+    query = select(*columns)
+    if device_id:
+        query = query.where(WorkoutData.device_id == device_id)
+    if start:
+        query = query.where(WorkoutData.timestamp >= start)
+    if end:
+        query = query.where(WorkoutData.timestamp <= end)
+    return query.order_by(WorkoutData.device_id, WorkoutData.timestamp, WorkoutData.id)
+
+async def _partitions(query):
+    """
+    Liefert das Ergebnis blockweise über einen serverseitigen Cursor
+
+    Die Session gehört dem Generator, damit sie bis zum Ende der
+    gestreamten Antwort offen bleibt.
+    """
+    async with SessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=CHUNK_ROWS))
+        async for partition in result.partitions(CHUNK_ROWS):
+            yield partition
+
+def _record(row):
+    return {
+        'id': row.id,
+        'client_id': row.client_id,
+        'device_id': row.device_id,
+        'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+        'workout_name': row.workout_name,
+        'completed_exercises': row.completed_exercises,
+        'hr_count': row.hr_count or 0,
+        'avg_heart_rate': round(row.hr_sum / row.hr_count, 1) if row.hr_count else None,
+        'hr_min': row.hr_min,
+        'hr_max': row.hr_max,
+        'hr_start': row.hr_start,
+        'hr_end': row.hr_end
+    }
+
+def _heart_rate_columns(blob):
+    """Messwerte als (Unix-Zeitstempel, Pulswerte) für den Export"""
+    if not blob:
+        return [], []
+    offsets, values, t0 = hr_codec.decode(blob)
+    return (offsets.astype('float64') + t0).tolist(), values.tolist()
+
+async def stream_ndjson(query, heart_rate=False):
+    async for partition in _partitions(query):
+        lines = []
+        for row in partition:
+            record = _record(row)
+            if heart_rate:
+                timestamps, values = _heart_rate_columns(row.hr_samples)
+                record['heart_rate_data'] = [{'timestamp': t, 'value': v}
+                                             for t, v in zip(timestamps, values)]
+            lines.append(json.dumps(record))
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+async def stream_csv(query):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+    writer.writeheader()
+    async for partition in _partitions(query):
+        writer.writerows(_record(row) for row in partition)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+class _ChunkSink:
+    """Dateiartiges Ziel für den Parquet-Writer, das geschriebene Bytes sammelt"""
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+async def stream_parquet(query, heart_rate=False):
+    """
+    Parquet mit einer Row Group pro Block
+
+    Jede Row Group wird direkt nach dem Schreiben gesendet; nur der Footer
+    mit den Metadaten entsteht am Ende.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fields = [
+        ('id', pa.int64()), ('client_id', pa.string()), ('device_id', pa.string()),
+        ('timestamp', pa.timestamp('us')), ('workout_name', pa.string()),
+        ('completed_exercises', pa.int32()), ('hr_count', pa.int32()),
+        ('avg_heart_rate', pa.float32()), ('hr_min', pa.uint16()), ('hr_max', pa.uint16()),
+        ('hr_start', pa.float64()), ('hr_end', pa.float64())
+    ]
+    if heart_rate:
+        fields += [('hr_timestamps', pa.list_(pa.float64())), ('hr_values', pa.list_(pa.uint16()))]
+    schema = pa.schema(fields)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    async for partition in _partitions(query):
+        records = [_record(row) for row in partition]
+        columns = {name: [r[name] for r in records] for name in FIELDS}
+        columns['timestamp'] = [row.timestamp for row in partition]
+        if heart_rate:
+            hr = [_heart_rate_columns(row.hr_samples) for row in partition]
+            columns['hr_timestamps'] = [timestamps for timestamps, _ in hr]
+            columns['hr_values'] = [values for _, values in hr]
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
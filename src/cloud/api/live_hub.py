@@ -0,0 +1,68 @@
+import asyncio
+
+class Subscriber:
+    """
+    Warteschlange eines Dashboard-Clients
+
+    Die Queue ist begrenzt. Ist sie voll, wird die älteste Nachricht
+    verworfen, damit ein langsamer Client weder den Upload des Geräts
+    noch andere Clients aufhält. `dropped` zählt die verworfenen Nachrichten.
+    """
+    def __init__(self, device_id, max_queue):
+        self.device_id = device_id
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def put(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout):
+        """Nächste Nachricht oder None nach `timeout` Sekunden"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class LiveHub:
+    """Verteilt Live-Deltas der Geräte an alle abonnierten Dashboard-Clients"""
+    ALL_DEVICES = '*'
+
+    def __init__(self, max_queue=64):
+        self.max_queue = max_queue
+        self.subscribers = {}
+        self.published = 0
+
+    def subscribe(self, device_id=ALL_DEVICES):
+        subscriber = Subscriber(device_id, self.max_queue)
+        self.subscribers.setdefault(device_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        subscribers = self.subscribers.get(subscriber.device_id)
+        if subscribers:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[subscriber.device_id]
+
+    def publish(self, device_id, message):
+        """
+        Stellt eine Nachricht allen Abonnenten des Geräts zu
+
+        Returns:
+            Anzahl erreichter Clients
+        """
+        self.published += 1
+        targets = self.subscribers.get(device_id, set()) | self.subscribers.get(self.ALL_DEVICES, set())
+        for subscriber in targets:
+            subscriber.put(message)
+        return len(targets)
+
+    def stats(self):
+        return {
+            'subscribers': sum(len(s) for s in self.subscribers.values()),
+            'published': self.published,
+            'dropped': sum(s.dropped for subs in self.subscribers.values() for s in subs)
+        }
@@ -1,41 +1,44 @@
-from fastapi import FastAPI, HTTPException, Depends, FileResponse
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, JSON
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from pydantic import ValidationError
+from sqlalchemy import and_, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import numpy as np
+from contextlib import asynccontextmanager
 from datetime import datetime
+import base64
+import gzip
+import hashlib
 import json
-from typing import List, Optional
+from typing import Optional
 import os
 from pathlib import Path
+from database import WorkoutData, DeviceStats, get_db, init_db
+from schemas import SyncBatch, SyncItem, LiveBatch
+import shared  # noqa: F401 (macht src/utils importierbar)
+from utils import hr_codec
+import downsample
+import export
+from response_cache import ResponseCache
+from live_hub import LiveHub
+from perf_stats import PerfAggregate
 
-# Datenbank Setup
-DATABASE_URL = "sqlite:///./gympi.db"
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
-# Modelle
-class WorkoutData(Base):
-    __tablename__ = "workout_data"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    device_id = Column(String, index=True)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-    workout_name = Column(String)
-    completed_exercises = Column(Integer)
-    heart_rate_data = Column(JSON)
-    
-# Datenbank erstellen
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app):
+    # Datenbank erstellen bzw. migrieren
+    await init_db()
+    yield
 
 # FastAPI App
-app = FastAPI(title="GymPi Cloud API")
+app = FastAPI(title="GymPi Cloud API", lifespan=lifespan)
 
-# Statische Dateien
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Statische Dateien, unabhängig vom Arbeitsverzeichnis
+STATIC_DIR = Path(__file__).parent / "static"
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 # CORS Middleware
 app.add_middleware(
@@ -46,101 +49,518 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Datenbank-Session Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Antworten der Dashboard-Endpunkte; ein Sync verwirft die Einträge des
+# betroffenen Geräts, die Ablaufzeit ist nur eine Absicherung
+response_cache = ResponseCache(max_entries=512, ttl=60.0)
+
+# Verteilt Live-Deltas der Geräte an Dashboard-Clients (Server-Sent Events)
+live_hub = LiveHub(max_queue=64)
+LIVE_KEEPALIVE_SECONDS = 15
+
+def _heart_rate_list(workout):
+    """Herzfrequenzdaten einer Zeile im JSON-Format {'timestamp', 'value'}"""
+    if workout.hr_samples:
+        return hr_codec.to_samples(workout.hr_samples)
+    return []
+
+def _heart_rate_blob(data):
+    """
+    Herzfrequenz eines Workouts als BLOB
+
+    Gepackt gesendete Daten werden nur geprüft und unverändert übernommen,
+    JSON-Listen (ältere Geräte) werden gepackt. Ungültige Daten lösen
+    ValueError aus.
+    """
+    if data.heart_rate_packed:
+        try:
+            return hr_codec.validate(base64.b64decode(data.heart_rate_packed, validate=True))
+        except ValueError as e:
+            raise ValueError(f"heart_rate_packed: {e}")
+    samples = data.heart_rate_data
+    return hr_codec.encode([s.timestamp for s in samples], [s.value for s in samples])
+
+def parse_item(raw):
+    """
+    Prüft einen Eintrag der Sync-Queue
+
+    Returns:
+        (SyncItem, Herzfrequenz-BLOB); ValueError bei ungültigen Daten
+    """
+    item = SyncItem.model_validate(raw)
+    return item, _heart_rate_blob(item.data)
+
+def _rejection_reason(error):
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e['loc'] else e['msg']
+            for e in error.errors()
+        )
+    return str(error)
+
+async def ingest_workouts(db: AsyncSession, items, device_id: str):
+    """
+    Schreibt Workouts in einer Transaktion per executemany
+
+    Einträge mit bereits bekannter client_id werden übersprungen, damit
+    wiederholte Uploads nach Verbindungsabbrüchen keine Duplikate erzeugen.
+
+    Args:
+        items: Liste von (SyncItem, BLOB) aus parse_item
+
+    Returns:
+        Anzahl neu eingefügter Workouts
+    """
+    rows = []
+    seen = set()
+    for item, blob in items:
+        client_id = item.client_id()
+        if client_id:
+            if client_id in seen:
+                continue
+            seen.add(client_id)
+        data = item.data
+        rows.append({
+            'client_id': client_id,
+            'device_id': item.device_id or device_id,
+            'timestamp': data.date or item.timestamp or datetime.utcnow(),
+            'workout_name': data.workout_name,
+            'completed_exercises': data.completed_exercises,
+            'hr_samples': blob,
+            'perf': data.perf,
+            **hr_codec.summarize(blob)
+        })
+    if not rows:
+        return 0
+
+    stmt = sqlite_insert(WorkoutData).on_conflict_do_nothing(index_elements=['client_id'])
+    # Core-Ausführung über die Connection: executemany mit rowcount
+    conn = await db.connection()
+    result = await conn.execute(stmt, rows)
+    await db.commit()
+    inserted = max(result.rowcount, 0)
+    if inserted:
+        for device in {row['device_id'] for row in rows}:
+            response_cache.invalidate(device)
+    return inserted
 
 @app.get("/")
 async def root():
     """
     Hauptseite - Zeigt das Dashboard
     """
-    return FileResponse("static/index.html")
+    return FileResponse(STATIC_DIR / "index.html")
+
+def _device_stats_dict(stats):
+    avg_heart_rate = stats.hr_sum / stats.hr_count if stats and stats.hr_count else 0
+    return {
+        "total_workouts": stats.workout_count if stats else 0,
+        "total_exercises": stats.exercise_sum if stats else 0,
+        "average_heart_rate": round(avg_heart_rate, 1),
+        "last_seen": stats.last_seen if stats else None
+    }
 
 @app.get("/api/devices")
-async def get_devices(db: Session = Depends(get_db)):
+async def get_devices(db: AsyncSession = Depends(get_db)):
     """
     Gibt eine Liste aller Geräte mit ihren Statistiken zurück
+    Liest nur die laufend gepflegte Tabelle device_stats (eine Abfrage).
     """
-    # Hole alle einzigartigen Geräte-IDs
-    devices = db.query(WorkoutData.device_id).distinct().all()
-    device_list = []
-    
-    for (device_id,) in devices:
-        # Hole Statistiken für jedes Gerät
-        stats = await get_workout_stats(device_id, db)
-        device_list.append({
-            "device_id": device_id,
-            "stats": stats
-        })
-    
-    return device_list
+    cached = response_cache.get(('devices',))
+    if cached is not None:
+        return cached
+
+    generation = response_cache.generation()
+    devices = (await db.execute(select(DeviceStats).order_by(DeviceStats.device_id))).scalars().all()
+    result = [{
+        "device_id": stats.device_id,
+        "stats": _device_stats_dict(stats)
+    } for stats in devices]
+    response_cache.set(('devices',), result, generation=generation)
+    return result
 
 @app.post("/workout/sync")
-async def sync_workout(data: dict, db: Session = Depends(get_db)):
+async def sync_workout(data: dict, db: AsyncSession = Depends(get_db)):
     """
     Synchronisiert Workout-Daten von einem GymPi-Gerät
     """
     try:
-        workout_data = WorkoutData(
-            device_id=data.get('device_id', 'unknown'),
-            workout_name=data['data'].get('workout_name'),
-            completed_exercises=data['data'].get('completed_exercises', 0),
-            heart_rate_data=json.dumps(data['data'].get('heart_rate_data', []))
-        )
-        
-        db.add(workout_data)
-        db.commit()
-        return {"status": "success", "message": "Daten erfolgreich synchronisiert"}
+        item = parse_item(data)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        inserted = await ingest_workouts(db, [item], data.get('device_id', 'unknown'))
+        return {"status": "success", "message": "Daten erfolgreich synchronisiert", "inserted": inserted}
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/workout/sync/batch")
+async def sync_workout_batch(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Synchronisiert mehrere Workouts eines Geräts in einer Transaktion
+    Der Body darf gzip-komprimiert sein (Content-Encoding: gzip).
+    Wiederholte Einträge (gleiche client_id) werden ignoriert. Ungültige
+    Einträge werden einzeln abgelehnt und mit Grund in `rejected`
+    gemeldet; die gültigen werden trotzdem gespeichert.
+    """
+    body = await request.body()
+    if request.headers.get('content-encoding') == 'gzip':
+        try:
+            body = gzip.decompress(body)
+        except OSError:
+            raise HTTPException(status_code=400, detail="Ungültiger gzip-Body")
+    try:
+        batch = SyncBatch.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=_rejection_reason(e))
+
+    items = []
+    rejected = []
+    for index, raw in enumerate(batch.workouts):
+        try:
+            items.append(parse_item(raw))
+        except ValueError as e:
+            rejected.append({
+                "index": index,
+                "id": raw.get('id') if isinstance(raw, dict) else None,
+                "reason": _rejection_reason(e)
+            })
+
+    try:
+        inserted = await ingest_workouts(db, items, batch.device_id)
+        return {
+            "status": "success",
+            "count": len(batch.workouts),
+            "inserted": inserted,
+            "duplicates": len(items) - inserted,
+            "rejected": rejected
+        }
+
+    except HTTPException:
+        raise
     except Exception as e:
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+# Auswählbare Felder des Verlaufs und die dafür benötigten Spalten
+HISTORY_FIELDS = {
+    'id': (WorkoutData.id,),
+    'timestamp': (WorkoutData.timestamp,),
+    'workout_name': (WorkoutData.workout_name,),
+    'completed_exercises': (WorkoutData.completed_exercises,),
+    'avg_heart_rate': (WorkoutData.hr_sum, WorkoutData.hr_count),
+    'heart_rate_data': (WorkoutData.hr_samples,)
+}
+DEFAULT_HISTORY_FIELDS = ('id', 'timestamp', 'workout_name', 'completed_exercises', 'avg_heart_rate')
+MAX_HISTORY_LIMIT = 100
+
+def _encode_cursor(timestamp, row_id):
+    raw = json.dumps([timestamp.isoformat(), row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def _decode_cursor(cursor):
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Ungültiger Cursor")
+
+def _history_item(row, fields):
+    item = {}
+    for field in fields:
+        if field == 'avg_heart_rate':
+            item[field] = round(row.hr_sum / row.hr_count, 1) if row.hr_count else 0
+        elif field == 'heart_rate_data':
+            item[field] = _heart_rate_list(row)
+        else:
+            item[field] = getattr(row, field)
+    return item
+
+def _json_with_etag(payload):
+    body = json.dumps(payload, default=lambda v: v.isoformat(), separators=(',', ':')).encode('utf-8')
+    return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+def _etag_response(request: Request, body, etag):
+    """JSON-Antwort mit ETag; 304 ohne Body, wenn der Client den Stand schon hat"""
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]:
+        return Response(status_code=304, headers={'ETag': etag})
+    return Response(content=body, media_type='application/json', headers={'ETag': etag})
+
 @app.get("/workout/history/{device_id}")
-async def get_workout_history(device_id: str, db: Session = Depends(get_db)):
-    """
-    Ruft den Workout-Verlauf für ein bestimmtes Gerät ab
-    """
-    workouts = db.query(WorkoutData).filter(
-        WorkoutData.device_id == device_id
-    ).order_by(WorkoutData.timestamp.desc()).all()
-    
-    return [{
-        "id": w.id,
-        "timestamp": w.timestamp,
-        "workout_name": w.workout_name,
-        "completed_exercises": w.completed_exercises,
-        "heart_rate_data": json.loads(w.heart_rate_data)
-    } for w in workouts]
+async def get_workout_history(device_id: str, request: Request, limit: int = 20,
+                              cursor: Optional[str] = None, fields: Optional[str] = None,
+                              db: AsyncSession = Depends(get_db)):
+    """
+    Ruft den Workout-Verlauf für ein bestimmtes Gerät seitenweise ab
+
+    Sortiert nach (timestamp, id) absteigend. `next_cursor` der Antwort
+    liefert als `cursor` die nächste Seite; die Abfrage setzt dabei direkt
+    im Index an, statt Zeilen per OFFSET zu überspringen. Mit `fields`
+    (kommagetrennt) lassen sich z.B. die Herzfrequenzdaten weglassen.
+    """
+    limit = max(1, min(limit, MAX_HISTORY_LIMIT))
+    selected = DEFAULT_HISTORY_FIELDS
+    if fields:
+        selected = tuple(f.strip() for f in fields.split(',') if f.strip())
+        unknown = [f for f in selected if f not in HISTORY_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unbekannte Felder: {', '.join(unknown)}")
+
+    key = ('history', device_id, limit, cursor, selected)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return _etag_response(request, *cached)
+    generation = response_cache.generation(device_id)
+
+    # Nur die benötigten Spalten laden, timestamp und id immer für den Cursor
+    columns = {WorkoutData.id: None, WorkoutData.timestamp: None}
+    for field in selected:
+        columns.update(dict.fromkeys(HISTORY_FIELDS[field]))
+
+    query = select(*columns).where(WorkoutData.device_id == device_id)
+    if cursor:
+        timestamp, row_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            WorkoutData.timestamp < timestamp,
+            and_(WorkoutData.timestamp == timestamp, WorkoutData.id < row_id)
+        ))
+    query = query.order_by(WorkoutData.timestamp.desc(), WorkoutData.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+    body, etag = _json_with_etag({
+        "items": [_history_item(row, selected) for row in rows],
+        "next_cursor": next_cursor
+    })
+    response_cache.set(key, (body, etag), device=device_id, generation=generation)
+    return _etag_response(request, body, etag)
+
+@app.get("/workout/export")
+async def export_workouts(format: str = 'ndjson', device_id: Optional[str] = None,
+                          start: Optional[datetime] = None, end: Optional[datetime] = None,
+                          heart_rate: bool = False):
+    """
+    Exportiert Workouts gestreamt als NDJSON, CSV oder Parquet
+    Optional gefiltert nach Gerät und Zeitraum; `heart_rate` fügt die
+    Messwerte hinzu (nicht für CSV). Der Speicherbedarf bleibt unabhängig
+    von der Exportgröße konstant.
+    """
+    if format not in export.MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Format: {format}")
+    if format == 'csv' and heart_rate:
+        raise HTTPException(status_code=400, detail="CSV unterstützt keine Herzfrequenz-Messwerte")
+    if format == 'parquet' and not export.parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet-Export benötigt pyarrow")
+
+    query = export.build_query(device_id, start, end, heart_rate)
+    if format == 'ndjson':
+        body = export.stream_ndjson(query, heart_rate)
+    elif format == 'csv':
+        body = export.stream_csv(query)
+    else:
+        body = export.stream_parquet(query, heart_rate)
+
+    return StreamingResponse(body, media_type=export.MEDIA_TYPES[format], headers={
+        'Content-Disposition': f'attachment; filename="gympi_export.{format}"'
+    })
 
 @app.get("/workout/stats/{device_id}")
-async def get_workout_stats(device_id: str, db: Session = Depends(get_db)):
-    """
-    Berechnet Trainingsstatistiken für ein Gerät
-    """
-    workouts = db.query(WorkoutData).filter(
-        WorkoutData.device_id == device_id
-    ).all()
-    
-    total_workouts = len(workouts)
-    total_exercises = sum(w.completed_exercises for w in workouts)
-    
-    # Berechne durchschnittliche Herzfrequenz
-    all_hr_data = []
-    for w in workouts:
-        hr_data = json.loads(w.heart_rate_data)
-        all_hr_data.extend([d['value'] for d in hr_data if 'value' in d])
-    
-    avg_heart_rate = sum(all_hr_data) / len(all_hr_data) if all_hr_data else 0
-    
+async def get_workout_stats(device_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Gibt die Trainingsstatistiken eines Geräts zurück
+    Die Werte werden bei jedem Insert per Trigger fortgeschrieben.
+    """
+    key = ('stats', device_id)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    generation = response_cache.generation(device_id)
+    result = _device_stats_dict(await db.get(DeviceStats, device_id))
+    response_cache.set(key, result, device=device_id, generation=generation)
+    return result
+
+@app.get("/workout/heart_rate/{device_id}")
+async def get_heart_rate_window(device_id: str, start: float, end: float,
+                                db: AsyncSession = Depends(get_db)):
+    """
+    Herzfrequenz-Messwerte eines Geräts im Zeitfenster [start, end] (Unix-Zeit)
+    Passende Workouts werden in SQL über hr_start/hr_end gefunden, die
+    Messwerte per Binärsuche auf den gepackten Spalten ausgeschnitten.
+    """
+    blobs = (await db.execute(select(WorkoutData.hr_samples).where(
+        WorkoutData.device_id == device_id,
+        WorkoutData.hr_start <= end,
+        WorkoutData.hr_end >= start
+    ).order_by(WorkoutData.hr_start))).all()
+
+    timestamps, values = [], []
+    for (blob,) in blobs:
+        offsets, window_values, t0 = hr_codec.window(blob, start, end)
+        timestamps.append(offsets.astype(np.float64) + t0)
+        values.append(window_values)
+
+    timestamps = np.concatenate(timestamps) if timestamps else np.zeros(0)
+    values = np.concatenate(values) if values else np.zeros(0, dtype=np.uint16)
+    return {
+        "timestamps": timestamps.tolist(),
+        "values": values.tolist(),
+        "count": int(len(values)),
+        "min": int(values.min()) if len(values) else None,
+        "max": int(values.max()) if len(values) else None,
+        "mean": round(float(values.mean()), 1) if len(values) else None
+    }
+
+# Verkleinerte Reihen pro (Workout, Verfahren, Punkte); Workouts werden
+# nach dem Einfügen nicht mehr verändert, daher ohne Invalidierung
+DOWNSAMPLE_CACHE_SIZE = 256
+MAX_CHART_POINTS = 2000
+_downsample_cache = ResponseCache(max_entries=DOWNSAMPLE_CACHE_SIZE, ttl=None)
+
+@app.get("/workout/{workout_id}/heart_rate/downsampled")
+async def get_heart_rate_downsampled(workout_id: int, points: int = 300, method: str = 'lttb',
+                                     db: AsyncSession = Depends(get_db)):
+    """
+    Herzfrequenz eines Workouts, verkleinert auf höchstens `points` Punkte
+    `method` ist 'lttb' (formtreu) oder 'minmax' (Min/Max pro Bucket).
+    """
+    if method not in downsample.METHODS:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Verfahren: {method}")
+    points = max(2, min(points, MAX_CHART_POINTS))
+
+    key = (workout_id, method, points)
+    cached = _downsample_cache.get(key)
+    if cached is not None:
+        return cached
+
+    row = (await db.execute(select(WorkoutData.hr_samples).where(WorkoutData.id == workout_id))).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Workout nicht gefunden")
+
+    if row.hr_samples:
+        offsets, values, t0 = hr_codec.decode(row.hr_samples)
+    else:
+        offsets, values, t0 = np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.uint16), 0.0
+    indices = downsample.METHODS[method](offsets, values, points)
+    result = {
+        "workout_id": workout_id,
+        "method": method,
+        "source_count": int(len(values)),
+        "timestamps": (offsets[indices].astype(np.float64) + t0).tolist(),
+        "values": values[indices].tolist()
+    }
+
+    _downsample_cache.set(key, result)
+    return result
+
+@app.post("/live/{device_id}")
+async def post_live_batch(device_id: str, data: dict):
+    """
+    Nimmt Live-Deltas eines Geräts an und verteilt sie an die Abonnenten
+    Die Daten werden nicht gespeichert; das komplette Workout kommt
+    nach dem Training über /workout/sync/batch.
+    """
+    try:
+        LiveBatch(**data)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    message = json.dumps({"device_id": device_id, **data}, separators=(',', ':'))
+    return {"status": "success", "subscribers": live_hub.publish(device_id, message)}
+
+@app.get("/api/live/stats")
+async def get_live_stats():
+    """Anzahl Abonnenten sowie verteilte und verworfene Live-Deltas"""
+    return live_hub.stats()
+
+@app.get("/live/{device_id}/events")
+async def live_events(device_id: str, request: Request):
+    """
+    Server-Sent-Events-Stream der Live-Deltas eines Geräts ('*' für alle)
+    Jeder Client hat eine begrenzte Queue; bei Überlauf gehen die ältesten
+    Deltas verloren und der Client erhält ein 'lag'-Ereignis.
+    """
+    subscriber = live_hub.subscribe(device_id)
+
+    async def stream():
+        reported = 0
+        try:
+            while not await request.is_disconnected():
+                message = await subscriber.get(LIVE_KEEPALIVE_SECONDS)
+                if subscriber.dropped != reported:
+                    yield f"event: lag\ndata: {subscriber.dropped - reported}\n\n"
+                    reported = subscriber.dropped
+                if message is None:
+                    # Kommentarzeile hält Proxys und die Verbindung offen
+                    yield ": keepalive\n\n"
+                else:
+                    yield f"event: delta\ndata: {message}\n\n"
+        finally:
+            live_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+MAX_PERF_SESSIONS = 5000
+
+@app.get("/api/perf")
+async def get_fleet_perf(device_id: Optional[str] = None, limit: int = 500,
+                         db: AsyncSession = Depends(get_db)):
+    """
+    Leistungsdaten der Geräte aus den zuletzt synchronisierten Workouts
+    Latenz-Perzentile pro Stufe (Sensoren, Wiederholungserkennung,
+    Pulsberechnung, Display, Sync) und Zähler wie verworfene Messwerte
+    oder Spool-Tiefe; ohne device_id flottenweit und zusätzlich pro Gerät.
+    """
+    limit = max(1, min(limit, MAX_PERF_SESSIONS))
+    key = ('perf', device_id, limit)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    tag = device_id or response_cache.ALL_DEVICES
+    generation = response_cache.generation(tag)
+    query = select(WorkoutData.device_id, WorkoutData.perf).where(WorkoutData.perf.is_not(None))
+    if device_id:
+        query = query.where(WorkoutData.device_id == device_id)
+    query = query.order_by(WorkoutData.timestamp.desc(), WorkoutData.id.desc()).limit(limit)
+    rows = (await db.execute(query)).all()
+
+    fleet = PerfAggregate()
+    devices = {}
+    for row in rows:
+        fleet.add(row.perf)
+        devices.setdefault(row.device_id, PerfAggregate()).add(row.perf)
+
+    result = {**fleet.as_dict(), "devices": len(devices)}
+    if not device_id:
+        result["by_device"] = {
+            device: {
+                "sessions": aggregate.sessions,
+                "p95_ms": {name: round(stage.percentile(95), 3) for name, stage in sorted(aggregate.stages.items())},
+                "counters": {name: total for name, (total, _) in sorted(aggregate.counters.items())}
+            } for device, aggregate in sorted(devices.items())
+        }
+    response_cache.set(key, result, device=tag, generation=generation)
+    return result
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Treffer- und Fehlzugriffe der In-Process-Caches"""
     return {
-        "total_workouts": total_workouts,
-        "total_exercises": total_exercises,
-        "average_heart_rate": round(avg_heart_rate, 1)
+        "responses": response_cache.stats(),
+        "downsampled_heart_rate": _downsample_cache.stats()
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+import math
+
+# Muss zu utils/instrumentation.py des Geräts passen: logarithmische
+# Buckets ab 1 µs, Obergrenze von Bucket i = 2^((i+1)/per_octave) µs
+SUPPORTED_VERSION = 1
+BUCKETS_PER_OCTAVE = 4
+
+class StageAggregate:
+    """Zusammengeführte Latenz-Histogramme einer Stufe über viele Workouts"""
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, exported):
+        self.count += int(exported.get('n', 0))
+        self.sum_ms += float(exported.get('sum_ms', 0.0))
+        self.max_ms = max(self.max_ms, float(exported.get('max_ms', 0.0)))
+        for index, count in exported.get('b', {}).items():
+            index = int(index)
+            self.buckets[index] = self.buckets.get(index, 0) + int(count)
+
+    def percentile(self, p):
+        """Obergrenze des Buckets mit dem p-Perzentil in ms"""
+        total = sum(self.buckets.values())
+        if not total:
+            return 0.0
+        target = max(1, math.ceil(total * p / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                upper_ms = 2.0 ** ((index + 1) / BUCKETS_PER_OCTAVE) / 1000
+                return min(upper_ms, self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.sum_ms / max(self.count, 1), 3),
+            'p50_ms': round(self.percentile(50), 3),
+            'p95_ms': round(self.percentile(95), 3),
+            'p99_ms': round(self.percentile(99), 3),
+            'max_ms': round(self.max_ms, 3)
+        }
+
+class PerfAggregate:
+    """
+    Fasst die an Workouts angehängten Leistungsdaten zusammen
+
+    Stufen werden über ihre Histogramme exakt zusammengeführt; Zähler
+    werden summiert und zusätzlich der höchste Einzelwert festgehalten.
+    Startzeiten (`boot`) und CPU-Auslastung werden gemittelt.
+    Daten in unbekanntem Format werden übersprungen.
+    """
+    def __init__(self):
+        self.sessions = 0
+        self.skipped = 0
+        self.stages = {}
+        self.counters = {}
+        self.cpu_percent = []
+        self.boot = {}
+
+    def add(self, perf):
+        if not isinstance(perf, dict) or perf.get('version') != SUPPORTED_VERSION or \
+                perf.get('buckets_per_octave') != BUCKETS_PER_OCTAVE:
+            self.skipped += 1
+            return
+        self.sessions += 1
+        for name, exported in perf.get('stages', {}).items():
+            self.stages.setdefault(name, StageAggregate()).add(exported)
+        for name, value in perf.get('counters', {}).items():
+            if isinstance(value, (int, float)):
+                total, peak = self.counters.get(name, (0, 0))
+                self.counters[name] = (total + value, max(peak, value))
+        if isinstance(perf.get('cpu_percent'), (int, float)):
+            self.cpu_percent.append(perf['cpu_percent'])
+        boot = perf.get('boot')
+        if isinstance(boot, dict):
+            for name, value in boot.items():
+                if isinstance(value, (int, float)):
+                    self.boot.setdefault(name, []).append(value)
+
+    def as_dict(self):
+        return {
+            'sessions': self.sessions,
+            'skipped': self.skipped,
+            'stages': {name: stage.as_dict() for name, stage in sorted(self.stages.items())},
+            'counters': {name: {'sum': total, 'max': peak}
+                         for name, (total, peak) in sorted(self.counters.items())},
+            'cpu_percent': {
+                'mean': round(sum(self.cpu_percent) / len(self.cpu_percent), 1),
+                'max': max(self.cpu_percent)
+            } if self.cpu_percent else None,
+            'boot': {name: {'mean': round(sum(values) / len(values), 1), 'max': max(values)}
+                     for name, values in sorted(self.boot.items())}
+        }
@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+
+class ResponseCache:
+    """
+    LRU-Cache mit Ablaufzeit für API-Antworten
+
+    Jeder Eintrag gehört zu einem Gerät (oder zu ALL_DEVICES für geräteüber-
+    greifende Antworten). invalidate() verwirft beim Sync genau die Einträge
+    des betroffenen Geräts und die geräteübergreifenden. Über generation()
+    erkennt eine laufende Abfrage, dass zwischenzeitlich invalidiert wurde,
+    und legt ihr dann veraltetes Ergebnis nicht mehr ab.
+    """
+    ALL_DEVICES = '*'
+
+    def __init__(self, max_entries=512, ttl=60.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()  # Schlüssel -> (Ablaufzeit, Gerät, Wert)
+        self.device_keys = {}
+        self.generations = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Gespeicherter Wert oder None"""
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= self.clock():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def generation(self, device=ALL_DEVICES):
+        return self.generations.get(device, 0)
+
+    def set(self, key, value, device=ALL_DEVICES, generation=None):
+        """
+        Legt einen Wert ab
+
+        Args:
+            generation: Stand von generation(device) vor der Abfrage; wurde
+                seitdem invalidiert, wird der Wert verworfen
+        """
+        if generation is not None and generation != self.generation(device):
+            return
+        if key in self.entries:
+            self._remove(key)
+        expires = self.clock() + self.ttl if self.ttl else None
+        self.entries[key] = (expires, device, value)
+        self.device_keys.setdefault(device, set()).add(key)
+
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def invalidate(self, device):
+        """Verwirft alle Einträge eines Geräts und die geräteübergreifenden"""
+        for tag in {device, self.ALL_DEVICES}:
+            self.generations[tag] = self.generation(tag) + 1
+            for key in self.device_keys.pop(tag, ()):
+                del self.entries[key]
+                self.invalidations += 1
+
+    def _remove(self, key):
+        _, device, _ = self.entries.pop(key)
+        keys = self.device_keys[device]
+        keys.discard(key)
+        if not keys:
+            del self.device_keys[device]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+class HeartRateSample(BaseModel):
+    timestamp: float
+    value: float
+
+class WorkoutPayload(BaseModel):
+    """Workout-Daten wie vom Gerät gespeichert (WorkoutManager.save_progress)"""
+    id: Optional[str] = None
+    date: Optional[datetime] = None
+    workout_name: Optional[str] = None
+    completed_exercises: int = 0
+    heart_rate_data: List[HeartRateSample] = []
+    # Alternativ gepackt im hr_codec-Format (Base64), wie vom Gerät gespeichert
+    heart_rate_packed: Optional[str] = None
+    # Leistungsdaten des Geräts (Metrics.export()), optional
+    perf: Optional[Dict[str, Any]] = None
+
+class SyncItem(BaseModel):
+    """Ein Eintrag der Sync-Queue des Geräts"""
+    id: Optional[str] = None
+    timestamp: Optional[datetime] = None
+    device_id: Optional[str] = None
+    data: WorkoutPayload
+
+    def client_id(self):
+        return self.id or self.data.id
+
+class SyncBatch(BaseModel):
+    device_id: str = 'unknown'
+    # Einträge werden einzeln als SyncItem geprüft, damit ein ungültiger
+    # Eintrag nicht den ganzen Batch verwirft
+    workouts: List[Any] = []
+
+class LiveHeartRate(BaseModel):
+    """Pulswerte eines Live-Batches: Startzeit, Abstände in ms, Werte"""
+    t0: float
+    dt: List[int]
+    v: List[int]
+
+class LiveBatch(BaseModel):
+    """Live-Deltas eines laufenden Workouts (siehe cloud/live_stream.py)"""
+    session: str
+    seq: int
+    events: List[Dict[str, Any]] = []
+    hr: Optional[LiveHeartRate] = None
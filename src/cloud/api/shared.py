@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+# Code, den Gerät und API gemeinsam nutzen (z.B. utils/hr_codec.py), liegt
+# unter src/. Angehängt statt vorangestellt, damit die API-Module (main,
+# database, ...) Vorrang vor gleichnamigen Gerätemodulen behalten.
+SRC_DIR = str(Path(__file__).resolve().parents[2])
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
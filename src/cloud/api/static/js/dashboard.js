@@ -62,27 +62,57 @@ function createDeviceCard(device) {
     return col;
 }
 
+// Felder für die Verlaufstabelle (ohne Herzfrequenz-Messwerte)
+const HISTORY_LIST_FIELDS = 'id,timestamp,workout_name,completed_exercises,avg_heart_rate';
+const HISTORY_PAGE_SIZE = 20;
+
+let historyDeviceId = null;
+let historyCursor = null;
+let historyItems = [];
+
+// Lade eine Seite der Workout-Historie
+async function loadHistoryPage(deviceId, cursor) {
+    const params = new URLSearchParams({ limit: HISTORY_PAGE_SIZE, fields: HISTORY_LIST_FIELDS });
+    if (cursor) params.set('cursor', cursor);
+    const response = await fetch(`/workout/history/${deviceId}?${params}`);
+    return response.json();
+}
+
 // Zeige Gerätedetails
 async function showDeviceDetails(deviceId) {
     const modal = new bootstrap.Modal(document.getElementById('deviceModal'));
     
     try {
-        // Lade Workout-Historie
-        const historyResponse = await fetch(`/workout/history/${deviceId}`);
-        const history = await historyResponse.json();
+        // Lade die erste Seite der Workout-Historie
+        const page = await loadHistoryPage(deviceId, null);
+        historyDeviceId = deviceId;
+        historyItems = page.items;
+        historyCursor = page.next_cursor;
+        displayWorkoutHistory(historyItems);
         
-        // Zeige Workout-Historie
-        displayWorkoutHistory(history);
-        
-        // Erstelle Herzfrequenz-Chart
-        createHeartRateChart(history);
+        // Herzfrequenz des letzten Workouts, serverseitig verkleinert
+        await createHeartRateChart(historyItems[0]);
         
+        startLiveView(deviceId);
         modal.show();
     } catch (error) {
         console.error('Fehler beim Laden der Details:', error);
     }
 }
 
+// Lade die nächste Seite und hänge sie an die Tabelle an
+async function loadMoreHistory() {
+    if (!historyCursor) return;
+    try {
+        const page = await loadHistoryPage(historyDeviceId, historyCursor);
+        historyItems = historyItems.concat(page.items);
+        historyCursor = page.next_cursor;
+        displayWorkoutHistory(historyItems);
+    } catch (error) {
+        console.error('Fehler beim Laden der Historie:', error);
+    }
+}
+
 // Zeige Workout-Historie
 function displayWorkoutHistory(history) {
     const container = document.getElementById('workoutHistory');
@@ -105,29 +135,41 @@ function displayWorkoutHistory(history) {
                     <td>${new Date(workout.timestamp).toLocaleDateString()}</td>
                     <td>${workout.workout_name}</td>
                     <td>${workout.completed_exercises}</td>
-                    <td>${calculateAverageHeartRate(workout.heart_rate_data)} BPM</td>
+                    <td>${Math.round(workout.avg_heart_rate)} BPM</td>
                 </tr>
             `).join('')}
         </tbody>
     `;
     
     container.appendChild(table);
+
+    if (historyCursor) {
+        const button = document.createElement('button');
+        button.className = 'btn btn-secondary';
+        button.textContent = 'Mehr laden';
+        button.onclick = loadMoreHistory;
+        container.appendChild(button);
+    }
 }
 
+// Punktbudget des Diagramms (etwa ein Punkt pro Pixel Breite)
+const CHART_POINTS = 400;
+
 // Erstelle Herzfrequenz-Chart
-function createHeartRateChart(history) {
+async function createHeartRateChart(workout) {
     if (heartRateChart) {
         heartRateChart.destroy();
+        heartRateChart = null;
     }
     
-    const ctx = document.getElementById('heartRateChart').getContext('2d');
-    const latestWorkout = history[0];
-    
-    if (!latestWorkout) return;
+    if (!workout) return;
     
-    const heartRateData = latestWorkout.heart_rate_data;
-    const labels = heartRateData.map((_, index) => index);
-    const data = heartRateData.map(d => d.value);
+    const response = await fetch(`/workout/${workout.id}/heart_rate/downsampled?points=${CHART_POINTS}&method=lttb`);
+    const series = await response.json();
+    const start = series.timestamps.length ? series.timestamps[0] : 0;
+    const labels = series.timestamps.map(t => Math.round(t - start));
+    const data = series.values;
+    const ctx = document.getElementById('heartRateChart').getContext('2d');
     
     heartRateChart = new Chart(ctx, {
         type: 'line',
@@ -153,15 +195,59 @@ function createHeartRateChart(history) {
     });
 }
 
-// Berechne durchschnittliche Herzfrequenz
-function calculateAverageHeartRate(heartRateData) {
-    if (!heartRateData || heartRateData.length === 0) return 0;
-    const sum = heartRateData.reduce((acc, curr) => acc + curr.value, 0);
-    return Math.round(sum / heartRateData.length);
+// Live-Ansicht eines laufenden Workouts (Server-Sent Events)
+let liveSource = null;
+
+function startLiveView(deviceId) {
+    stopLiveView();
+    const container = document.getElementById('liveStatus');
+    const live = { exercise: null, set: null, sets: null, reps: 0, targetReps: null, heartRate: null, phase: null };
+
+    liveSource = new EventSource(`/live/${deviceId}/events`);
+    liveSource.addEventListener('delta', event => {
+        const batch = JSON.parse(event.data);
+        batch.events.forEach(e => {
+            if (e.type === 'set') {
+                Object.assign(live, { exercise: e.exercise, set: e.set, sets: e.sets, targetReps: e.reps, reps: 0, phase: 'exercise' });
+            } else if (e.type === 'reps') {
+                live.reps = e.reps;
+            } else if (e.type === 'phase') {
+                live.phase = e.phase;
+            }
+        });
+        if (batch.hr && batch.hr.v.length) {
+            live.heartRate = batch.hr.v[batch.hr.v.length - 1];
+        }
+        renderLiveStatus(container, live);
+    });
+}
+
+function stopLiveView() {
+    if (liveSource) {
+        liveSource.close();
+        liveSource = null;
+    }
+    document.getElementById('liveStatus').classList.add('d-none');
+}
+
+function renderLiveStatus(container, live) {
+    container.classList.remove('d-none');
+    if (live.phase === 'finished') {
+        container.innerHTML = '<strong>Live:</strong> Workout beendet';
+        return;
+    }
+    const phase = live.phase === 'rest' ? ' (Pause)' : '';
+    container.innerHTML = `
+        <strong>Live:</strong> ${live.exercise || '-'}${phase} &middot;
+        Satz ${live.set || '-'}/${live.sets || '-'} &middot;
+        Wdh. ${live.reps}/${live.targetReps || '-'} &middot;
+        Puls ${live.heartRate || '-'} BPM
+    `;
 }
 
 // Initialisierung
 document.addEventListener('DOMContentLoaded', () => {
+    document.getElementById('deviceModal').addEventListener('hidden.bs.modal', stopLiveView);
     loadDevices();
     // Aktualisiere alle 30 Sekunden
     setInterval(loadDevices, 30000);
@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import deque
+
+class LiveBuffer:
+    """
+    Sammelt Live-Deltas eines laufenden Workouts für den nächsten Upload
+
+    Ereignisse (Wiederholungen, Satzwechsel, Phasen) und Pulswerte werden
+    zwischen zwei Uploads gepuffert und dann als ein kompakter Batch
+    abgeholt. Pulswerte werden spaltenweise mit Zeitabständen in
+    Millisekunden übertragen. Beide Puffer sind begrenzt; wenn keine
+    Verbindung besteht, fallen die ältesten Einträge weg. Live-Daten sind
+    flüchtig, die vollständigen Daten kommen über den Spool.
+    """
+    def __init__(self, max_events=256, max_samples=1024, clock=time.time):
+        self.clock = clock
+        self.events = deque(maxlen=max_events)
+        self.samples = deque(maxlen=max_samples)
+        self.lock = threading.Lock()
+        self.session_id = None
+        self.seq = 0
+        self.dropped = 0
+
+    def start(self, session_id, **info):
+        """Beginnt eine neue Live-Session; alte Deltas werden verworfen"""
+        with self.lock:
+            self.session_id = session_id
+            self.seq = 0
+            self.events.clear()
+            self.samples.clear()
+            self.events.append({'t': self.clock(), 'type': 'start', **info})
+
+    def add_event(self, kind, **fields):
+        with self.lock:
+            if self.session_id is None:
+                return
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append({'t': self.clock(), 'type': kind, **fields})
+
+    def add_heart_rate(self, timestamp, value):
+        with self.lock:
+            if self.session_id is None:
+                return
+            if len(self.samples) == self.samples.maxlen:
+                self.dropped += 1
+            self.samples.append((timestamp, value))
+
+    def take(self):
+        """
+        Holt alle gepufferten Deltas als Batch ab
+
+        Returns:
+            Dict für den Upload oder None, wenn nichts anliegt
+        """
+        with self.lock:
+            if self.session_id is None or not (self.events or self.samples):
+                return None
+            batch = {
+                'session': self.session_id,
+                'seq': self.seq,
+                'events': list(self.events)
+            }
+            if self.samples:
+                t0 = self.samples[0][0]
+                batch['hr'] = {
+                    't0': t0,
+                    'dt': [int(round((t - t0) * 1000)) for t, _ in self.samples],
+                    'v': [int(v) for _, v in self.samples]
+                }
+            self.seq += 1
+            self.events.clear()
+            self.samples.clear()
+            return batch
@@ -0,0 +1,168 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+SPOOL_SUFFIX = ".json"
+
+class OfflineSpool:
+    """
+    Dauerhafte, geordnete Warteschlange für noch nicht synchronisierte Daten
+
+    Jeder Eintrag ist eine Datei mit fortlaufender Sequenznummer und wird
+    atomar (temporäre Datei, fsync, os.replace) geschrieben. Das
+    Verzeichnis wird nur beim Start einmal gelesen; danach hält ein
+    In-Memory-Index Reihenfolge und Größen.
+    """
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.entries = deque()  # (Sequenznummer, Pfad, Größe in Bytes)
+        self.total_bytes = 0
+
+        for tmp in self.directory.glob("*.tmp"):
+            tmp.unlink()
+        for path in sorted(self.directory.glob(f"*{SPOOL_SUFFIX}")):
+            try:
+                seq = int(path.stem)
+            except ValueError:
+                continue
+            self._index(seq, path)
+        self.next_seq = self.entries[-1][0] + 1 if self.entries else 1
+
+        self._adopt_legacy_files()
+
+    def _index(self, seq, path):
+        size = path.stat().st_size
+        self.entries.append((seq, path, size))
+        self.total_bytes += size
+
+    def _adopt_legacy_files(self):
+        """Übernimmt Dateien im alten Format (workout_<Zeitstempel>.json)"""
+        for path in sorted(self.directory.glob(f"workout_*{SPOOL_SUFFIX}")):
+            with self.lock:
+                seq = self.next_seq
+                self.next_seq += 1
+                target = self._path(seq)
+                os.replace(path, target)
+                self._index(seq, target)
+
+    def _path(self, seq):
+        return self.directory / f"{seq:012d}{SPOOL_SUFFIX}"
+
+    def __len__(self):
+        return len(self.entries)
+
+    def append(self, item):
+        """Schreibt einen Eintrag dauerhaft ans Ende der Warteschlange"""
+        data = json.dumps(item).encode('utf-8')
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq += 1
+            path = self._path(seq)
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            self.entries.append((seq, path, len(data)))
+            self.total_bytes += len(data)
+        return seq
+
+    def peek(self, max_items, max_bytes):
+        """
+        Älteste Einträge bis zu den Grenzen, ohne sie zu entfernen
+        Mindestens ein Eintrag wird geliefert, auch wenn er allein größer ist.
+
+        Returns:
+            Liste von (Sequenznummer, Eintrag, Größe)
+        """
+        with self.lock:
+            head = list(self._head(max_items, max_bytes))
+        result = []
+        for seq, path, size in head:
+            try:
+                with open(path, 'rb') as f:
+                    result.append((seq, json.loads(f.read()), size))
+            except (OSError, ValueError) as e:
+                # Beschädigten Eintrag nicht ewig erneut versuchen
+                print(f"Verwerfe beschädigten Spool-Eintrag {path}: {e}")
+                self.remove([seq])
+        return result
+
+    def _head(self, max_items, max_bytes):
+        used = 0
+        for count, (seq, path, size) in enumerate(self.entries):
+            if count >= max_items or (count and used + size > max_bytes):
+                break
+            used += size
+            yield seq, path, size
+
+    def remove(self, seqs):
+        """Entfernt erfolgreich übertragene Einträge (vom Anfang der Warteschlange)"""
+        seqs = set(seqs)
+        with self.lock:
+            kept = deque()
+            for seq, path, size in self.entries:
+                if seq in seqs:
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    self.total_bytes -= size
+                else:
+                    kept.append((seq, path, size))
+            self.entries = kept
+
+    def quarantine(self, seqs):
+        """
+        Verschiebt dauerhaft abgelehnte Einträge nach `rejected/`
+
+        Sie blockieren damit nicht mehr den Anfang der Warteschlange, bleiben
+        aber zur Analyse erhalten.
+        """
+        seqs = set(seqs)
+        rejected_dir = self.directory / "rejected"
+        rejected_dir.mkdir(exist_ok=True)
+        with self.lock:
+            kept = deque()
+            for seq, path, size in self.entries:
+                if seq in seqs:
+                    try:
+                        os.replace(path, rejected_dir / path.name)
+                    except FileNotFoundError:
+                        pass
+                    self.total_bytes -= size
+                else:
+                    kept.append((seq, path, size))
+            self.entries = kept
+
+class Backoff:
+    """Exponentielles Backoff mit Jitter für Verbindungsversuche"""
+    def __init__(self, base=2.0, maximum=300.0, clock=time.monotonic):
+        self.base = base
+        self.maximum = maximum
+        self.clock = clock
+        self.failures = 0
+        self.next_attempt = 0.0
+
+    def ready(self):
+        return self.clock() >= self.next_attempt
+
+    def failure(self):
+        """Verdoppelt die Wartezeit; zufällige Streuung verhindert, dass alle Geräte gleichzeitig wiederkommen"""
+        # Exponent begrenzen, sonst OverflowError nach ~1000 Fehlversuchen (Tage offline)
+        delay = min(self.maximum, self.base * 2 ** min(self.failures, 32))
+        self.failures += 1
+        delay = random.uniform(delay / 2, delay)
+        self.next_attempt = self.clock() + delay
+        return delay
+
+    def success(self):
+        self.failures = 0
+        self.next_attempt = 0.0
@@ -0,0 +1,153 @@
+"""
+Lokaler Ersatz für die Cloud-API zum Testen von CloudSync ohne FastAPI
+
+Starten mit:
+    python src/cloud/stub_server.py --port 8000 [--fail-rate 0.3]
+und GYMPI_API_URL=http://localhost:8000 setzen. Live-Deltas lassen sich
+unter /live/<device_id>/events (Server-Sent Events) mitlesen.
+"""
+import argparse
+import gzip
+import json
+import queue
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubCloudServer:
+    """
+    Minimaler HTTP-Server, der Sync-Requests annimmt und protokolliert
+
+    `fail_rate` bzw. `available` simulieren instabiles WLAN oder einen
+    ausgefallenen Server.
+    """
+    def __init__(self, host='127.0.0.1', port=0, fail_rate=0.0):
+        self.fail_rate = fail_rate
+        self.available = True
+        self.requests = []  # (Pfad, Body-Bytes auf der Leitung, Anzahl Workouts)
+        self.workouts = []
+        self.live_batches = []  # (device_id, Batch)
+        self.live_queues = {}  # Queue -> abonniertes Gerät ('*' für alle)
+        self.lock = threading.Lock()
+        self.running = True
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-Alive wie beim echten Server
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+                status, payload = stub.handle(self.path, self.headers, body)
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parts = self.path.strip('/').split('/')
+                if len(parts) != 3 or parts[0] != 'live' or parts[2] != 'events':
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                stub.stream_live(parts[1], self.wfile)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(self, path, headers, body):
+        if not self.available or random.random() < self.fail_rate:
+            return 503, {'detail': 'Stub nicht verfügbar'}
+
+        wire_bytes = len(body)
+        if headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {'detail': 'Ungültiges JSON'}
+
+        if path.startswith('/live/'):
+            return 200, {'status': 'success', 'subscribers': self.publish_live(path.split('/')[2], payload)}
+
+        workouts = payload.get('workouts', [payload]) if isinstance(payload, dict) else []
+        with self.lock:
+            self.requests.append((path, wire_bytes, len(workouts)))
+            self.workouts.extend(workouts)
+        return 200, {'status': 'success', 'count': len(workouts)}
+
+    def publish_live(self, device_id, batch, max_queue=64):
+        """Verteilt einen Live-Batch; volle Client-Queues verlieren den ältesten Eintrag"""
+        message = json.dumps({'device_id': device_id, **batch})
+        with self.lock:
+            self.live_batches.append((device_id, batch))
+            targets = [q for q, device in self.live_queues.items() if device in (device_id, '*')]
+        for q in targets:
+            while True:
+                try:
+                    q.put_nowait(message)
+                    break
+                except queue.Full:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+        return len(targets)
+
+    def stream_live(self, device_id, wfile, max_queue=64):
+        q = queue.Queue(maxsize=max_queue)
+        with self.lock:
+            self.live_queues[q] = device_id
+        try:
+            while self.running:
+                try:
+                    message = q.get(timeout=0.5)
+                    wfile.write(f"event: delta\ndata: {message}\n\n".encode('utf-8'))
+                except queue.Empty:
+                    wfile.write(b": keepalive\n\n")
+                wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self.lock:
+                del self.live_queues[q]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.server.shutdown()
+        self.server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler Stub der GymPi Cloud-API")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubCloudServer(port=args.port, fail_rate=args.fail_rate)
+    print(f"Stub-Server läuft unter {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -1,105 +1,237 @@
 import requests
+from requests.adapters import HTTPAdapter
+import gzip
 import json
 import os
+import socket
 from datetime import datetime
 from pathlib import Path
 import threading
-import queue
 import time
+import uuid
+from cloud.spool import OfflineSpool, Backoff
+from cloud.live_stream import LiveBuffer
+from utils.instrumentation import METRICS
+
+# Antworten, nach denen derselbe Batch später erneut gesendet wird; alle
+# übrigen 4xx gelten als dauerhafte Ablehnung
+RETRY_STATUS = {408, 429}
+
+def _retryable(status):
+    """Netzwerkfehler (None), Serverfehler und Überlastung sind vorübergehend"""
+    return status is None or status >= 500 or status in RETRY_STATUS
 
 class CloudSync:
-    def __init__(self, api_url=None):
+    def __init__(self, api_url=None, device_id=None, max_batch_items=50,
+                 max_batch_bytes=512 * 1024, flush_byte_budget=2 * 1024 * 1024,
+                 spool_dir=None, clock=None, metrics=None):
         self.api_url = api_url or os.getenv('GYMPI_API_URL')
-        self.sync_queue = queue.Queue()
+        self.device_id = device_id or os.getenv('GYMPI_DEVICE_ID') or socket.gethostname()
         self.sync_thread = None
         self.running = False
-        
-        # Erstelle einen Ordner für offline Daten
-        self.offline_dir = Path(__file__).parent.parent.parent / 'data' / 'offline_data'
-        self.offline_dir.mkdir(parents=True, exist_ok=True)
-        
+        self._wake = threading.Event()
+
+        # Obergrenzen für einen Upload-Batch (unkomprimiert) und pro Durchlauf
+        self.max_batch_items = max_batch_items
+        self.max_batch_bytes = max_batch_bytes
+        self.flush_byte_budget = flush_byte_budget
+        self.backoff = Backoff()
+
+        # Eine Keep-Alive-Session für alle Uploads: spart TLS-Handshakes
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Alle Daten laufen über den dauerhaften Spool; ohne Netz bleiben sie dort
+        self.offline_dir = Path(spool_dir) if spool_dir else \
+            Path(__file__).parent.parent.parent / 'data' / 'offline_data'
+        self.spool = OfflineSpool(self.offline_dir)
+
+        # Live-Deltas während des Workouts; eigenes, kurzes Backoff, damit
+        # ein ausgefallener Server das Training nicht verlangsamt
+        self.live = LiveBuffer(clock=clock.time if clock else time.time)
+        self.live_backoff = Backoff(base=1.0, maximum=30.0)
+
+        # Messpunkte: Dauer von Einreihen und Upload, Tiefe der Warteschlange
+        self.metrics = metrics or METRICS
+        self.metrics.gauge('spool_depth', lambda: len(self.spool))
+        self.metrics.gauge('spool_bytes', lambda: self.spool.total_bytes)
+        self.metrics.gauge('live_dropped', lambda: self.live.dropped)
+
     def start_sync_thread(self):
         """Startet den Synchronisations-Thread"""
         self.running = True
         self.sync_thread = threading.Thread(target=self._sync_worker)
         self.sync_thread.daemon = True
         self.sync_thread.start()
-        
+
     def stop_sync_thread(self):
         """Stoppt den Synchronisations-Thread"""
         self.running = False
+        self._wake.set()
         if self.sync_thread:
             self.sync_thread.join()
-            
+        self.session.close()
+
     def _sync_worker(self):
         """Worker-Thread für die Synchronisation"""
         while self.running:
-            try:
-                # Versuche, Daten aus der Queue zu holen
-                data = self.sync_queue.get(timeout=1)
-                self._send_to_cloud(data)
-                self.sync_queue.task_done()
-            except queue.Empty:
-                # Versuche, offline gespeicherte Daten zu synchronisieren
-                self._sync_offline_data()
-            except Exception as e:
-                print(f"Fehler bei der Synchronisation: {e}")
-            time.sleep(1)
-            
-    def _send_to_cloud(self, data):
-        """Sendet Daten an die Cloud"""
-        if not self.api_url:
-            self._save_offline(data)
-            return
-            
+            self.sync_pending()
+            # Aufwachen bei neuen Daten oder spätestens nach einer Sekunde
+            self._wake.wait(1)
+            self._wake.clear()
+
+    def sync_pending(self):
+        """
+        Führt einen Synchronisationsdurchlauf aus
+        Überträgt Spool-Einträge in Reihenfolge als Batches, bis der Spool
+        leer oder das Byte-Budget des Durchlaufs erschöpft ist. Nach einem
+        vorübergehenden Fehler wird bis zum nächsten Versuch exponentiell
+        länger gewartet. Lehnt der Server einen Batch dauerhaft ab (4xx),
+        werden die Einträge einzeln gesendet und abgelehnte Einträge in
+        den Quarantäne-Ordner des Spools verschoben.
+
+        Returns:
+            Anzahl übertragener Einträge
+        """
+        if not self.api_url or not len(self.spool) or not self.backoff.ready():
+            return 0
+
+        sent = 0
+        budget = self.flush_byte_budget
+        max_items = self.max_batch_items
+        try:
+            while len(self.spool) and budget > 0:
+                batch = self.spool.peek(max_items, min(self.max_batch_bytes, budget))
+                if not batch:
+                    break
+                started = time.perf_counter()
+                status, rejected = self._send_batch([item for _, item, _ in batch])
+                self.metrics.record('sync_batch', time.perf_counter() - started)
+                if status != 200 and _retryable(status):
+                    self.metrics.count('sync_failures')
+                    self.backoff.failure()
+                    break
+                self.backoff.success()
+                if status != 200:
+                    if len(batch) > 1:
+                        # Den abgelehnten Eintrag durch Einzel-Uploads finden
+                        max_items = 1
+                        continue
+                    print(f"Server lehnt Spool-Eintrag {batch[0][0]} ab (HTTP {status}), verschoben nach rejected/")
+                    self.metrics.count('sync_rejected')
+                    self.spool.quarantine([batch[0][0]])
+                    budget -= batch[0][2]
+                    continue
+                # Vom Server einzeln abgelehnte Einträge nicht erneut senden
+                rejected_seqs = [seq for seq, item, _ in batch if item.get('id') in rejected]
+                if rejected_seqs:
+                    print(f"Server lehnt {len(rejected_seqs)} Spool-Einträge ab, verschoben nach rejected/")
+                    self.metrics.count('sync_rejected', len(rejected_seqs))
+                    self.spool.quarantine(rejected_seqs)
+                self.spool.remove(seq for seq, _, _ in batch)
+                sent += len(batch) - len(rejected_seqs)
+                budget -= sum(size for _, _, size in batch)
+        except Exception as e:
+            print(f"Fehler bei der Synchronisation: {e}")
+            self.metrics.count('sync_failures')
+            self.backoff.failure()
+        if sent:
+            self.metrics.count('synced_items', sent)
+        return sent
+
+    def _send_batch(self, items):
+        """
+        Sendet mehrere Workouts gzip-komprimiert in einem Request
+
+        Returns:
+            (HTTP-Statuscode oder None bei Netzwerkfehlern,
+             IDs der vom Server einzeln abgelehnten Einträge)
+        """
+        body = json.dumps({
+            'device_id': self.device_id,
+            'workouts': items
+        }).encode('utf-8')
         try:
-            response = requests.post(
-                f"{self.api_url}/workout/sync",
-                json=data,
-                timeout=5
+            response = self.session.post(
+                f"{self.api_url}/workout/sync/batch",
+                data=gzip.compress(body),
+                headers={
+                    'Content-Type': 'application/json',
+                    'Content-Encoding': 'gzip'
+                },
+                timeout=10
             )
-            if response.status_code != 200:
-                self._save_offline(data)
         except requests.exceptions.RequestException:
-            self._save_offline(data)
-            
-    def _save_offline(self, data):
-        """Speichert Daten lokal für spätere Synchronisation"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = self.offline_dir / f"workout_{timestamp}.json"
-        
-        with open(filename, 'w') as f:
-            json.dump(data, f)
-            
-    def _sync_offline_data(self):
-        """Synchronisiert offline gespeicherte Daten"""
-        if not self.api_url:
-            return
-            
-        for file in self.offline_dir.glob("workout_*.json"):
+            return None, set()
+        rejected = set()
+        if response.status_code == 200:
             try:
-                with open(file, 'r') as f:
-                    data = json.load(f)
-                
-                response = requests.post(
-                    f"{self.api_url}/workout/sync",
-                    json=data,
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    os.remove(file)
-            except Exception as e:
-                print(f"Fehler beim Synchronisieren von {file}: {e}")
-                
+                rejected = {entry.get('id') for entry in response.json().get('rejected', [])}
+            except (ValueError, AttributeError):
+                pass
+        return response.status_code, rejected
+
+    def start_live_session(self, workout_name):
+        """Beginnt eine Live-Session für das Dashboard"""
+        self.live.start(uuid.uuid4().hex, workout_name=workout_name)
+
+    def live_event(self, kind, **fields):
+        """Puffert ein Live-Ereignis (z.B. 'reps', 'set', 'phase')"""
+        self.live.add_event(kind, **fields)
+
+    def live_heart_rate(self, timestamp, value):
+        self.live.add_heart_rate(timestamp, value)
+
+    def flush_live(self):
+        """
+        Sendet die gepufferten Live-Deltas als ein Request
+
+        Schlägt das Senden fehl, wird der Batch verworfen und erst nach dem
+        Backoff erneut gesendet.
+
+        Returns:
+            True, wenn ein Batch übertragen wurde
+        """
+        if not self.api_url or not self.live_backoff.ready():
+            return False
+        batch = self.live.take()
+        if batch is None:
+            return False
+        started = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.api_url}/live/{self.device_id}",
+                json=batch,
+                timeout=2
+            )
+            ok = response.status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        self.metrics.record('live_flush', time.perf_counter() - started)
+        if ok:
+            self.live_backoff.success()
+        else:
+            self.metrics.count('live_failures')
+            self.live_backoff.failure()
+        return ok
+
     def sync_workout_data(self, workout_data):
         """
         Fügt Workout-Daten zur Synchronisations-Queue hinzu
-        
+
         Args:
             workout_data: Dict mit Workout-Informationen
         """
-        self.sync_queue.put({
+        started = time.perf_counter()
+        self.spool.append({
+            # Client-seitige ID, damit die API wiederholte Uploads erkennt
+            'id': (workout_data or {}).get('id') or uuid.uuid4().hex,
             'timestamp': datetime.now().isoformat(),
+            'device_id': self.device_id,
             'data': workout_data
         })
+        self.metrics.record('sync_enqueue', time.perf_counter() - started)
+        self.metrics.peak('spool_depth_max', len(self.spool))
+        self._wake.set()
@@ -1,11 +1,20 @@
 from PIL import Image, ImageDraw, ImageFont
+from collections import OrderedDict
+import numpy as np
 import os
 from datetime import datetime
+from display.layout import ScreenTemplate, TextCache
+from utils.clock import SYSTEM_CLOCK
+
+# Feste Größe der Übungsbilder (siehe data/exercises/README.md)
+EXERCISE_IMAGE_SIZE = (128, 64)
 
 class EpaperDisplay:
-    def __init__(self, width=296, height=128):  # 2.9 inch display
+    def __init__(self, width=296, height=128, driver=None, full_refresh_interval=60,
+                 image_cache_size=16, clock=None):  # 2.9 inch display
         self.width = width
         self.height = height
+        self.clock = clock or SYSTEM_CLOCK  # für die Uhrzeit in der Trainingsansicht
         self.image = Image.new('1', (width, height), 255)  # 255: white
         self.draw = ImageDraw.Draw(self.image)
         
@@ -16,156 +25,233 @@ class EpaperDisplay:
         
         # Pfad zu Übungsbildern
         self.exercise_dir = os.path.join(os.path.dirname(__file__), '../../data/exercises')
+
+        # LRU-Cache der vorbereiteten Übungsbilder; None steht für "kein Bild"
+        self.image_cache_size = image_cache_size
+        self._image_cache = OrderedDict()
+
+        # Hardware-Treiber (display_full(image), display_partial(image, box))
+        # und Zustand für Teilaktualisierungen
+        self.driver = driver
+        self.full_refresh_interval = full_refresh_interval
+        self.stride = (width + 7) // 8  # Bytes pro Zeile im gepackten 1-Bit-Format
+        self._last_frame = None
+        self._diff = np.zeros((height, self.stride), dtype=np.uint8)
+        self._partial_updates = 0
+        self.refresh_stats = {'full': 0, 'partial': 0, 'skipped': 0}
+
+        # Vorlagen mit statischem Hintergrund und Cache für gerenderte Texte
+        self.text_cache = TextCache()
+        self.templates = self._build_templates()
         
     def clear(self):
         """Löscht den Display-Inhalt"""
-        self.image = Image.new('1', (self.width, self.height), 255)
-        self.draw = ImageDraw.Draw(self.image)
+        self.image.paste(255, (0, 0, self.width, self.height))
+
+    def _build_templates(self):
+        """Erstellt die Bildschirmvorlagen; statische Elemente werden hier einmal gezeichnet"""
+        w, h = self.width, self.height
+        font, small = self.font, self.small_font
+
+        def workout_template(info_x):
+            def draw_static(draw):
+                # Rahmen des Fortschrittsbalkens
+                draw.rectangle([(info_x, 70), (info_x + 100, 80)], outline=0)
+            return (ScreenTemplate(w, h, draw_static)
+                    .add_slot('exercise', 10, 5, font)
+                    .add_slot('clock', w - 50, 5, small)
+                    .add_slot('progress', info_x, 30, font)
+                    .add_slot('reps', info_x, 50, font)
+                    .add_slot('heart_rate', info_x, 90, font))
+
+        summary = ScreenTemplate(w, h, lambda d: d.text((10, 5), "Workout Zusammenfassung", font=font, fill=0))
+        history = ScreenTemplate(w, h, lambda d: d.text((10, 5), "Letzte Workouts", font=font, fill=0))
+        for i, name in enumerate(('sets', 'reps', 'time', 'heart_rate')):
+            summary.add_slot(name, 10, 30 + i * 20, font)
+        for i in range(3):
+            history.add_slot(f'line{i}', 10, 30 + i * 20, small)
+
+        return {
+            # Übungsbild links (128 px + Abstand) oder Infos direkt am Rand
+            'workout_image': workout_template(10 + EXERCISE_IMAGE_SIZE[0] + 10),
+            'workout': workout_template(10),
+            'preview': (ScreenTemplate(w, h)
+                        .add_slot('exercise', 10, 5, font)
+                        .add_slot('no_image', 10, h // 2, font)),
+            'rest': (ScreenTemplate(w, h, lambda d: d.text((10, 10), "Pause", font=font, fill=0))
+                     .add_slot('timer', 0, h // 2 - 15, font, width=w, align='center')),
+            'summary': summary,
+            'history': history,
+            'message': (ScreenTemplate(w, h)
+                        .add_slot('message', 0, h // 3, font, width=w, align='center')
+                        .add_slot('subtitle', 0, h // 2, small, width=w, align='center'))
+        }
+
+    def _compose(self, template_name, **values):
+        self.templates[template_name].compose(self.image, self.text_cache, **values)
         
     def _load_exercise_image(self, exercise_name):
-        """Lädt das Bild für eine bestimmte Übung"""
+        """Gibt das Bild für eine Übung aus dem Cache zurück, lädt es bei Bedarf"""
+        if exercise_name in self._image_cache:
+            self._image_cache.move_to_end(exercise_name)
+            return self._image_cache[exercise_name]
+
+        img = self._read_exercise_image(exercise_name)
+        self._image_cache[exercise_name] = img
+        if len(self._image_cache) > self.image_cache_size:
+            self._image_cache.popitem(last=False)
+        return img
+
+    def _read_exercise_image(self, exercise_name):
+        """Lädt das Bild für eine bestimmte Übung von der SD-Karte"""
         # Normalisiere den Dateinamen
         filename = exercise_name.lower().replace(' ', '_') + '.bmp'
         image_path = os.path.join(self.exercise_dir, filename)
         
         try:
             if os.path.exists(image_path):
-                # Lade und konvertiere das Bild
-                img = Image.open(image_path)
-                # Konvertiere zu 1-bit Schwarz/Weiß
-                img = img.convert('1')
-                return img
+                with Image.open(image_path) as img:
+                    # Auf Zielgröße skalieren und zu 1-bit Schwarz/Weiß konvertieren
+                    img = img.convert('L')
+                    if img.size != EXERCISE_IMAGE_SIZE:
+                        img = img.resize(EXERCISE_IMAGE_SIZE)
+                    return img.convert('1')
         except Exception as e:
             print(f"Fehler beim Laden des Übungsbildes: {e}")
         return None
+
+    def preload_workout(self, workout):
+        """Lädt die Bilder aller Übungen eines Workouts vorab in den Cache"""
+        for exercise in workout.get('exercises', [])[:self.image_cache_size]:
+            self._load_exercise_image(exercise['name'])
         
     def show_workout(self, exercise, sets, reps, current_set, heart_rate):
         """Zeigt die aktuelle Übung und Herzfrequenz an"""
-        self.clear()
-        
-        # Übungsname (oben)
-        self.draw.text((10, 5), exercise, font=self.font, fill=0)
-        
-        # Lade und zeige Übungsbild
         exercise_image = self._load_exercise_image(exercise)
+        template = 'workout_image' if exercise_image else 'workout'
+        self._compose(
+            template,
+            exercise=exercise,
+            clock=datetime.fromtimestamp(self.clock.time()).strftime("%H:%M"),
+            progress=f"Set {current_set}/{sets}",
+            reps=f"{reps} Wdh.",
+            heart_rate=f"♥ {heart_rate} BPM" if heart_rate else None
+        )
+
+        # Übungsbild auf der linken Seite
         if exercise_image:
-            # Bild auf der linken Seite
-            image_width = 128  # Fixe Breite für Übungsbilder
-            image_height = 64  # Fixe Höhe für Übungsbilder
-            image_x = 10
-            image_y = 25
-            
-            # Füge das Bild ein
-            self.image.paste(exercise_image, (image_x, image_y))
-            
-            # Verschiebe die restlichen Elemente nach rechts
-            info_x = image_x + image_width + 10
-        else:
-            info_x = 10
-            
-        # Sets und Wiederholungen
-        progress = f"Set {current_set}/{sets}"
-        self.draw.text((info_x, 30), progress, font=self.font, fill=0)
-        
-        # Wiederholungen
-        reps_text = f"{reps} Wdh."
-        self.draw.text((info_x, 50), reps_text, font=self.font, fill=0)
-        
-        # Fortschrittsbalken für Sets
-        bar_width = 100
-        progress_width = int(bar_width * (current_set / sets))
-        self.draw.rectangle([(info_x, 70), (info_x + bar_width, 80)], outline=0)
+            self.image.paste(exercise_image, (10, 25))
+
+        # Füllung des Fortschrittsbalkens für Sets
+        info_x = self.templates[template].slots['progress'].x
+        progress_width = int(100 * (current_set / sets))
         self.draw.rectangle([(info_x, 70), (info_x + progress_width, 80)], fill=0)
         
-        # Herzfrequenz mit Symbol
-        if heart_rate:
-            hr_text = f"♥ {heart_rate} BPM"
-            self.draw.text((info_x, 90), hr_text, font=self.font, fill=0)
-            
-        # Zeit
-        current_time = datetime.now().strftime("%H:%M")
-        self.draw.text((self.width-50, 5), current_time, font=self.small_font, fill=0)
-        
     def show_exercise_preview(self, exercise_name):
         """Zeigt eine Vorschau der Übung mit großem Bild"""
-        self.clear()
-        
-        # Übungsname oben
-        self.draw.text((10, 5), exercise_name, font=self.font, fill=0)
-        
-        # Lade und zeige Übungsbild
         exercise_image = self._load_exercise_image(exercise_name)
+        self._compose(
+            'preview',
+            exercise=exercise_name,
+            no_image=None if exercise_image else "Kein Bild verfügbar"
+        )
         if exercise_image:
             # Zentriere das Bild
             image_x = (self.width - exercise_image.width) // 2
             image_y = (self.height - exercise_image.height) // 2
             self.image.paste(exercise_image, (image_x, image_y))
-        else:
-            self.draw.text((10, self.height//2), "Kein Bild verfügbar", font=self.font, fill=0)
         
     def show_rest_timer(self, seconds_left):
         """Zeigt einen Ruhetimer an"""
-        self.clear()
-        
-        # Großer Timer in der Mitte
-        timer_text = f"{seconds_left}s"
-        text_width = self.draw.textlength(timer_text, font=self.font)
-        x = (self.width - text_width) // 2
-        self.draw.text((x, self.height//2-15), timer_text, font=self.font, fill=0)
-        
-        # Hinweistext
-        self.draw.text((10, 10), "Pause", font=self.font, fill=0)
+        self._compose('rest', timer=f"{seconds_left}s")
         
     def show_workout_summary(self, total_sets, total_reps, duration_mins, avg_heart_rate):
         """Zeigt eine Zusammenfassung des Workouts"""
-        self.clear()
-        
-        self.draw.text((10, 5), "Workout Zusammenfassung", font=self.font, fill=0)
-        
-        # Statistiken
-        stats = [
-            f"Sets: {total_sets}",
-            f"Wdh: {total_reps}",
-            f"Zeit: {duration_mins}min",
-            f"Ø Puls: {avg_heart_rate}bpm"
-        ]
-        
-        for i, stat in enumerate(stats):
-            self.draw.text((10, 30 + i*20), stat, font=self.font, fill=0)
+        self._compose(
+            'summary',
+            sets=f"Sets: {total_sets}",
+            reps=f"Wdh: {total_reps}",
+            time=f"Zeit: {duration_mins}min",
+            heart_rate=f"Ø Puls: {avg_heart_rate}bpm"
+        )
             
     def show_workout_history(self, history_data):
         """Zeigt die letzten Workouts an"""
-        self.clear()
-        
-        self.draw.text((10, 5), "Letzte Workouts", font=self.font, fill=0)
-        
-        y_pos = 30
-        for workout in history_data[:3]:  # Zeige die letzten 3 Workouts
+        lines = {}
+        for i, workout in enumerate(history_data[:3]):  # Zeige die letzten 3 Workouts
             date = datetime.fromisoformat(workout['timestamp']).strftime("%d.%m")
-            text = f"{date}: {workout['workout_name']} ({workout['completed_exercises']} Übungen)"
-            self.draw.text((10, y_pos), text, font=self.small_font, fill=0)
-            y_pos += 20
+            lines[f'line{i}'] = f"{date}: {workout['workout_name']} ({workout['completed_exercises']} Übungen)"
+        self._compose('history', **lines)
             
     def show_message(self, message, subtitle=None):
         """Zeigt eine Nachricht auf dem Display an"""
-        self.clear()
-        
-        # Hauptnachricht
-        text_width = self.draw.textlength(message, font=self.font)
-        x = (self.width - text_width) // 2
-        self.draw.text((x, self.height//3), message, font=self.font, fill=0)
-        
-        # Untertitel (optional)
-        if subtitle:
-            text_width = self.draw.textlength(subtitle, font=self.small_font)
-            x = (self.width - text_width) // 2
-            self.draw.text((x, self.height//2), subtitle, font=self.small_font, fill=0)
-        
-    def update(self):
+        self._compose('message', message=message, subtitle=subtitle)
+
+    def _dirty_regions(self, frame, merge_gap=8):
+        """
+        Ermittelt geänderte Bereiche zwischen letztem und neuem Frame
+
+        Vergleicht die gepackten 1-Bit-Zeilen per XOR, fasst benachbarte
+        geänderte Zeilen zu Bändern zusammen und begrenzt jedes Band auf
+        die geänderten Byte-Spalten.
+
+        Returns:
+            Liste von Boxen (x0, y0, x1, y1), x auf 8 Pixel ausgerichtet
+        """
+        diff = self._diff
+        np.bitwise_xor(frame, self._last_frame, out=diff)
+        changed_rows = np.flatnonzero(diff.any(axis=1))
+        if len(changed_rows) == 0:
+            return []
+
+        # Zeilen zu Bändern gruppieren; kleine Lücken werden mitgenommen,
+        # da jede Teilaktualisierung einen festen Overhead hat
+        breaks = np.flatnonzero(np.diff(changed_rows) > merge_gap)
+        starts = np.concatenate(([changed_rows[0]], changed_rows[breaks + 1]))
+        ends = np.concatenate((changed_rows[breaks], [changed_rows[-1]]))
+
+        boxes = []
+        for y0, y1 in zip(starts, ends):
+            cols = np.flatnonzero(diff[y0:y1 + 1].any(axis=0))
+            x0 = int(cols[0]) * 8
+            x1 = min(int(cols[-1] + 1) * 8, self.width)
+            boxes.append((x0, int(y0), x1, int(y1) + 1))
+        return boxes
+
+    def update(self, full=False):
         """
         Aktualisiert das physische Display
-        In der Praxis würde hier der spezifische Code für das
-        verwendete E-Paper Display implementiert
+
+        Unveränderte Frames werden übersprungen, sonst werden nur die
+        geänderten Bereiche partiell aktualisiert. Nach
+        `full_refresh_interval` Teilaktualisierungen (oder mit full=True)
+        folgt eine Vollaktualisierung gegen Ghosting.
         """
-        # Hier würde der tatsächliche Code zur Aktualisierung des Displays kommen
-        pass
+        frame = np.frombuffer(self.image.tobytes(), dtype=np.uint8).reshape(self.height, self.stride)
+
+        if full or self._last_frame is None or self._partial_updates >= self.full_refresh_interval:
+            self._push_full()
+            self._last_frame = frame
+            self._partial_updates = 0
+            self.refresh_stats['full'] += 1
+            return
+
+        boxes = self._dirty_regions(frame)
+        if not boxes:
+            self.refresh_stats['skipped'] += 1
+            return
+
+        for box in boxes:
+            self._push_partial(box)
+        self._last_frame = frame
+        self._partial_updates += 1
+        self.refresh_stats['partial'] += 1
+
+    def _push_full(self):
+        # Ohne Treiber (z.B. in der Entwicklung) wird nichts ausgegeben
+        if self.driver:
+            self.driver.display_full(self.image)
+
+    def _push_partial(self, box):
+        if self.driver:
+            self.driver.display_partial(self.image, box)
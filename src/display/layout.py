@@ -0,0 +1,79 @@
+from PIL import Image, ImageDraw
+from collections import OrderedDict
+
+class TextCache:
+    """
+    LRU-Cache für gerenderte Texte
+
+    Häufig wiederkehrende Werte (Zahlen, BPM, Uhrzeit) werden einmal als
+    1-Bit-Bitmap gerastert und danach nur noch eingefügt.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Vermessung im 1-Bit-Modus, da sich die Glyphenbreiten dort
+        # von font.getbbox unterscheiden
+        self._measure = ImageDraw.Draw(Image.new('1', (1, 1)))
+
+    def render(self, text, font):
+        """Gibt den Text als 1-Bit-Bild zurück (weißer Hintergrund)"""
+        key = (text, font)
+        bitmap = self._entries.get(key)
+        if bitmap is not None:
+            self._entries.move_to_end(key)
+            return bitmap
+
+        # Gleiche Platzierung wie draw.text((x, y)): Bild ab Ursprung bis
+        # zur rechten unteren Ecke der Bounding-Box
+        _, _, right, bottom = self._measure.textbbox((0, 0), text, font=font)
+        bitmap = Image.new('1', (max(1, right), max(1, bottom)), 255)
+        ImageDraw.Draw(bitmap).text((0, 0), text, font=font, fill=0)
+
+        self._entries[key] = bitmap
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return bitmap
+
+class Slot:
+    """Benannter, dynamischer Textbereich einer Bildschirmvorlage"""
+    def __init__(self, x, y, font, width=None, align='left'):
+        self.x = x
+        self.y = y
+        self.font = font
+        self.width = width
+        self.align = align
+
+    def position(self, bitmap):
+        if self.align == 'center' and self.width:
+            return (self.x + (self.width - bitmap.width) // 2, self.y)
+        if self.align == 'right' and self.width:
+            return (self.x + self.width - bitmap.width, self.y)
+        return (self.x, self.y)
+
+class ScreenTemplate:
+    """
+    Bildschirmvorlage mit vorgerendertem statischem Hintergrund
+
+    Statische Elemente (Überschriften, Rahmen) werden einmal gezeichnet.
+    Pro Frame wird nur der Hintergrund kopiert und die Slots mit
+    Bitmaps aus dem TextCache befüllt.
+    """
+    def __init__(self, width, height, draw_static=None):
+        self.background = Image.new('1', (width, height), 255)
+        if draw_static:
+            draw_static(ImageDraw.Draw(self.background))
+        self.slots = {}
+
+    def add_slot(self, name, x, y, font, width=None, align='left'):
+        self.slots[name] = Slot(x, y, font, width, align)
+        return self
+
+    def compose(self, target, text_cache, **values):
+        """Kopiert den Hintergrund nach `target` und füllt die übergebenen Slots"""
+        target.paste(self.background)
+        for name, text in values.items():
+            if text is None:
+                continue
+            slot = self.slots[name]
+            bitmap = text_cache.render(text, slot.font)
+            target.paste(bitmap, slot.position(bitmap))
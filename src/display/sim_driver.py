@@ -0,0 +1,38 @@
+from utils.clock import SYSTEM_CLOCK
+
+class RecordingDriver:
+    """
+    Ersatz für den E-Paper-Treiber ohne Hardware
+
+    Zählt Voll- und Teilaktualisierungen samt Fläche und hält den letzten
+    Frame fest. Optional wird die Aktualisierungsdauer des Panels über die
+    Uhr nachgebildet, damit Wiedergaben das Blockieren realistisch zeigen.
+    """
+    def __init__(self, full_refresh_seconds=0.0, partial_refresh_seconds=0.0, clock=None):
+        self.full_refresh_seconds = full_refresh_seconds
+        self.partial_refresh_seconds = partial_refresh_seconds
+        self.clock = clock or SYSTEM_CLOCK
+        self.full_refreshes = 0
+        self.partial_refreshes = 0
+        self.pixels = 0
+        self.last_frame = None
+
+    def display_full(self, image):
+        self.full_refreshes += 1
+        self.pixels += image.width * image.height
+        self.last_frame = image.copy()
+        self.clock.sleep(self.full_refresh_seconds)
+
+    def display_partial(self, image, box):
+        x0, y0, x1, y1 = box
+        self.partial_refreshes += 1
+        self.pixels += (x1 - x0) * (y1 - y0)
+        self.last_frame = image.copy()
+        self.clock.sleep(self.partial_refresh_seconds)
+
+    def stats(self):
+        return {
+            'full': self.full_refreshes,
+            'partial': self.partial_refreshes,
+            'pixels': self.pixels
+        }
@@ -1,133 +1,138 @@
 import time
-from datetime import datetime
-from display.epaper import EpaperDisplay
-from sensors.heart_rate import HeartRateSensor
-from sensors.motion import MotionSensor
-from workout.workout_manager import WorkoutManager
-from cloud.sync_manager import CloudSync
-
-def main():
+
+# Referenzpunkt für die Startzeit; vor allen anderen Importen
+BOOT_STARTED = time.perf_counter()
+
+import argparse
+import asyncio
+import os
+from utils.clock import SYSTEM_CLOCK, ScaledClock
+
+# Zielwert vom Prozessstart bis zum ersten Bild auf dem Display
+TIME_TO_FIRST_FRAME_TARGET = 2.0  # s
+
+# Schwere Module (numpy, PIL, requests, Sensortreiber) werden erst in den
+# build_*-Funktionen importiert, damit der Startbildschirm nicht auf sie wartet
+
+def build_display(clock=None, display_driver=None):
+    """Erzeugt das Display; Voraussetzung für den Startbildschirm"""
+    from display.epaper import EpaperDisplay
+    return EpaperDisplay(driver=display_driver, clock=clock or SYSTEM_CLOCK)
+
+def _build_sensors(backend, trace, clock):
+    from sensors.backends import create_backends
+    from sensors.heart_rate import HeartRateSensor
+    from sensors.motion import MotionSensor
+    motion_backend, ppg_backend = create_backends(backend, trace)
+    return HeartRateSensor(backend=ppg_backend, clock=clock), MotionSensor(backend=motion_backend, clock=clock)
+
+def _build_workout_manager(state_dir, clock):
+    from workout.workout_manager import WorkoutManager
+    return WorkoutManager(state_dir=state_dir, clock=clock)
+
+def _build_cloud_sync(api_url, spool_dir, clock):
+    from cloud.sync_manager import CloudSync
+    return CloudSync(api_url=api_url, spool_dir=spool_dir, clock=clock)
+
+def build_devices(backend='hardware', trace=None, clock=None, state_dir=None, api_url=None, spool_dir=None):
+    """Erzeugt Sensoren, WorkoutManager und CloudSync"""
+    clock = clock or SYSTEM_CLOCK
+    heart_sensor, motion_sensor = _build_sensors(backend, trace, clock)
+    workout_manager = _build_workout_manager(state_dir, clock)
+    cloud_sync = _build_cloud_sync(api_url, spool_dir, clock)
+    return heart_sensor, motion_sensor, workout_manager, cloud_sync
+
+def build_components(backend='hardware', trace=None, clock=None, display_driver=None,
+                     state_dir=None, api_url=None, spool_dir=None):
+    """
+    Erzeugt Display, Sensoren, WorkoutManager und CloudSync
+
+    Args:
+        backend: Sensor-Backend ('hardware', 'synthetic' oder 'trace')
+        trace: Trace-Datei für das Trace-Backend
+        clock: gemeinsame Uhr aller Komponenten (Standard: Echtzeit)
+        state_dir: Ablage für Journal/Index, Standard data/workouts
+    """
+    clock = clock or SYSTEM_CLOCK
+    display = build_display(clock, display_driver)
+    devices = build_devices(backend, trace, clock, state_dir, api_url, spool_dir)
+
+    # Übungsbilder vorladen, sobald ein Workout geladen ist
+    devices[2].add_load_listener(display.preload_workout)
+    return (display, *devices)
+
+def boot(backend='hardware', trace=None, clock=None, display_driver=None,
+         state_dir=None, api_url=None, spool_dir=None, started=None):
+    """
+    Wie build_components, zeigt aber zuerst den Startbildschirm
+
+    Nur das Display und seine Abhängigkeiten werden vor dem ersten Bild
+    geladen, Sensoren, Historie und Cloud-Sync erst danach. Gibt die
+    Komponenten und die Startzeiten in ms ab `started` (Standard:
+    Prozessstart) zurück.
+    """
+    clock = clock or SYSTEM_CLOCK
+    started = BOOT_STARTED if started is None else started
+    display = build_display(clock, display_driver)
+    display.show_message("GymPi", "Bereit zum Training")
+    display.update()
+    first_frame = time.perf_counter() - started
+
+    heart_sensor, motion_sensor, workout_manager, cloud_sync = build_devices(
+        backend, trace, clock, state_dir, api_url, spool_dir)
+    workout_manager.add_load_listener(display.preload_workout)
+    ready = time.perf_counter() - started
+
+    boot_stats = {
+        'time_to_first_frame_ms': round(first_frame * 1000, 1),
+        'ready_ms': round(ready * 1000, 1)
+    }
+    return (display, heart_sensor, motion_sensor, workout_manager, cloud_sync), boot_stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GymPi")
+    parser.add_argument('--backend', choices=['hardware', 'synthetic', 'trace'], default='hardware',
+                        help="Datenquelle der Sensoren")
+    parser.add_argument('--trace', help="Trace-Datei (.npz) für --backend trace")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Zeitraffer-Faktor für synthetische Daten und Traces")
+    parser.add_argument('--workout', default="default_workout")
+    parser.add_argument('--stats-file', default=os.path.join(os.path.dirname(__file__), '../data/stats.json'),
+                        help="Leistungsstatistik (Latenzen pro Stufe, Zähler) regelmäßig hierhin schreiben")
+    parser.add_argument('--no-perf-upload', action='store_true',
+                        help="Leistungsstatistik nicht an synchronisierte Workouts anhängen")
+    args = parser.parse_args(argv)
+
+    clock = ScaledClock(args.speed) if args.speed != 1.0 else SYSTEM_CLOCK
+    components = None
     try:
-        # Initialisiere Komponenten
-        display = EpaperDisplay()
-        heart_sensor = HeartRateSensor()
-        motion_sensor = MotionSensor()
-        workout_manager = WorkoutManager()
-        cloud_sync = CloudSync()
-        
-        # Starte Cloud-Sync Thread
-        cloud_sync.start_sync_thread()
-        
-        # Zeige Startbildschirm
-        display.show_message("GymPi", "Bereit zum Training")
-        display.update()
-        time.sleep(2)
-        
-        # Zeige letzte Workouts
-        history = workout_manager.get_workout_history()
-        if history:
-            display.show_workout_history(history)
-            display.update()
-            time.sleep(3)
-        
-        # Lade Standard-Workout
-        if not workout_manager.load_workout("default_workout"):
-            display.show_message("Kein Workout gefunden!")
-            return
-            
-        workout_start_time = time.time()
-        heart_rate_data = []
-        rep_count = 0
-        last_rep_time = time.time()
-        total_reps = 0
-        total_sets = 0
-        
-        while True:
-            # Aktuelle Übung holen
-            exercise = workout_manager.get_current_exercise()
-            if not exercise:
-                break
-                
-            # Zeige Übungsvorschau für 3 Sekunden
-            if rep_count == 0 and workout_manager.current_set == 1:
-                display.show_exercise_preview(exercise['name'])
-                display.update()
-                time.sleep(3)
-            
-            # Herzfrequenz messen
-            heart_rate = heart_sensor.read_heart_rate()
-            if heart_rate:
-                heart_rate_data.append({
-                    'timestamp': time.time(),
-                    'value': heart_rate
-                })
-                
-            # Bewegungserkennung
-            if motion_sensor.detect_rep():
-                current_time = time.time()
-                # Prüfe auf Mindestzeit zwischen Wiederholungen
-                if current_time - last_rep_time > 0.5:
-                    rep_count += 1
-                    total_reps += 1
-                    last_rep_time = current_time
-                    
-                    # Wenn alle Wiederholungen eines Satzes gemacht wurden
-                    if rep_count >= exercise['reps']:
-                        rep_count = 0
-                        total_sets += 1
-                        
-                        # Zeige Pause-Timer
-                        rest_time = exercise.get('rest_time', 60)
-                        for remaining in range(rest_time, 0, -1):
-                            display.show_rest_timer(remaining)
-                            display.update()
-                            time.sleep(1)
-                        
-                        workout_manager.next_set()
-                
-            # Display aktualisieren
-            display.show_workout(
-                exercise['name'],
-                exercise['sets'],
-                exercise['reps'],
-                workout_manager.current_set,
-                heart_rate
-            )
-            display.update()
-            
-            # Kurze Pause
-            time.sleep(0.1)
-            
-        # Workout beendet
-        workout_duration = int((time.time() - workout_start_time) / 60)  # in Minuten
-        
-        # Berechne durchschnittliche Herzfrequenz
-        avg_heart_rate = 0
-        if heart_rate_data:
-            avg_heart_rate = sum(d['value'] for d in heart_rate_data) / len(heart_rate_data)
-        
-        # Zeige Zusammenfassung
-        display.show_workout_summary(
-            total_sets,
-            total_reps,
-            workout_duration,
-            int(avg_heart_rate)
-        )
-        display.update()
-        time.sleep(5)
-        
-        # Speichere und synchronisiere Fortschritt
-        workout_data = workout_manager.save_progress(heart_rate_data)
-        cloud_sync.sync_workout_data(workout_data)
-        
-        display.show_message("Workout beendet!", "Daten synchronisiert")
-        display.update()
-        
+        # Startbildschirm zuerst, danach die übrigen Komponenten
+        components, boot_stats = boot(args.backend, args.trace, clock)
+        display, heart_sensor, motion_sensor, workout_manager, cloud_sync = components
+        first_frame = boot_stats['time_to_first_frame_ms'] / 1000
+        print(f"Startbildschirm nach {first_frame:.2f} s (Ziel {TIME_TO_FIRST_FRAME_TARGET:.1f} s), "
+              f"bereit nach {boot_stats['ready_ms'] / 1000:.2f} s")
+        if first_frame > TIME_TO_FIRST_FRAME_TARGET:
+            print("Warnung: Startbildschirm langsamer als Zielwert")
+
+        # Starte Bewegungsabtastung; Cloud-Sync läuft als Task der Laufzeit
+        motion_sensor.start_sampling()
+
+        from runtime.device_runtime import DeviceRuntime
+        runtime = DeviceRuntime(display, heart_sensor, motion_sensor, workout_manager, cloud_sync,
+                                clock=clock, stats_path=args.stats_file,
+                                attach_perf=not args.no_perf_upload, boot_stats=boot_stats)
+        asyncio.run(runtime.run(args.workout))
+        print(f"Laufzeitstatistik: {runtime.stats()}")
+
     except KeyboardInterrupt:
         print("\nProgramm beendet")
     finally:
-        heart_sensor.close()
-        cloud_sync.stop_sync_thread()
+        if components:
+            _, heart_sensor, motion_sensor, _, cloud_sync = components
+            heart_sensor.close()
+            motion_sensor.stop_sampling()
+            cloud_sync.stop_sync_thread()
 
 if __name__ == "__main__":
     main()
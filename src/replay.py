@@ -0,0 +1,212 @@
+"""
+Wiedergabe einer Trainingseinheit im Zeitraffer ohne Hardware
+
+Läuft durch dieselben Komponenten wie main.py (Sensoren, WorkoutManager,
+EpaperDisplay, DeviceRuntime), aber mit synthetischen Signalen oder einem
+aufgezeichneten Trace und einer ScaledClock. Am Ende werden Genauigkeit
+und Latenz der Wiederholungserkennung, der Fehler der Pulsmessung sowie
+die Laufzeitstatistik ausgegeben.
+
+Beispiele:
+    python src/replay.py --speed 50
+    python src/replay.py --record-trace /tmp/session.npz --seconds 900
+    python src/replay.py --trace /tmp/session.npz --speed 100 --json report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from main import build_components
+from display.sim_driver import RecordingDriver
+from runtime.device_runtime import DeviceRuntime
+from sensors.backends import Trace
+from utils.clock import ScaledClock
+from workout.session_recorder import HEART_RATE, IMU, SessionReader
+
+# Eine erkannte Wiederholung gilt als Treffer, wenn sie höchstens so viele
+# Sekunden nach der tatsächlichen Wiederholung gemeldet wird
+MAX_REP_LATENCY = 1.0
+
+def _trace_rep_steps(runtime):
+    """
+    Protokolliert jeden Schritt der Wiederholungserkennung
+
+    Returns:
+        Liste von (Zeit, Phase vorher, Phase nachher, neu gezählte Wdh.)
+    """
+    log = []
+    step = runtime._rep_step
+
+    async def traced(now):
+        phase, total = runtime.phase, runtime.total_reps
+        await step(now)
+        log.append((now, phase, runtime.phase, runtime.total_reps - total))
+
+    runtime._rep_step = traced
+    return log
+
+def exercise_windows(log):
+    """Zeiträume, in denen Wiederholungen gezählt wurden: (Beginn, Ende)"""
+    windows = []
+    start = None
+    for now, before, after, _ in log:
+        if after == 'exercise' and before != 'exercise':
+            start = now
+        elif before == 'exercise' and after != 'exercise' and start is not None:
+            windows.append((start, now))
+            start = None
+    if start is not None and log:
+        windows.append((start, log[-1][0]))
+    return windows
+
+def evaluate_reps(log, truth, max_latency=MAX_REP_LATENCY):
+    """
+    Ordnet gemeldete Wiederholungen den tatsächlichen zu
+
+    Jede Meldung wird der frühesten noch freien tatsächlichen Wiederholung
+    innerhalb von `max_latency` davor zugeordnet; übrig gebliebene
+    Meldungen sind Fehlzählungen, nicht zugeordnete Wiederholungen in den
+    Zählzeiträumen sind verpasste.
+    """
+    truth = np.sort(np.asarray(truth, dtype=np.float64))
+    used = np.zeros(len(truth), dtype=bool)
+    latencies = []
+    false_positives = 0
+    for now, before, _, new_reps in log:
+        if before != 'exercise':
+            continue
+        for _ in range(new_reps):
+            lo = int(np.searchsorted(truth, now - max_latency, side='left'))
+            hi = int(np.searchsorted(truth, now, side='right'))
+            free = np.flatnonzero(~used[lo:hi])
+            if len(free):
+                index = lo + int(free[0])
+                used[index] = True
+                latencies.append(now - truth[index])
+            else:
+                false_positives += 1
+
+    missed = 0
+    for start, end in exercise_windows(log):
+        inside = (truth > start) & (truth <= end)
+        missed += int(np.count_nonzero(inside & ~used))
+
+    matched = len(latencies)
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        'matched': matched,
+        'false_positives': false_positives,
+        'missed': missed,
+        'precision': round(matched / max(matched + false_positives, 1), 3),
+        'recall': round(matched / max(matched + missed, 1), 3),
+        'latency_mean_ms': round(float(latencies.mean()) * 1000, 1),
+        'latency_p95_ms': round(float(np.percentile(latencies, 95)) * 1000, 1),
+        'latency_max_ms': round(float(latencies.max()) * 1000, 1)
+    }
+
+def evaluate_heart_rate(recording, ppg_backend, wall_offset):
+    """Mittlerer absoluter Fehler der gemessenen gegenüber der tatsächlichen Herzfrequenz"""
+    with SessionReader(recording) as reader:
+        timestamps, measured = reader.heart_rate()
+    if not len(timestamps):
+        return {'samples': 0}
+    measured = measured.astype(np.float64)
+    truth = ppg_backend.true_bpm(timestamps - wall_offset)
+    if truth is None:
+        return {'samples': len(timestamps)}
+    error = np.abs(measured - truth)
+    return {
+        'samples': len(timestamps),
+        'mae_bpm': round(float(error.mean()), 2),
+        'max_error_bpm': round(float(error.max()), 2)
+    }
+
+def _recording_stats(path):
+    """Größe der Sensor-Aufzeichnung und Bytes pro Messwert"""
+    with SessionReader(path) as reader:
+        samples = reader.count(HEART_RATE) + reader.count(IMU)
+    size = os.path.getsize(path)
+    return {'bytes': size, 'samples': samples, 'bytes_per_sample': round(size / max(samples, 1), 2)}
+
+def replay(backend='synthetic', trace=None, speed=50.0, workout="default_workout",
+           timeout=3 * 3600, api_url=None):
+    """
+    Führt ein Workout im Zeitraffer aus und wertet es aus
+
+    Args:
+        timeout: Abbruch nach so vielen virtuellen Sekunden (z.B. wenn ein
+            Trace ohne Schleife vor dem Workout-Ende ausläuft)
+    """
+    clock = ScaledClock(speed)
+    with tempfile.TemporaryDirectory() as state_dir:
+        driver = RecordingDriver(full_refresh_seconds=2.0, partial_refresh_seconds=0.3, clock=clock)
+        display, heart_sensor, motion_sensor, workout_manager, cloud_sync = build_components(
+            backend, trace, clock, display_driver=driver, state_dir=state_dir,
+            api_url=api_url, spool_dir=f"{state_dir}/spool")
+        runtime = DeviceRuntime(display, heart_sensor, motion_sensor, workout_manager, cloud_sync,
+                                clock=clock)
+        rep_log = _trace_rep_steps(runtime)
+
+        started = time.perf_counter()
+        virtual_start = clock.monotonic()
+        motion_sensor.start_sampling()
+        completed = True
+        try:
+            asyncio.run(asyncio.wait_for(runtime.run(workout), clock.to_real(timeout)))
+        except asyncio.TimeoutError:
+            completed = False
+        finally:
+            motion_sensor.stop_sampling()
+            heart_sensor.close()
+            cloud_sync.stop_sync_thread()
+        real_seconds = time.perf_counter() - started
+        virtual_seconds = clock.monotonic() - virtual_start
+
+        truth = motion_sensor.backend.rep_times(virtual_start - 60, clock.monotonic())
+        return {
+            'backend': backend,
+            'speed': speed,
+            'completed': completed,
+            'virtual_seconds': round(virtual_seconds, 1),
+            'real_seconds': round(real_seconds, 2),
+            'effective_speed': round(virtual_seconds / max(real_seconds, 1e-9), 1),
+            'total_sets': runtime.total_sets,
+            'total_reps': runtime.total_reps,
+            'reps': evaluate_reps(rep_log, truth),
+            'heart_rate': evaluate_heart_rate(runtime.recorder.path, heart_sensor.backend,
+                                              clock.time() - clock.monotonic()),
+            'recording': _recording_stats(runtime.recorder.path),
+            'motion_dropped_samples': motion_sensor.dropped_samples,
+            'display': {**display.refresh_stats, 'driver': driver.stats()},
+            'runtime': runtime.stats(),
+            'metrics': runtime.metrics.snapshot()
+        }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GymPi-Workout im Zeitraffer wiedergeben")
+    parser.add_argument('--trace', help="Trace-Datei (.npz); ohne Angabe synthetische Signale")
+    parser.add_argument('--speed', type=float, default=50.0)
+    parser.add_argument('--workout', default="default_workout")
+    parser.add_argument('--api-url', help="Cloud-API oder Stub-Server für Sync und Live-Daten")
+    parser.add_argument('--json', help="Bericht zusätzlich als JSON-Datei schreiben")
+    parser.add_argument('--record-trace', help="Synthetischen Trace erzeugen und speichern")
+    parser.add_argument('--seconds', type=float, default=900.0, help="Länge für --record-trace")
+    args = parser.parse_args(argv)
+
+    if args.record_trace:
+        Trace.record_synthetic(args.seconds).save(args.record_trace)
+        print(f"Trace gespeichert: {args.record_trace}")
+        return
+
+    report = replay('trace' if args.trace else 'synthetic', args.trace, args.speed,
+                    args.workout, api_url=args.api_url)
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+import asyncio
+import time
+from utils.clock import SYSTEM_CLOCK
+from utils.instrumentation import METRICS
+from workout.session_recorder import SessionReader
+
+class TaskStats:
+    """Latenz- und Laufzeitstatistik einer periodischen Aufgabe"""
+    def __init__(self, interval):
+        self.interval = interval
+        self.ticks = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+
+    def record(self, lag, duration):
+        self.ticks += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+
+    def as_dict(self):
+        ticks = max(self.ticks, 1)
+        return {
+            'interval_ms': round(self.interval * 1000, 1),
+            'ticks': self.ticks,
+            'avg_lag_ms': round(self.total_lag / ticks * 1000, 2),
+            'max_lag_ms': round(self.max_lag * 1000, 2),
+            'avg_duration_ms': round(self.total_duration / ticks * 1000, 2),
+            'max_duration_ms': round(self.max_duration * 1000, 2)
+        }
+
+class DeviceRuntime:
+    """
+    Ereignisgesteuerte Laufzeit des Geräts
+
+    Herzfrequenzmessung, Wiederholungserkennung, Display und Cloud-Sync
+    laufen als unabhängige asyncio-Tasks mit eigenem Takt. Der
+    WorkoutManager bleibt die Zustandsmaschine für Übungen und Sätze;
+    Vorschau und Pausen sind Phasen mit Endzeitpunkt statt blockierender
+    sleep-Aufrufe.
+
+    Alle Zeitpunkte und Wartezeiten laufen über `clock`; mit einer
+    ScaledClock läuft das Workout im Zeitraffer (siehe replay.py). Die
+    Verspätungen in stats() sind in Echtzeit angegeben.
+
+    Die Dauer jeder Stufe (Sensoren lesen, Wiederholungserkennung,
+    Pulsberechnung, Rendern, Display-Update, Einreihen in den Sync) landet
+    in `metrics`. Mit `stats_path` wird die Übersicht regelmäßig als JSON
+    abgelegt; mit `attach_perf` wird sie kompakt an das synchronisierte
+    Workout angehängt.
+
+    Puls und IMU-Rohdaten landen während der Einheit im SessionRecorder
+    des WorkoutManagers statt in Python-Listen; gespeichert und
+    synchronisiert wird der Puls gepackt im hr_codec-Format.
+
+    Den Startbildschirm zeigt main.boot(); `boot_stats` (Zeit bis zum
+    ersten Bild und bis alle Komponenten bereit sind) wird in stats() und
+    den Leistungsdaten mitgeführt.
+    """
+    PREVIEW_SECONDS = 3
+    SUMMARY_SECONDS = 5
+
+    def __init__(self, display, heart_sensor, motion_sensor, workout_manager, cloud_sync,
+                 hr_interval=0.25, rep_interval=0.05, display_interval=1.0, sync_interval=5.0,
+                 live_interval=1.0, clock=None, metrics=None, stats_path=None, stats_interval=30.0,
+                 attach_perf=True, boot_stats=None):
+        self.display = display
+        self.heart_sensor = heart_sensor
+        self.motion_sensor = motion_sensor
+        self.workout_manager = workout_manager
+        self.cloud_sync = cloud_sync
+        self.clock = clock or SYSTEM_CLOCK
+        self.metrics = metrics or METRICS
+        self.stats_path = stats_path
+        self.attach_perf = attach_perf
+        self.boot_stats = boot_stats
+
+        self.intervals = {
+            'heart_rate': hr_interval,
+            'reps': rep_interval,
+            'display': display_interval,
+            'sync': sync_interval,
+            'live': live_interval
+        }
+        if stats_path:
+            self.intervals['stats'] = stats_interval
+        self.task_stats = {name: TaskStats(interval) for name, interval in self.intervals.items()}
+
+        # Workout-Zustand
+        self.phase = None  # 'preview', 'exercise', 'rest' oder 'finished'
+        self.phase_until = 0.0
+        self.heart_rate = None
+        self._hr_updates = 0
+        self.recorder = None
+        self.rep_count = 0
+        self.total_reps = 0
+        self.total_sets = 0
+        self.active_exercise = None
+
+        self.finished = None
+        self.render_requested = None
+        self._cpu_start = 0.0
+        self._wall_start = 0.0
+
+    async def run(self, workout_name="default_workout"):
+        """Führt ein komplettes Workout aus und gibt die gespeicherten Daten zurück"""
+        loop = asyncio.get_running_loop()
+        self.finished = asyncio.Event()
+        self.render_requested = asyncio.Event()
+        self.metrics.reset()
+
+        # Letzte Workouts stehen auf dem Display, während das Workout lädt
+        # und die Übungsbilder vorgeladen werden; keine feste Wartezeit
+        pending = [loop.run_in_executor(None, self.workout_manager.load_workout, workout_name)]
+        history = self.workout_manager.get_workout_history()
+        if history:
+            self.display.show_workout_history(history)
+            pending.append(self._push_display())
+        loaded, *_ = await asyncio.gather(*pending)
+        if not loaded:
+            self.display.show_message("Kein Workout gefunden!")
+            await self._push_display()
+            return None
+
+        workout_start_time = self.clock.time()
+        self.recorder = self.workout_manager.start_recording()
+        self.motion_sensor.start_recording(self.recorder)
+        # Aufzeichnung auch bei Fehler, Abbruch oder Strg+C schließen, damit der
+        # Abtast-Thread nicht weiter schreibt und die Datei gekürzt wird
+        try:
+            self.cloud_sync.start_live_session(workout_name)
+            self._cpu_start = time.process_time()
+            self._wall_start = time.monotonic()
+            self._enter_exercise(self.clock.monotonic())
+
+            tasks = [
+                asyncio.create_task(self._periodic('heart_rate', self._heart_rate_step)),
+                asyncio.create_task(self._periodic('reps', self._rep_step)),
+                asyncio.create_task(self._periodic('sync', self._sync_step)),
+                asyncio.create_task(self._periodic('live', self._live_step)),
+                asyncio.create_task(self._display_task())
+            ]
+            if self.stats_path:
+                tasks.append(asyncio.create_task(self._periodic('stats', self._stats_step)))
+            try:
+                await self.finished.wait()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            # Letzte Live-Deltas inklusive Workout-Ende senden
+            self.cloud_sync.live_event('phase', phase='finished',
+                                       total_sets=self.total_sets, total_reps=self.total_reps)
+            await loop.run_in_executor(None, self.cloud_sync.flush_live)
+
+            # Workout beendet
+            workout_duration = int((self.clock.time() - workout_start_time) / 60)  # in Minuten
+        finally:
+            self.motion_sensor.stop_recording()
+            await loop.run_in_executor(None, self.recorder.close)
+
+        # Berechne durchschnittliche Herzfrequenz
+        avg_heart_rate = 0
+        if self.recorder.hr_count:
+            avg_heart_rate = self.recorder.hr_sum / self.recorder.hr_count
+
+        # Zeige Zusammenfassung
+        self.display.show_workout_summary(
+            self.total_sets,
+            self.total_reps,
+            workout_duration,
+            int(avg_heart_rate)
+        )
+        await self._push_display()
+        await self.clock.sleep_async(self.SUMMARY_SECONDS)
+
+        # Speichere und synchronisiere Fortschritt
+        started = time.perf_counter()
+        with SessionReader(self.recorder.path) as reader:
+            heart_rate_blob = reader.heart_rate_blob()
+        workout_data = self.workout_manager.save_progress(heart_rate_blob, {
+            'total_sets': self.total_sets,
+            'total_reps': self.total_reps,
+            'duration_mins': workout_duration,
+            'avg_heart_rate': int(avg_heart_rate)
+        }, recording=self.recorder.path)
+        self.metrics.record('save_progress', time.perf_counter() - started)
+        if workout_data and self.attach_perf:
+            # Nur der Upload erhält die Leistungsdaten, nicht das lokale Journal
+            self.cloud_sync.sync_workout_data({**workout_data, 'perf': self.perf_report()})
+        else:
+            self.cloud_sync.sync_workout_data(workout_data)
+        await loop.run_in_executor(None, self.cloud_sync.sync_pending)
+        if self.stats_path:
+            await loop.run_in_executor(None, self.dump_stats)
+
+        self.display.show_message("Workout beendet!", "Daten synchronisiert")
+        await self._push_display()
+        return workout_data
+
+    def stats(self):
+        """Latenz und CPU-Auslastung der Laufzeit seit Workout-Beginn"""
+        wall = max(time.monotonic() - self._wall_start, 1e-9)
+        cpu = time.process_time() - self._cpu_start
+        return {
+            'cpu_percent': round(cpu / wall * 100, 1),
+            'boot': self.boot_stats,
+            'tasks': {name: stats.as_dict() for name, stats in self.task_stats.items()}
+        }
+
+    def perf_report(self):
+        """Kompakte Leistungsdaten des Workouts für den Upload"""
+        stats = self.stats()
+        return {**self.metrics.export(), 'cpu_percent': stats['cpu_percent'], 'boot': stats['boot']}
+
+    def dump_stats(self):
+        """Schreibt Stufen, Zähler und Task-Statistik nach `stats_path`"""
+        self.metrics.dump(self.stats_path, {'runtime': self.stats()})
+
+    async def _periodic(self, name, step):
+        """Ruft `step` im festen Takt auf und misst Verspätung und Laufzeit"""
+        clock = self.clock
+        interval = self.intervals[name]
+        stats = self.task_stats[name]
+        next_tick = clock.monotonic()
+        while not self.finished.is_set():
+            start = clock.monotonic()
+            started = time.perf_counter()
+            try:
+                await step(start)
+            except Exception as e:
+                print(f"Fehler in Task {name}: {e}")
+            stats.record(clock.to_real(max(0.0, start - next_tick)), time.perf_counter() - started)
+
+            end = clock.monotonic()
+            next_tick += interval
+            if next_tick < end:
+                # Takt verpasst: nicht nachholen, sondern neu ausrichten
+                next_tick = end
+            await clock.sleep_async(next_tick - end)
+
+    def _request_render(self):
+        if self.render_requested:
+            self.render_requested.set()
+
+    def _enter_exercise(self, now):
+        """Startet Übung/Satz aus dem WorkoutManager, ggf. mit Vorschau"""
+        exercise = self.workout_manager.get_current_exercise()
+        if exercise is not self.active_exercise:
+            self.active_exercise = exercise
+            # Wiederholungserkennung auf die Übung einstellen
+            self.motion_sensor.configure_exercise(exercise.get('motion'))
+            self.phase = 'preview'
+            self.phase_until = now + self.PREVIEW_SECONDS
+        else:
+            self.phase = 'exercise'
+        self.cloud_sync.live_event('set', exercise=exercise['name'],
+                                   set=self.workout_manager.current_set,
+                                   sets=exercise['sets'], reps=exercise['reps'])
+        # Während Vorschau und Pause gezählte Bewegungen verwerfen
+        self.motion_sensor.detect_rep()
+        self._request_render()
+
+    async def _heart_rate_step(self, now):
+        # Läuft auch in Pausen weiter, damit keine Messwerte verloren gehen
+        heart_rate = self.heart_sensor.read_heart_rate()
+        updates = self.heart_sensor.updates
+        if heart_rate:
+            # Nur neue Schätzwerte aufzeichnen, nicht jede Abfrage desselben Werts
+            if updates != self._hr_updates:
+                timestamp = self.clock.time()
+                self.recorder.add_heart_rate(timestamp, heart_rate)
+                self.cloud_sync.live_heart_rate(timestamp, heart_rate)
+            if heart_rate != self.heart_rate:
+                self._request_render()
+        self._hr_updates = updates
+        self.heart_rate = heart_rate
+
+    async def _rep_step(self, now):
+        if self.phase == 'preview':
+            if now >= self.phase_until:
+                self.phase = 'exercise'
+                self.motion_sensor.detect_rep()
+                self._request_render()
+            return
+
+        if self.phase == 'rest':
+            self.motion_sensor.detect_rep()
+            if now >= self.phase_until:
+                if self.workout_manager.next_set():
+                    self._enter_exercise(now)
+                else:
+                    self.phase = 'finished'
+                    self.finished.set()
+            return
+
+        new_reps = self.motion_sensor.detect_rep()
+        if not new_reps:
+            return
+        self.rep_count += new_reps
+        self.total_reps += new_reps
+        self._request_render()
+        self.cloud_sync.live_event('reps', reps=self.rep_count, total_reps=self.total_reps)
+
+        # Wenn alle Wiederholungen eines Satzes gemacht wurden
+        exercise = self.active_exercise
+        if self.rep_count >= exercise['reps']:
+            self.rep_count = 0
+            self.total_sets += 1
+            self.phase = 'rest'
+            self.phase_until = now + exercise.get('rest_time', 60)
+            self.cloud_sync.live_event('phase', phase='rest', seconds=exercise.get('rest_time', 60),
+                                       total_sets=self.total_sets)
+
+    async def _sync_step(self, now):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.cloud_sync.sync_pending)
+
+    async def _live_step(self, now):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.cloud_sync.flush_live)
+
+    async def _stats_step(self, now):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.dump_stats)
+
+    async def _display_task(self):
+        """
+        Zeichnet bei Zustandsänderungen sofort neu, sonst im Display-Takt
+        (für Uhrzeit und Pausen-Countdown)
+        """
+        clock = self.clock
+        interval = self.intervals['display']
+        stats = self.task_stats['display']
+        while not self.finished.is_set():
+            scheduled = clock.monotonic() + interval
+            try:
+                await asyncio.wait_for(self.render_requested.wait(), timeout=clock.to_real(interval))
+            except asyncio.TimeoutError:
+                pass
+            self.render_requested.clear()
+
+            start = clock.monotonic()
+            started = time.perf_counter()
+            try:
+                self._render(start)
+                self.metrics.record('render', time.perf_counter() - started)
+                await self._push_display()
+            except Exception as e:
+                print(f"Fehler in Task display: {e}")
+            stats.record(clock.to_real(max(0.0, start - scheduled)), time.perf_counter() - started)
+
+    def _render(self, now):
+        exercise = self.active_exercise
+        if self.phase == 'preview':
+            self.display.show_exercise_preview(exercise['name'])
+        elif self.phase == 'rest':
+            remaining = max(1, int(self.phase_until - now + 0.999))
+            self.display.show_rest_timer(remaining)
+        elif self.phase == 'exercise':
+            self.display.show_workout(
+                exercise['name'],
+                exercise['sets'],
+                exercise['reps'],
+                self.workout_manager.current_set,
+                self.heart_rate
+            )
+
+    def _update_display(self):
+        started = time.perf_counter()
+        self.display.update()
+        self.metrics.record('display_update', time.perf_counter() - started)
+
+    async def _push_display(self):
+        # E-Paper-Updates blockieren lange, daher im Executor
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._update_display)
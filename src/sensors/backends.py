@@ -0,0 +1,321 @@
+"""
+Austauschbare Datenquellen für HeartRateSensor und MotionSensor
+
+Jedes Backend liefert mit read(now) alle seit dem letzten Aufruf
+angefallenen Messwerte als (Zeitstempel, Block):
+
+- Hardware: MPU6050 bzw. MAX30102 über I2C (nur auf dem Raspberry Pi)
+- Synthetisch: erzeugte Signale mit bekannter Wahrheit (Wiederholungen, Puls)
+- Trace: Wiedergabe aufgezeichneter Messreihen aus einer .npz-Datei
+
+`now` stammt von der Uhr des Sensors (siehe utils/clock.py); mit einer
+ScaledClock laufen synthetische Signale und Traces im Zeitraffer.
+"""
+import math
+import numpy as np
+
+# MAX30102 Register für den FIFO-Zugriff
+MAX30102_ADDRESS = 0x57
+REG_FIFO_WR_PTR = 0x04
+REG_FIFO_DATA = 0x07
+FIFO_DEPTH = 32
+BYTES_PER_SAMPLE = 6  # SpO2-Modus: je 3 Byte rot und IR
+
+GRAVITY = 9.81
+
+class Mpu6050Backend:
+    """Beschleunigungssensor MPU6050; liefert pro Aufruf einen Messwert"""
+    burst = False
+
+    def __init__(self, address=0x68):
+        from mpu6050 import mpu6050
+        self.sensor = mpu6050(address)
+        self._timestamps = np.zeros(1, dtype=np.float64)
+        self._block = np.zeros((1, 3), dtype=np.float64)
+
+    def read(self, now):
+        data = self.sensor.get_accel_data()
+        self._timestamps[0] = now
+        block = self._block[0]
+        block[0], block[1], block[2] = data['x'], data['y'], data['z']
+        return self._timestamps, self._block
+
+    def close(self):
+        pass
+
+class Max30102Backend:
+    """Pulssensor MAX30102; liest den FIFO per Burst über I2C"""
+    burst = True
+
+    def __init__(self, sample_rate=100):
+        import board
+        import busio
+        import adafruit_max30102
+
+        self.i2c = busio.I2C(board.SCL, board.SDA)
+        self.sensor = adafruit_max30102.MAX30102(self.i2c)
+        self.sensor.setup_sensor()
+        self.sensor.set_pulse_amplitude_red(0x0A)
+        self.sensor.set_pulse_amplitude_ir(0x0A)
+        self.dropped_samples = 0
+
+        # Vorbelegte Puffer für Burst-Lesezugriffe
+        self._reg = bytearray(1)
+        self._pointers = bytearray(3)  # WR_PTR, OVF_COUNTER, RD_PTR
+        self._fifo = bytearray(FIFO_DEPTH * BYTES_PER_SAMPLE)
+        self._fifo_bytes = np.frombuffer(self._fifo, dtype=np.uint8)
+        self._decoded = np.zeros((FIFO_DEPTH, 2), dtype=np.uint32)
+        self._timestamps = np.zeros(FIFO_DEPTH, dtype=np.float64)
+        self._ts_offsets = np.arange(FIFO_DEPTH - 1, -1, -1, dtype=np.float64) / sample_rate
+
+    def _read_register_block(self, register, buffer, length):
+        self._reg[0] = register
+        while not self.i2c.try_lock():
+            pass
+        try:
+            self.i2c.writeto_then_readfrom(MAX30102_ADDRESS, self._reg, buffer, in_end=length)
+        finally:
+            self.i2c.unlock()
+
+    def read(self, now):
+        """Liest alle im FIFO wartenden Messwerte in einem Burst"""
+        self._read_register_block(REG_FIFO_WR_PTR, self._pointers, 3)
+        write_ptr, overflow, read_ptr = self._pointers
+        count = (write_ptr - read_ptr) & (FIFO_DEPTH - 1)
+        if overflow:
+            # FIFO war voll, ältere Werte wurden vom Sensor verworfen
+            self.dropped_samples += overflow
+            count = FIFO_DEPTH
+        if count == 0:
+            return self._timestamps[:0], self._decoded[:0]
+
+        self._read_register_block(REG_FIFO_DATA, self._fifo, count * BYTES_PER_SAMPLE)
+
+        # 18-Bit-Werte aus je drei Bytes zusammensetzen (vektorisiert)
+        raw = self._fifo_bytes[:count * BYTES_PER_SAMPLE].reshape(count, 2, 3)
+        decoded = self._decoded[:count]
+        np.copyto(decoded, raw[:, :, 0])
+        decoded <<= 8
+        decoded |= raw[:, :, 1]
+        decoded <<= 8
+        decoded |= raw[:, :, 2]
+        decoded &= 0x3FFFF
+
+        timestamps = self._timestamps[:count]
+        np.subtract(now, self._ts_offsets[FIFO_DEPTH - count:], out=timestamps)
+        return timestamps, decoded
+
+    def close(self):
+        self.i2c.deinit()
+
+class _Generator:
+    """Basis für synthetische Signale mit fester Abtastrate ab dem ersten Aufruf"""
+    burst = True
+
+    def __init__(self, sample_rate, seed):
+        self.sample_rate = sample_rate
+        self.rng = np.random.default_rng(seed)
+        self.start = None
+        self.index = 0
+
+    def _due(self, now):
+        """Zeitstempel aller Messwerte bis einschließlich `now`"""
+        if self.start is None:
+            self.start = now
+        upto = int(math.floor((now - self.start) * self.sample_rate)) + 1
+        indices = np.arange(self.index, max(upto, self.index), dtype=np.float64)
+        self.index = max(upto, self.index)
+        return self.start + indices / self.sample_rate
+
+    def close(self):
+        pass
+
+class SyntheticMotionBackend(_Generator):
+    """
+    Gleichmäßige Wiederholungen als Sinus auf einer Achse plus Rauschen
+
+    Nach `idle_seconds` Ruhe (Einschwingen der Grundlinie) folgt alle
+    `rep_period` Sekunden eine Wiederholung; die Maxima sind die
+    Referenzzeitpunkte für die Auswertung der Erkennung.
+    """
+    def __init__(self, sample_rate=200, rep_period=2.0, amplitude=3.0, noise=0.15,
+                 axis=2, idle_seconds=2.0, seed=0):
+        super().__init__(sample_rate, seed)
+        self.rep_period = rep_period
+        self.amplitude = amplitude
+        self.noise = noise
+        self.axis = axis
+        self.idle_seconds = idle_seconds
+
+    def read(self, now):
+        timestamps = self._due(now)
+        n = len(timestamps)
+        block = self.rng.normal(0.0, self.noise, (n, 3))
+        block[:, 2] += GRAVITY
+        moving = timestamps - self.start - self.idle_seconds
+        block[:, self.axis] += np.where(
+            moving > 0, self.amplitude * np.sin(2 * np.pi * moving / self.rep_period), 0.0)
+        return timestamps, block
+
+    def rep_times(self, start, end):
+        """Referenzzeitpunkte der Wiederholungen in [start, end)"""
+        if self.start is None:
+            return np.zeros(0)
+        first = self.start + self.idle_seconds + self.rep_period / 4
+        k0 = max(0, math.ceil((start - first) / self.rep_period))
+        k1 = max(0, math.ceil((end - first) / self.rep_period))
+        return first + np.arange(k0, k1) * self.rep_period
+
+class SyntheticPPGBackend(_Generator):
+    """
+    PPG-Rohwerte (rot, IR) mit vorgegebenem, optional schwankendem Puls
+
+    bpm(t) = bpm + swing * sin(2π t / swing_period)
+    """
+    def __init__(self, sample_rate=100, bpm=120.0, swing=0.0, swing_period=300.0,
+                 ir_level=120000, red_level=90000, pulse_amplitude=1500, noise=40, seed=1):
+        super().__init__(sample_rate, seed)
+        self.bpm = bpm
+        self.swing = swing
+        self.swing_period = swing_period
+        self.levels = np.array([red_level, ir_level], dtype=np.float64)
+        self.pulse_amplitude = pulse_amplitude
+        self.noise = noise
+        self._phase = 0.0
+
+    def true_bpm(self, timestamps):
+        elapsed = np.asarray(timestamps, dtype=np.float64) - (self.start or 0.0)
+        return self.bpm + self.swing * np.sin(2 * np.pi * elapsed / self.swing_period)
+
+    def read(self, now):
+        timestamps = self._due(now)
+        n = len(timestamps)
+        if n == 0:
+            return timestamps, np.zeros((0, 2), dtype=np.uint32)
+        # Phase aufintegrieren, damit Pulsänderungen stetig bleiben
+        steps = 2 * np.pi * self.true_bpm(timestamps) / 60.0 / self.sample_rate
+        phase = self._phase + np.cumsum(steps)
+        self._phase = float(phase[-1])
+        pulse = 0.7 * np.sin(phase) + 0.2 * np.sin(2 * phase + 0.8)
+        block = self.levels + np.outer(self.pulse_amplitude * pulse, [0.6, 1.0])
+        block += self.rng.normal(0.0, self.noise, (n, 2))
+        return timestamps, np.clip(block, 0, 0x3FFFF).astype(np.uint32)
+
+class Trace:
+    """
+    Aufgezeichnete Messreihen (Zeitstempel relativ zum Aufnahmebeginn)
+
+    Felder: imu_t/imu (n x 3, m/s²), ppg_t/ppg (n x 2, rot/IR) sowie
+    optional rep_times und bpm_t/bpm als Referenz für die Auswertung.
+    """
+    FIELDS = ('imu_t', 'imu', 'ppg_t', 'ppg', 'rep_times', 'bpm_t', 'bpm')
+
+    def __init__(self, **arrays):
+        for name in self.FIELDS:
+            setattr(self, name, arrays.get(name))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def save(self, path):
+        np.savez_compressed(path, **{name: getattr(self, name) for name in self.FIELDS
+                                     if getattr(self, name) is not None})
+
+    @classmethod
+    def record_synthetic(cls, seconds, motion=None, ppg=None):
+        """Erzeugt einen Trace aus den synthetischen Backends (z.B. für CI)"""
+        motion = motion or SyntheticMotionBackend()
+        ppg = ppg or SyntheticPPGBackend()
+        imu_t, imu = motion.read(0.0)
+        rest_t, rest = motion.read(seconds)
+        ppg_t0, ppg0 = ppg.read(0.0)
+        ppg_t1, ppg1 = ppg.read(seconds)
+        bpm_t = np.arange(0.0, seconds, 1.0)
+        return cls(imu_t=np.concatenate((imu_t, rest_t)), imu=np.concatenate((imu, rest)),
+                   ppg_t=np.concatenate((ppg_t0, ppg_t1)), ppg=np.concatenate((ppg0, ppg1)),
+                   rep_times=motion.rep_times(0.0, seconds),
+                   bpm_t=bpm_t, bpm=ppg.true_bpm(bpm_t))
+
+class _TracePlayer:
+    """Spielt eine Messreihe ab dem ersten Aufruf ab, optional in Schleife"""
+    burst = True
+
+    def __init__(self, timestamps, data, loop=False):
+        self.t = np.asarray(timestamps, dtype=np.float64)
+        self.data = data
+        self.loop = loop
+        step = float(np.median(np.diff(self.t))) if len(self.t) > 1 else 0.0
+        self.duration = float(self.t[-1]) + step if len(self.t) else 0.0
+        self.start = None
+        self.offset = 0.0  # Versatz durch bereits abgeschlossene Durchläufe
+        self.index = 0
+
+    def read(self, now):
+        if self.start is None:
+            self.start = now
+        times, blocks = [], []
+        while True:
+            hi = int(np.searchsorted(self.t, now - self.start - self.offset, side='right'))
+            if hi > self.index:
+                times.append(self.t[self.index:hi] + self.start + self.offset)
+                blocks.append(self.data[self.index:hi])
+                self.index = hi
+            if hi < len(self.t) or not self.loop or self.duration <= 0:
+                break
+            self.offset += self.duration
+            self.index = 0
+        if not times:
+            return self.t[:0], self.data[:0]
+        if len(times) == 1:
+            return times[0], blocks[0]
+        return np.concatenate(times), np.concatenate(blocks)
+
+    def _absolute(self, relative, start, end):
+        """Referenzzeitpunkte in [start, end) unter Berücksichtigung der Durchläufe"""
+        if self.start is None or relative is None:
+            return np.zeros(0)
+        loops = int((end - self.start) // self.duration) + 1 if self.loop and self.duration else 1
+        times = np.concatenate([relative + self.start + i * self.duration for i in range(loops)])
+        return times[(times >= start) & (times < end)]
+
+    def close(self):
+        pass
+
+class TraceMotionBackend(_TracePlayer):
+    def __init__(self, trace, loop=False):
+        super().__init__(trace.imu_t, trace.imu, loop)
+        self.trace = trace
+
+    def rep_times(self, start, end):
+        return self._absolute(self.trace.rep_times, start, end)
+
+class TracePPGBackend(_TracePlayer):
+    def __init__(self, trace, loop=False):
+        super().__init__(trace.ppg_t, trace.ppg.astype(np.uint32), loop)
+        self.trace = trace
+
+    def true_bpm(self, timestamps):
+        if self.trace.bpm is None or self.start is None:
+            return None
+        relative = (np.asarray(timestamps) - self.start) % self.duration
+        return np.interp(relative, self.trace.bpm_t, self.trace.bpm)
+
+def create_backends(kind='hardware', trace_path=None, motion_rate=200, ppg_rate=100, loop=True):
+    """
+    Erzeugt (Bewegungs-Backend, Puls-Backend)
+
+    Args:
+        kind: 'hardware', 'synthetic' oder 'trace'
+    """
+    if kind == 'hardware':
+        return Mpu6050Backend(), Max30102Backend(ppg_rate)
+    if kind == 'synthetic':
+        return SyntheticMotionBackend(motion_rate), SyntheticPPGBackend(ppg_rate)
+    if kind == 'trace':
+        if not trace_path:
+            raise ValueError("Für das Trace-Backend wird eine Trace-Datei benötigt")
+        trace = Trace.load(trace_path)
+        return TraceMotionBackend(trace, loop), TracePPGBackend(trace, loop)
+    raise ValueError(f"Unbekanntes Sensor-Backend: {kind}")
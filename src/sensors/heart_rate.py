@@ -1,47 +1,65 @@
 import time
-import board
-import busio
-import adafruit_max30102
+from sensors.ppg import PPGProcessor
+from utils.clock import SYSTEM_CLOCK
+from utils.instrumentation import METRICS
 
 class HeartRateSensor:
-    def __init__(self):
-        self.i2c = busio.I2C(board.SCL, board.SDA)
-        self.sensor = adafruit_max30102.MAX30102(self.i2c)
-        self.sensor.setup_sensor()
-        self.sensor.set_pulse_amplitude_red(0x0A)
-        self.sensor.set_pulse_amplitude_ir(0x0A)
-        
+    def __init__(self, sample_rate=100, window_seconds=8.0, backend=None, clock=None, metrics=None):
+        """
+        Args:
+            backend: Datenquelle (siehe sensors/backends.py), Standard ist der MAX30102
+            clock: Uhr für die Zeitstempel, Standard ist die Echtzeit
+            metrics: Messpunkte für FIFO-Lesen und Pulsberechnung
+        """
+        if backend is None:
+            from sensors.backends import Max30102Backend
+            backend = Max30102Backend(sample_rate)
+        self.backend = backend
+        self.clock = clock or SYSTEM_CLOCK
+        self.metrics = metrics or METRICS
+        self._read_stage = self.metrics.stage('hr_read')
+        self._compute_stage = self.metrics.stage('hr_compute')
+        self.metrics.gauge('hr_dropped_samples', lambda: self.dropped_samples)
+
+        self.sample_rate = sample_rate
+        self.processor = PPGProcessor(sample_rate, window_seconds)
+        self.confidence = 0.0
+        # Anzahl der Pulsberechnungen; ändert sich nur mit einem neuen
+        # Schätzwert (etwa einmal pro Sekunde, siehe PPGProcessor.hop)
+        self.updates = 0
+
+    @property
+    def dropped_samples(self):
+        return getattr(self.backend, 'dropped_samples', 0)
+
+    def _drain_fifo(self):
+        """
+        Übernimmt alle seit dem letzten Aufruf angefallenen Messwerte
+
+        Returns:
+            Anzahl der gelesenen Messwerte
+        """
+        started = time.perf_counter()
+        timestamps, block = self.backend.read(self.clock.monotonic())
+        read = time.perf_counter()
+        self._read_stage.record(read - started)
+        # Nur Aufrufe mit neuer Auswertung zählen als Pulsberechnung
+        if len(timestamps) and self.processor.add_samples(block, timestamps):
+            self.updates += 1
+            self._compute_stage.record(time.perf_counter() - read)
+        return len(timestamps)
+
     def read_heart_rate(self):
         """Liest die aktuelle Herzfrequenz"""
         try:
-            red_reading = self.sensor.red
-            ir_reading = self.sensor.ir
-            
-            if ir_reading > 50000:  # Schwellenwert für gültige Messung
-                # Vereinfachte Herzfrequenzberechnung
-                # In der Praxis würde hier ein komplexerer Algorithmus verwendet
-                heart_rate = self._calculate_heart_rate(red_reading, ir_reading)
-                return heart_rate
-            return None
-            
+            self._drain_fifo()
+            self.confidence = self.processor.confidence
+            return self.processor.bpm
+
         except Exception as e:
             print(f"Fehler beim Lesen der Herzfrequenz: {e}")
             return None
-            
-    def _calculate_heart_rate(self, red, ir):
-        """
-        Berechnet die Herzfrequenz aus den Rohdaten
-        Dies ist eine vereinfachte Version - in der Praxis würde man
-        einen komplexeren Algorithmus verwenden
-        """
-        # Beispielhafte Berechnung
-        if ir == 0:
-            return 0
-        ratio = red / ir
-        # Vereinfachte Formel - muss in der Praxis kalibriert werden
-        heart_rate = int(60 * ratio)
-        return min(max(heart_rate, 40), 200)  # Begrenzt auf realistische Werte
-        
+
     def close(self):
         """Schließt die Verbindung zum Sensor"""
-        self.i2c.deinit()
+        self.backend.close()
@@ -1,58 +1,221 @@
-from mpu6050 import mpu6050
 import numpy as np
-from time import sleep
+import threading
+import time
+from utils.clock import SYSTEM_CLOCK
+from utils.instrumentation import METRICS
+from utils.ring_buffer import RingBuffer
+from sensors.rep_counter import RepCounter
+
+# Abfrageintervall für Backends, die mehrere Messwerte pro Aufruf liefern
+BURST_POLL_SECONDS = 0.02
+# Zeitkonstante der mitlaufenden Grundlinie (Schwerkraft plus Sensor-Offset)
+BASELINE_SECONDS = 10.0
 
 class MotionSensor:
-    def __init__(self, address=0x68):
-        self.sensor = mpu6050(address)
-        self.calibrate()
+    def __init__(self, address=0x68, sample_rate=200, buffer_seconds=2.0, backend=None, clock=None,
+                 metrics=None, baseline_seconds=BASELINE_SECONDS):
+        """
+        Args:
+            backend: Datenquelle (siehe sensors/backends.py), Standard ist der MPU6050
+            clock: Uhr für Abtasttakt und Zeitstempel, Standard ist die Echtzeit
+            metrics: Messpunkte für Lesen und Wiederholungserkennung
+            baseline_seconds: Zeitkonstante der mitlaufenden Grundlinie
+        """
+        if not 100 <= sample_rate <= 1000:
+            raise ValueError("sample_rate muss zwischen 100 und 1000 Hz liegen")
+
+        if backend is None:
+            from sensors.backends import Mpu6050Backend
+            backend = Mpu6050Backend(address)
+        self.backend = backend
+        self.clock = clock or SYSTEM_CLOCK
+        self.metrics = metrics or METRICS
+        self._read_stage = self.metrics.stage('motion_read')
+        self._rep_stage = self.metrics.stage('rep_detection')
+        self._record_stage = self.metrics.stage('motion_record')
         self.movement_threshold = 2.0  # m/s²
         self.rep_threshold = 0.8  # Schwellenwert für Wiederholungserkennung
-        
+
+        # Hintergrund-Abtastung in einen festen Ringpuffer
+        self.sample_rate = sample_rate
+        self._baseline_alpha = 1.0 / max(baseline_seconds * sample_rate, 1.0)
+        self.calibrate()
+        self.buffer = RingBuffer(int(sample_rate * buffer_seconds), channels=3)
+        self.sampling_thread = None
+        self.sampling = False
+        self.dropped_samples = 0
+        self.metrics.gauge('motion_dropped_samples', lambda: self.dropped_samples)
+
+        # Streaming-Wiederholungserkennung, wird pro Messwert aktualisiert.
+        # Ein neuer Zähler (Übungswechsel) wird nur zwischen zwei Bursts
+        # vom Abtast-Thread übernommen, nie während update() läuft.
+        self.rep_counter = RepCounter(sample_rate, {'threshold': self.rep_threshold})
+        self._counter_lock = threading.Lock()
+        self._next_counter = None
+        self._reported_counter = self.rep_counter
+        self._reported_reps = 0
+
+        # Optionale Aufzeichnung der Rohdaten (SessionRecorder)
+        self.recorder = None
+        self._record_offset = 0.0
+
     def calibrate(self):
-        """Kalibriert den Sensor durch Sammeln von Grundwerten"""
-        print("Kalibriere Bewegungssensor...")
-        accel_data = []
-        for _ in range(100):
-            data = self.sensor.get_accel_data()
-            accel_data.append([data['x'], data['y'], data['z']])
-            sleep(0.01)
-        
-        self.baseline = np.mean(accel_data, axis=0)
-        print("Kalibrierung abgeschlossen")
-        
+        """
+        Setzt die Grundlinie zurück, ohne zu blockieren
+
+        Die Grundlinie wird pro Messwert im Abtast-Thread geschätzt: bis
+        `baseline_seconds` Messwerte vorliegen als Mittelwert aller bisherigen,
+        danach als gleitender Mittelwert, der langsamer Drift (Lage, Temperatur)
+        folgt. Schnelle Bewegungen wie Wiederholungen mitteln sich heraus.
+        """
+        self._baseline_xyz = (0.0, 0.0, 0.0)
+        self._baseline_count = 0
+
+    @property
+    def baseline(self):
+        return np.array(self._baseline_xyz)
+
+    def start_sampling(self):
+        """Startet die kontinuierliche Abtastung im Hintergrund"""
+        if self.sampling:
+            return
+        self.sampling = True
+        self.sampling_thread = threading.Thread(target=self._sampling_worker)
+        self.sampling_thread.daemon = True
+        self.sampling_thread.start()
+
+    def stop_sampling(self):
+        """Stoppt die Hintergrund-Abtastung"""
+        self.sampling = False
+        if self.sampling_thread:
+            self.sampling_thread.join()
+            self.sampling_thread = None
+
+    def start_recording(self, recorder):
+        """Schreibt ab jetzt alle Messwerte mit Unix-Zeitstempel in `recorder`"""
+        self._record_offset = self.clock.time() - self.clock.monotonic()
+        self.recorder = recorder
+
+    def stop_recording(self):
+        self.recorder = None
+
+    def _sampling_worker(self):
+        """
+        Worker-Thread: liest den Sensor mit fester Rate in den Ringpuffer
+        Burst-fähige Backends werden seltener abgefragt und liefern dann
+        alle inzwischen angefallenen Messwerte auf einmal.
+        """
+        burst = getattr(self.backend, 'burst', False)
+        period = BURST_POLL_SECONDS if burst else 1.0 / self.sample_rate
+        next_sample = self.clock.monotonic()
+        while self.sampling:
+            try:
+                self._read_sample()
+            except Exception as e:
+                print(f"Fehler beim Lesen des Bewegungssensors: {e}")
+
+            next_sample += period
+            delay = next_sample - self.clock.monotonic()
+            if delay > 0:
+                self.clock.sleep(delay)
+            elif burst:
+                next_sample = self.clock.monotonic()
+            elif -delay > period:
+                # Zu weit im Rückstand: verpasste Takte verwerfen statt aufzuholen
+                missed = int(-delay / period)
+                self.dropped_samples += missed
+                next_sample += missed * period
+
+    def _read_sample(self):
+        started = time.perf_counter()
+        timestamps, block = self.backend.read(self.clock.monotonic())
+        read = time.perf_counter()
+        self._read_stage.record(read - started)
+        count = len(timestamps)
+        if count == 0:
+            return 0
+        if count == 1:
+            self.buffer.append(block[0], timestamps[0])
+        else:
+            self.buffer.extend(block, timestamps)
+
+        with self._counter_lock:
+            if self._next_counter is not None:
+                self.rep_counter, self._next_counter = self._next_counter, None
+        bx, by, bz = self._baseline_xyz
+        n = self._baseline_count
+        alpha = self._baseline_alpha
+        update = self.rep_counter.update
+        for (x, y, z), timestamp in zip(block.tolist(), timestamps.tolist()):
+            n += 1
+            weight = 1.0 / n if n * alpha < 1.0 else alpha
+            bx += weight * (x - bx)
+            by += weight * (y - by)
+            bz += weight * (z - bz)
+            update(x - bx, y - by, z - bz, timestamp)
+        self._baseline_xyz = (bx, by, bz)
+        self._baseline_count = n
+        detected = time.perf_counter()
+        self._rep_stage.record(detected - read)
+
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.add_motion(timestamps + self._record_offset, block)
+            self._record_stage.record(time.perf_counter() - detected)
+        return count
+
+    def configure_exercise(self, motion_config=None):
+        """
+        Stellt die Wiederholungserkennung auf eine Übung ein
+
+        Args:
+            motion_config: Dict aus dem "motion"-Block der Übung im Workout-JSON
+        """
+        config = {'threshold': self.rep_threshold}
+        if motion_config:
+            config.update(motion_config)
+        counter = RepCounter(self.sample_rate, config)
+        with self._counter_lock:
+            self._next_counter = counter
+            self._reported_counter = counter
+            self._reported_reps = 0
+
+    def _latest(self):
+        """Neuester Messwert aus dem Puffer, ohne Hintergrund-Abtastung direkt vom Sensor"""
+        if not self.sampling:
+            self._read_sample()
+        return self.buffer.latest()
+
     def detect_movement(self):
         """Erkennt signifikante Bewegungen"""
-        data = self.sensor.get_accel_data()
-        current = np.array([data['x'], data['y'], data['z']])
+        current = self._latest()
         diff = np.abs(current - self.baseline)
         return np.any(diff > self.movement_threshold)
-        
+
     def detect_rep(self):
         """
-        Erkennt eine einzelne Wiederholung einer Übung
-        Basiert auf der Bewegungsamplitude und -muster
-        """
-        readings = []
-        for _ in range(10):  # Sammle Daten über kurzen Zeitraum
-            data = self.sensor.get_accel_data()
-            readings.append([data['x'], data['y'], data['z']])
-            sleep(0.05)
-            
-        readings = np.array(readings)
-        max_amplitude = np.max(np.abs(readings - self.baseline), axis=0)
-        
-        # Prüfe ob die Amplitude über dem Schwellenwert liegt
-        return np.any(max_amplitude > self.rep_threshold)
-        
+        Gibt die Anzahl der seit dem letzten Aufruf erkannten Wiederholungen zurück
+        Die Erkennung läuft pro Messwert im Abtast-Thread; der Aufruf blockiert nicht
+        """
+        if not self.sampling:
+            self._read_sample()
+
+        # Bis der Abtast-Thread den neuen Zähler übernimmt, steht dieser auf 0;
+        # Wiederholungen des alten Zählers zählen nicht zur neuen Übung
+        with self._counter_lock:
+            count = self._reported_counter.count
+            new_reps = count - self._reported_reps
+            self._reported_reps = count
+        return max(new_reps, 0)
+
     def get_orientation(self):
         """Ermittelt die aktuelle Orientierung des Geräts"""
-        data = self.sensor.get_accel_data()
-        
+        x, y, z = self._latest()
+
         # Vereinfachte Orientierungserkennung
-        if abs(data['z']) > abs(data['x']) and abs(data['z']) > abs(data['y']):
-            return 'horizontal' if data['z'] > 0 else 'invertiert'
-        elif abs(data['y']) > abs(data['x']):
-            return 'vertikal' if data['y'] > 0 else 'verkehrt'
+        if abs(z) > abs(x) and abs(z) > abs(y):
+            return 'horizontal' if z > 0 else 'invertiert'
+        elif abs(y) > abs(x):
+            return 'vertikal' if y > 0 else 'verkehrt'
         else:
             return 'seitlich'
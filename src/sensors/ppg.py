@@ -0,0 +1,144 @@
+import time
+import numpy as np
+from utils.ring_buffer import RingBuffer
+
+class PPGProcessor:
+    """
+    Signalverarbeitung für PPG-Rohdaten des MAX30102
+
+    Rohwerte landen in einem festen Ringpuffer. Alle `hop` Messwerte wird
+    das Fenster der letzten `window_seconds` Sekunden bandpassgefiltert
+    und nach Herzschlägen durchsucht. Dadurch ist der Aufwand pro Messwert
+    konstant (Fensterlänge / hop), alle Zwischenarrays sind vorbelegt.
+    """
+    def __init__(self, sample_rate=100, window_seconds=8.0, update_seconds=1.0,
+                 min_bpm=40, max_bpm=200, min_ir=50000):
+        self.sample_rate = sample_rate
+        self.window = int(sample_rate * window_seconds)
+        self.hop = max(1, int(sample_rate * update_seconds))
+        self.min_ir = min_ir
+        self.min_distance = int(sample_rate * 60 / max_bpm)
+        self.max_interval = sample_rate * 60 / min_bpm
+
+        # Bandpass als Differenz zweier gleitender Mittelwerte:
+        # kurzes Fenster glättet oberhalb von ca. 4 Hz, langes entfernt
+        # den Gleichanteil und Drift unterhalb von ca. 0.7 Hz
+        self.short_len = self._odd(sample_rate / 8)
+        self.long_len = self._odd(sample_rate * 1.5)
+        self.valid = self.window - self.long_len + 1
+
+        self.buffer = RingBuffer(self.window, channels=2)  # Spalten: rot, IR
+
+        # Vorbelegte Arbeitsspeicher für die Fensterauswertung
+        self._raw = np.zeros((self.window, 2), dtype=np.float32)
+        self._ir = np.zeros(self.window, dtype=np.float64)
+        self._cumsum = np.zeros(self.window + 1, dtype=np.float64)
+        self._short = np.zeros(self.window, dtype=np.float64)
+        self._long = np.zeros(self.window, dtype=np.float64)
+        self._band = np.zeros(self.valid, dtype=np.float64)
+        self._mask = np.zeros(self.valid - 2, dtype=bool)
+        self._tmp_mask = np.zeros(self.valid - 2, dtype=bool)
+
+        self._since_update = 0
+        self.bpm = None
+        self.confidence = 0.0
+        self.last_process_time = 0.0
+
+    @staticmethod
+    def _odd(value):
+        value = max(3, int(value))
+        return value if value % 2 else value + 1
+
+    def add_samples(self, block, timestamps):
+        """
+        Übernimmt einen Burst von Rohwerten (n x 2: rot, IR)
+
+        Returns:
+            True, wenn dabei eine neue Auswertung berechnet wurde
+        """
+        self.buffer.extend(block, timestamps)
+        self._since_update += len(block)
+        if self._since_update < self.hop or len(self.buffer) < self.window:
+            return False
+        self._since_update = 0
+        self._process()
+        return True
+
+    def _moving_average(self, length, out):
+        # Gleitender Mittelwert über die kumulative Summe, Ergebnis in out[:n]
+        n = self.window - length + 1
+        np.subtract(self._cumsum[length:], self._cumsum[:n], out=out[:n])
+        out[:n] /= length
+        return out[:n]
+
+    def _process(self):
+        start = time.perf_counter()
+        self.buffer.read_window(self.window, self._raw)
+        ir = self._ir
+        np.copyto(ir, self._raw[:, 1])
+
+        # Kein Finger auf dem Sensor
+        dc = ir.mean()
+        if dc < self.min_ir:
+            self.bpm = None
+            self.confidence = 0.0
+            self.last_process_time = time.perf_counter() - start
+            return
+
+        self._cumsum[0] = 0.0
+        np.cumsum(ir, out=self._cumsum[1:])
+        short = self._moving_average(self.short_len, self._short)
+        long = self._moving_average(self.long_len, self._long)
+
+        # Beide Mittelwerte auf dieselbe Fenstermitte ausrichten
+        offset = (self.long_len - self.short_len) // 2
+        band = self._band
+        np.subtract(short[offset:offset + self.valid], long[:self.valid], out=band)
+        # PPG-Pulse zeigen als Einbruch im IR-Signal nach unten
+        np.negative(band, out=band)
+
+        # Streuung ohne temporäres Array über das Skalarprodukt
+        mean = band.mean()
+        band_std = max(0.0, float(np.dot(band, band)) / len(band) - mean * mean) ** 0.5
+
+        # Lokale Maxima oberhalb eines Anteils der Signalstreuung
+        threshold = 0.3 * band_std
+        mask = self._mask
+        np.greater(band[1:-1], band[:-2], out=mask)
+        np.greater_equal(band[1:-1], band[2:], out=self._tmp_mask)
+        mask &= self._tmp_mask
+        np.greater(band[1:-1], threshold, out=self._tmp_mask)
+        mask &= self._tmp_mask
+        candidates = np.flatnonzero(mask) + 1
+
+        # Refraktärzeit: pro Schlag nur die höchste Spitze behalten
+        peaks = []
+        for idx in candidates:
+            if peaks and idx - peaks[-1] < self.min_distance:
+                if band[idx] > band[peaks[-1]]:
+                    peaks[-1] = idx
+                continue
+            peaks.append(idx)
+
+        self.bpm, self.confidence = self._estimate(peaks, band_std, dc)
+        self.last_process_time = time.perf_counter() - start
+
+    def _estimate(self, peaks, band_std, dc):
+        if len(peaks) < 3:
+            return None, 0.0
+
+        intervals = np.diff(peaks).astype(np.float64)
+        intervals = intervals[intervals <= self.max_interval]
+        if len(intervals) < 2:
+            return None, 0.0
+
+        median = float(np.median(intervals))
+        bpm = int(round(60.0 * self.sample_rate / median))
+
+        # Konfidenz: Regelmäßigkeit der Schlagabstände, Pulsamplitude
+        # relativ zum Gleichanteil und Anteil des Fensters mit Schlägen
+        regularity = max(0.0, 1.0 - float(np.std(intervals)) / median)
+        perfusion = min(1.0, band_std / dc * 500)
+        coverage = min(1.0, float(intervals.sum()) / (self.valid * 0.7))
+        confidence = round(regularity * (0.5 + 0.5 * perfusion) * coverage, 2)
+        return min(max(bpm, 40), 200), confidence
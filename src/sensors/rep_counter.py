@@ -0,0 +1,111 @@
+import math
+
+# Standardwerte für die Wiederholungserkennung, pro Übung im Workout-JSON
+# unter "motion" überschreibbar
+DEFAULT_REP_CONFIG = {
+    'threshold': 0.8,       # Mindestausschlag auf der Hauptachse in m/s²
+    'hysteresis': 0.5,      # Rückfall unter threshold - hysteresis beendet die Wdh.
+    'min_interval': 0.4,    # Mindestabstand zwischen zwei Wiederholungen in s
+    'cutoff_hz': 3.0,       # Grenzfrequenz des Tiefpassfilters
+    'adaptive_ratio': 0.5,  # Schwelle folgt diesem Anteil der typischen Spitzenhöhe
+    'axis': 'auto',         # 'auto', 'x', 'y' oder 'z'
+    'invert': False         # Zählt auf der negativen statt der positiven Flanke
+}
+
+AXES = {'x': 0, 'y': 1, 'z': 2}
+
+class RepCounter:
+    """
+    Inkrementelle Wiederholungserkennung
+
+    Jeder Messwert durchläuft einen Tiefpass, wird auf die dominante
+    Bewegungsachse projiziert und über eine Spitzenerkennung mit Hysterese
+    gezählt. Pro Messwert fällt konstanter Aufwand an, es werden nur
+    Python-Floats verwendet.
+    """
+    def __init__(self, sample_rate, config=None):
+        self.sample_rate = sample_rate
+        self.configure(config)
+
+    def configure(self, config=None):
+        """Setzt die Parameter (z.B. beim Wechsel der Übung) und den Zustand zurück"""
+        cfg = dict(DEFAULT_REP_CONFIG)
+        if config:
+            cfg.update(config)
+        self.config = cfg
+
+        dt = 1.0 / self.sample_rate
+        rc = 1.0 / (2 * math.pi * cfg['cutoff_hz'])
+        self.alpha = dt / (rc + dt)
+        # Energie pro Achse wird über ca. 2 s gemittelt
+        self.energy_alpha = dt / (2.0 + dt)
+        # Spitzenhöhe klingt über ca. 5 s ab
+        self.envelope_decay = math.exp(-dt / 5.0)
+
+        self.fixed_axis = AXES.get(cfg['axis'])
+        self.sign = -1.0 if cfg['invert'] else 1.0
+        self.reset()
+
+    def reset(self):
+        self.filtered = [0.0, 0.0, 0.0]
+        self.energy = [0.0, 0.0, 0.0]
+        self.axis = self.fixed_axis if self.fixed_axis is not None else 0
+        self.in_peak = False
+        self.peak_value = 0.0
+        self.envelope = 0.0
+        self.last_rep_time = None
+        self.count = 0
+
+    def update(self, x, y, z, timestamp):
+        """
+        Verarbeitet einen Messwert (bereits um die Ruhelage bereinigt)
+
+        Returns:
+            True, wenn mit diesem Messwert eine Wiederholung abgeschlossen wurde
+        """
+        alpha = self.alpha
+        f = self.filtered
+        f[0] += alpha * (x - f[0])
+        f[1] += alpha * (y - f[1])
+        f[2] += alpha * (z - f[2])
+
+        if self.fixed_axis is None:
+            ea = self.energy_alpha
+            e = self.energy
+            e[0] += ea * (f[0] * f[0] - e[0])
+            e[1] += ea * (f[1] * f[1] - e[1])
+            e[2] += ea * (f[2] * f[2] - e[2])
+            # Achsenwechsel nur bei deutlichem Vorsprung, damit eine
+            # laufende Wiederholung nicht zwischen Achsen springt
+            if not self.in_peak:
+                best = 0 if e[0] >= e[1] and e[0] >= e[2] else (1 if e[1] >= e[2] else 2)
+                if best != self.axis and e[best] > 1.5 * e[self.axis]:
+                    self.axis = best
+
+        value = self.sign * f[self.axis]
+        self.envelope *= self.envelope_decay
+
+        cfg = self.config
+        high = max(cfg['threshold'], cfg['adaptive_ratio'] * self.envelope)
+        low = high - cfg['hysteresis']
+
+        if not self.in_peak:
+            if value > high:
+                self.in_peak = True
+                self.peak_value = value
+            return False
+
+        if value > self.peak_value:
+            self.peak_value = value
+        if value >= low:
+            return False
+
+        # Spitze abgeschlossen
+        self.in_peak = False
+        if self.peak_value > self.envelope:
+            self.envelope = self.peak_value
+        if self.last_rep_time is not None and timestamp - self.last_rep_time < cfg['min_interval']:
+            return False
+        self.last_rep_time = timestamp
+        self.count += 1
+        return True
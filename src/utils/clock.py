@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+class SystemClock:
+    """Echtzeit; Standard für den Betrieb auf dem Gerät"""
+    speed = 1.0
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def to_real(self, seconds):
+        """Rechnet eine Dauer in virtueller Zeit in echte Sekunden um"""
+        return seconds
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    async def sleep_async(self, seconds):
+        await asyncio.sleep(max(0.0, seconds))
+
+class ScaledClock(SystemClock):
+    """
+    Virtuelle Uhr, die `speed`-mal so schnell wie die Echtzeit läuft
+
+    Alle Komponenten, die Zeit über diese Uhr messen und warten, laufen
+    damit gemeinsam im Zeitraffer: Ein 30-minütiges Workout dauert bei
+    speed=60 eine halbe Minute. Threads und asyncio funktionieren
+    unverändert, da nur Wartezeiten verkürzt werden.
+    """
+    def __init__(self, speed=10.0, start_time=None):
+        if speed <= 0:
+            raise ValueError("speed muss größer als 0 sein")
+        self.speed = speed
+        self._real_start = time.monotonic()
+        self._wall_start = time.time() if start_time is None else start_time
+
+    def _elapsed(self):
+        return (time.monotonic() - self._real_start) * self.speed
+
+    def time(self):
+        return self._wall_start + self._elapsed()
+
+    def monotonic(self):
+        return self._real_start + self._elapsed()
+
+    def to_real(self, seconds):
+        return seconds / self.speed
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    async def sleep_async(self, seconds):
+        await asyncio.sleep(max(0.0, seconds) / self.speed)
+
+SYSTEM_CLOCK = SystemClock()
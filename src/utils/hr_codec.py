@@ -0,0 +1,90 @@
+import struct
+import numpy as np
+
+# Format: Header (Magic, Version, Anzahl, Startzeit), danach die Spalten
+# Zeitversatz in Sekunden ab Startzeit (float32) und Puls (uint16)
+MAGIC = b'HR'
+VERSION = 1
+HEADER = struct.Struct('<2sBxId')
+OFFSET_DTYPE = np.dtype('<f4')
+VALUE_DTYPE = np.dtype('<u2')
+
+def encode(timestamps, values):
+    """
+    Packt eine Herzfrequenz-Zeitreihe in einen kompakten BLOB
+
+    Args:
+        timestamps: Unix-Zeitstempel in Sekunden (Sequenz oder Array)
+        values: Pulswerte in BPM
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    count = len(timestamps)
+    start = float(timestamps[0]) if count else 0.0
+
+    offsets = (timestamps - start).astype(OFFSET_DTYPE)
+    packed_values = np.clip(np.rint(values), 0, 65535).astype(VALUE_DTYPE)
+    return HEADER.pack(MAGIC, VERSION, count, start) + offsets.tobytes() + packed_values.tobytes()
+
+def encode_samples(samples):
+    """Packt eine Liste von {'timestamp', 'value'}-Dicts"""
+    timestamps = np.fromiter((s['timestamp'] for s in samples), dtype=np.float64, count=len(samples))
+    values = np.fromiter((s['value'] for s in samples), dtype=np.float64, count=len(samples))
+    return encode(timestamps, values)
+
+def decode_header(blob):
+    magic, version, count, start = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Unbekanntes Herzfrequenz-Format")
+    return count, start
+
+def validate(blob):
+    """Prüft Kopf und Länge eines BLOBs, z.B. vom Gerät gepackt gesendet"""
+    if len(blob) < HEADER.size:
+        raise ValueError("Herzfrequenz-BLOB zu kurz")
+    count, _ = decode_header(blob)
+    if len(blob) != HEADER.size + count * (OFFSET_DTYPE.itemsize + VALUE_DTYPE.itemsize):
+        raise ValueError("Länge des Herzfrequenz-BLOBs passt nicht zur Anzahl")
+    return blob
+
+def decode(blob):
+    """
+    Entpackt einen BLOB
+
+    Returns:
+        Tuple (Zeitversatz float32, Pulswerte uint16, Startzeit). Die
+        Arrays sind Sichten auf den BLOB, es wird nichts kopiert.
+    """
+    count, start = decode_header(blob)
+    offsets = np.frombuffer(blob, dtype=OFFSET_DTYPE, count=count, offset=HEADER.size)
+    values = np.frombuffer(blob, dtype=VALUE_DTYPE, count=count,
+                           offset=HEADER.size + count * OFFSET_DTYPE.itemsize)
+    return offsets, values, start
+
+def window(blob, start=None, end=None):
+    """Messwerte innerhalb [start, end] (Unix-Zeit) per Binärsuche auf den Zeitversätzen"""
+    offsets, values, t0 = decode(blob)
+    lo = 0 if start is None else int(np.searchsorted(offsets, start - t0, side='left'))
+    hi = len(offsets) if end is None else int(np.searchsorted(offsets, end - t0, side='right'))
+    return offsets[lo:hi], values[lo:hi], t0
+
+def summarize(blob):
+    """Kennzahlen für die Aggregatspalten (Anzahl, Summe, Min, Max, Start, Ende)"""
+    offsets, values, t0 = decode(blob)
+    if len(values) == 0:
+        return {'hr_count': 0, 'hr_sum': 0.0, 'hr_min': None, 'hr_max': None,
+                'hr_start': None, 'hr_end': None}
+    return {
+        'hr_count': int(len(values)),
+        'hr_sum': float(values.sum(dtype=np.float64)),
+        'hr_min': int(values.min()),
+        'hr_max': int(values.max()),
+        'hr_start': t0,
+        'hr_end': t0 + float(offsets[-1])
+    }
+
+def to_samples(blob):
+    """Wandelt zurück in das JSON-Format {'timestamp', 'value'} für ältere Clients"""
+    offsets, values, t0 = decode(blob)
+    timestamps = offsets.astype(np.float64) + t0
+    return [{'timestamp': t, 'value': v} for t, v in zip(timestamps.tolist(), values.tolist())]
@@ -0,0 +1,70 @@
+import json
+import os
+
+def truncate_partial_line(path):
+    """
+    Entfernt eine beim Absturz abgebrochene letzte Zeile einer JSON-Lines-Datei
+
+    Returns:
+        Neue Dateigröße in Bytes
+    """
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) == b'\n':
+            return size
+
+        # Rückwärts bis zum letzten Zeilenende suchen
+        pos = size
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            newline = f.read(step).rfind(b'\n')
+            if newline != -1:
+                pos += newline + 1
+                break
+        f.truncate(pos)
+        f.flush()
+        os.fsync(f.fileno())
+        return pos
+
+def read_last_records(path, count, block_size=4096):
+    """
+    Liest die letzten `count` Einträge einer JSON-Lines-Datei vom Dateiende her
+
+    Der Aufwand hängt nur von der Größe der gelesenen Einträge ab, nicht
+    von der Dateigröße.
+
+    Returns:
+        Liste der Einträge, neuester zuerst
+    """
+    if count <= 0 or not os.path.exists(path):
+        return []
+
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b''
+        # Eine Zeile mehr lesen als nötig, damit die erste sicher vollständig ist
+        while pos > 0 and data.count(b'\n') <= count:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+
+    lines = data.split(b'\n')
+    if pos > 0:
+        lines = lines[1:]
+    records = []
+    for line in reversed(lines):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+        if len(records) >= count:
+            break
+    return records
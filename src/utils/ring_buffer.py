@@ -0,0 +1,106 @@
+import threading
+import numpy as np
+
+class RingBuffer:
+    """
+    Ringpuffer fester Größe für mehrkanalige Sensordaten
+
+    Der Speicher wird einmalig reserviert. Schreiben und Lesen kopieren
+    nur in vorhandene Arrays, im Hot-Path entstehen keine neuen Listen.
+    """
+    def __init__(self, capacity, channels=1, dtype=np.float32):
+        self.capacity = int(capacity)
+        self.channels = channels
+        self.data = np.zeros((self.capacity, channels), dtype=dtype)
+        self.timestamps = np.zeros(self.capacity, dtype=np.float64)
+        # Monoton steigender Schreibzähler, dient Lesern als Position
+        self.total_written = 0
+        self.lock = threading.Lock()
+
+    def append(self, values, timestamp):
+        """Schreibt einen einzelnen Messwert in den Puffer"""
+        with self.lock:
+            idx = self.total_written % self.capacity
+            self.data[idx] = values
+            self.timestamps[idx] = timestamp
+            self.total_written += 1
+
+    def extend(self, block, timestamps):
+        """Schreibt mehrere Messwerte (z.B. einen FIFO-Burst) am Stück"""
+        count = len(block)
+        if count == 0:
+            return
+        if count > self.capacity:
+            block = block[-self.capacity:]
+            timestamps = timestamps[-self.capacity:]
+            skipped = count - self.capacity
+            count = self.capacity
+        else:
+            skipped = 0
+
+        with self.lock:
+            self.total_written += skipped
+            start = self.total_written % self.capacity
+            first = min(count, self.capacity - start)
+            self.data[start:start + first] = block[:first]
+            self.timestamps[start:start + first] = timestamps[:first]
+            if first < count:
+                rest = count - first
+                self.data[:rest] = block[first:]
+                self.timestamps[:rest] = timestamps[first:]
+            self.total_written += count
+
+    def __len__(self):
+        return min(self.total_written, self.capacity)
+
+    def latest(self):
+        """Gibt den zuletzt geschriebenen Messwert zurück (oder None)"""
+        with self.lock:
+            if self.total_written == 0:
+                return None
+            return self.data[(self.total_written - 1) % self.capacity].copy()
+
+    def read_window(self, count, out, out_timestamps=None):
+        """
+        Kopiert die letzten `count` Messwerte chronologisch nach `out`
+
+        Returns:
+            Anzahl der tatsächlich kopierten Werte
+        """
+        with self.lock:
+            return self._copy_from(self.total_written - count, out, out_timestamps)
+
+    def read_since(self, position, out, out_timestamps=None):
+        """
+        Kopiert alle Messwerte ab Schreibposition `position` nach `out`
+
+        Returns:
+            Tuple (Anzahl kopierter Werte, neue Position, verlorene Werte).
+            Verloren sind Werte, die vor dem Lesen bereits überschrieben wurden.
+        """
+        with self.lock:
+            end = self.total_written
+            oldest = max(0, end - min(self.capacity, len(out)))
+            dropped = max(0, oldest - position)
+            count = self._copy_from(max(position, oldest), out, out_timestamps)
+            return count, end, dropped
+
+    def _copy_from(self, position, out, out_timestamps):
+        # Muss mit gehaltenem Lock aufgerufen werden
+        end = self.total_written
+        position = max(position, end - self.capacity, 0)
+        count = min(end - position, len(out))
+        if count <= 0:
+            return 0
+        position = end - count
+        start = position % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self.data[start:start + first]
+        if out_timestamps is not None:
+            out_timestamps[:first] = self.timestamps[start:start + first]
+        if first < count:
+            rest = count - first
+            out[first:count] = self.data[:rest]
+            if out_timestamps is not None:
+                out_timestamps[first:count] = self.timestamps[:rest]
+        return count
@@ -0,0 +1,113 @@
+import base64
+import json
+import os
+from utils import hr_codec
+from utils.jsonl import truncate_partial_line, read_last_records
+
+def summarize(record):
+    """Erstellt den kompakten Indexeintrag zu einem Journal-Eintrag"""
+    summary = record.get('summary') or {}
+    avg_heart_rate = summary.get('avg_heart_rate')
+    if avg_heart_rate is None and record.get('heart_rate_packed'):
+        _, values, _ = hr_codec.decode(base64.b64decode(record['heart_rate_packed']))
+        avg_heart_rate = round(float(values.mean())) if len(values) else 0
+    elif avg_heart_rate is None:
+        values = [d['value'] for d in record.get('heart_rate_data') or [] if 'value' in d]
+        avg_heart_rate = round(sum(values) / len(values)) if values else 0
+    return {
+        'id': record.get('id'),
+        'timestamp': record['date'],
+        'workout_name': record.get('workout_name'),
+        'completed_exercises': record.get('completed_exercises', 0),
+        'total_sets': summary.get('total_sets'),
+        'total_reps': summary.get('total_reps'),
+        'duration_mins': summary.get('duration_mins'),
+        'avg_heart_rate': avg_heart_rate
+    }
+
+class HistoryIndex:
+    """
+    Kompakter Index der Trainingshistorie
+
+    Pro Einheit eine JSON-Zeile ohne Herzfrequenz-Rohdaten, in
+    chronologischer Reihenfolge. "Letzte N" liest nur das Dateiende,
+    Zeitraumabfragen suchen binär über die Dateiposition.
+    """
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            truncate_partial_line(path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def append(self, summary):
+        with open(self.path, 'ab') as f:
+            f.write((json.dumps(summary, separators=(',', ':')) + '\n').encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def rebuild(self, records):
+        """Baut den Index aus den Journal-Einträgen neu auf (einmalig/nach Absturz)"""
+        tmp = self.path + ".tmp"
+        with open(tmp, 'wb') as f:
+            for record in records:
+                line = json.dumps(summarize(record), separators=(',', ':')) + '\n'
+                f.write(line.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def last(self, count):
+        """Die letzten `count` Einheiten, neueste zuerst"""
+        return read_last_records(self.path, count)
+
+    def between(self, start, end):
+        """
+        Einheiten mit start <= timestamp <= end (ISO-Strings), chronologisch
+
+        Der Einstiegspunkt wird per Bisektion über die Dateiposition gesucht.
+        """
+        if not self.exists():
+            return []
+        results = []
+        with open(self.path, 'rb') as f:
+            f.seek(self._bisect(f, start))
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry['timestamp'] < start:
+                    continue
+                if entry['timestamp'] > end:
+                    break
+                results.append(entry)
+        return results
+
+    def _bisect(self, f, timestamp, block_size=4096):
+        """Dateiposition einer Zeilengrenze vor dem ersten Eintrag >= timestamp"""
+        lo, hi = 0, f.seek(0, os.SEEK_END)
+        while hi - lo > block_size:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()  # Rest der angeschnittenen Zeile überspringen
+            line = f.readline()
+            if not line:
+                hi = mid
+                continue
+            try:
+                entry_ts = json.loads(line)['timestamp']
+            except (ValueError, KeyError):
+                hi = mid
+                continue
+            if entry_ts < timestamp:
+                lo = mid
+            else:
+                hi = mid
+
+        if lo == 0:
+            return 0
+        f.seek(lo)
+        f.readline()
+        return f.tell()
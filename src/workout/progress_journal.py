@@ -0,0 +1,237 @@
+import json
+import os
+from pathlib import Path
+from utils.jsonl import truncate_partial_line, read_last_records
+
+SEGMENT_PREFIX = "segment_"
+SEGMENT_SUFFIX = ".jsonl"
+# Kleine Begleitdatei, solange eine Kompaktierung läuft
+COMPACTION_MARKER = "compaction.json"
+META_PREFIX = b'{"_meta"'
+
+def _fsync_dir(directory):
+    """Macht Umbenennungen/neue Dateien im Verzeichnis dauerhaft (nicht überall unterstützt)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+class ProgressJournal:
+    """
+    Append-only Journal für Trainingseinheiten
+
+    Einträge werden als JSON Lines an das aktive Segment angehängt und per
+    fsync gesichert; der Aufwand pro Eintrag ist unabhängig von der
+    Länge der Historie. Volle Segmente werden versiegelt und ein neues
+    Segment atomar angelegt. Eine abgebrochene letzte Zeile (z.B. nach
+    Stromausfall) wird beim Lesen ignoriert.
+
+    Die erste Zeile eines Segments darf ein Metadaten-Eintrag
+    {"_meta": {...}} sein (Migration, Kompaktierung). Beim Start werden
+    keine Datensegmente geöffnet; eine laufende Kompaktierung ist an
+    der Begleitdatei COMPACTION_MARKER erkennbar.
+    """
+    def __init__(self, directory, max_segment_bytes=1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self._file = None
+
+        self._recover()
+        segments = self._segment_numbers()
+        active = segments[-1] if segments else self._create_segment(1)
+        truncate_partial_line(self._segment_path(active))
+        self._open_segment(active)
+
+    def _segment_path(self, number):
+        return self.directory / f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+    def _segment_numbers(self):
+        numbers = []
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            try:
+                numbers.append(int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+            except ValueError:
+                continue
+        return sorted(numbers)
+
+    def _read_meta(self, number):
+        """Liest den Metadaten-Eintrag; normale Einträge werden nicht geparst"""
+        try:
+            with open(self._segment_path(number), 'rb') as f:
+                if f.read(len(META_PREFIX)) != META_PREFIX:
+                    return None
+                first = META_PREFIX + f.readline()
+            return json.loads(first).get('_meta')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _recover(self):
+        """Räumt nach einem Absturz während Kompaktierung oder Rotation auf"""
+        for tmp in self.directory.glob("*.tmp"):
+            tmp.unlink()
+
+        # Reste einer unterbrochenen Kompaktierung: nur wenn das
+        # kompaktierte Segment bereits geschrieben ist, sind die alten
+        # Segmente darin enthalten und können entfernt werden
+        marker = self.directory / COMPACTION_MARKER
+        if not marker.exists():
+            return
+        try:
+            with open(marker, 'r') as f:
+                pending = json.load(f)
+            first, last = pending['compacted_from'], pending['into']
+        except (OSError, ValueError, KeyError, TypeError):
+            first = last = None
+        if first is not None and (self._read_meta(last) or {}).get('compacted_from') == first:
+            for old in range(first, last):
+                path = self._segment_path(old)
+                if path.exists():
+                    path.unlink()
+        marker.unlink()
+        _fsync_dir(self.directory)
+
+    def _write_atomic(self, path, lines):
+        """Schreibt eine Datei über eine temporäre Datei und os.replace"""
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, 'wb') as f:
+            for line in lines:
+                f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_dir(self.directory)
+
+    def _create_segment(self, number, lines=()):
+        self._write_atomic(self._segment_path(number), lines)
+        return number
+
+    def _open_segment(self, number):
+        if self._file:
+            self._file.close()
+        self.active_segment = number
+        self._file = open(self._segment_path(number), 'ab')
+        self._active_size = self._file.tell()
+
+    @staticmethod
+    def _encode(record):
+        return (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def append(self, record):
+        """Hängt einen Eintrag an und sichert ihn dauerhaft"""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """Hängt mehrere Einträge mit einem einzigen fsync an"""
+        data = b''.join(self._encode(r) for r in records)
+        if self._active_size and self._active_size + len(data) > self.max_segment_bytes:
+            self.rotate()
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._active_size += len(data)
+
+    def rotate(self):
+        """Versiegelt das aktive Segment und beginnt ein neues"""
+        self._open_segment(self._create_segment(self.active_segment + 1))
+
+    def sealed_segments(self):
+        return [n for n in self._segment_numbers() if n < self.active_segment]
+
+    def _iter_segment(self, number):
+        try:
+            with open(self._segment_path(number), 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Unvollständige letzte Zeile nach Absturz
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if '_meta' not in record:
+                        yield record
+        except FileNotFoundError:
+            return
+
+    def __iter__(self):
+        """Liefert alle Einträge in Schreibreihenfolge"""
+        for number in self._segment_numbers():
+            yield from self._iter_segment(number)
+
+    def last_record(self):
+        """Liest nur den zuletzt geschriebenen Eintrag (ohne Komplettdurchlauf)"""
+        for number in reversed(self._segment_numbers()):
+            for record in read_last_records(self._segment_path(number), 2):
+                if '_meta' not in record:
+                    return record
+        return None
+
+    def compact(self):
+        """
+        Fasst alle versiegelten Segmente zu einem einzigen zusammen
+
+        Das kompaktierte Segment übernimmt die Nummer des jüngsten
+        versiegelten Segments und vermerkt den Bereich in seinen
+        Metadaten. Die Begleitdatei COMPACTION_MARKER besteht bis zum
+        Löschen der alten Segmente, sodass ein Absturz dazwischen beim
+        nächsten Start bereinigt wird.
+
+        Schreibt die gesamte versiegelte Historie neu und entfernt keine
+        Daten; nur für Wartung gedacht, nicht für den Speicherpfad.
+        """
+        sealed = self.sealed_segments()
+        if len(sealed) < 2:
+            return False
+
+        first, last = sealed[0], sealed[-1]
+        marker = self.directory / COMPACTION_MARKER
+        self._write_atomic(marker, [self._encode({'compacted_from': first, 'into': last})])
+
+        lines = [self._encode({'_meta': {'compacted_from': first}})]
+        for number in sealed:
+            lines.extend(self._encode(r) for r in self._iter_segment(number))
+        self._write_atomic(self._segment_path(last), lines)
+
+        for number in sealed[:-1]:
+            self._segment_path(number).unlink()
+        marker.unlink()
+        _fsync_dir(self.directory)
+        return True
+
+    def migrate_legacy(self, legacy_file):
+        """
+        Übernimmt einmalig die bisherige progress.json in das Journal
+
+        Die Einträge landen in Segment 0, also vor allen regulären
+        Segmenten; danach wird die alte Datei in *.migrated umbenannt.
+        """
+        legacy_file = Path(legacy_file)
+        if not legacy_file.exists():
+            return 0
+
+        # Migrierte Einträge liegen immer in Segment 0
+        already_migrated = (self._read_meta(0) or {}).get('migrated') == legacy_file.name
+        count = 0
+        if not already_migrated:
+            with open(legacy_file, 'r') as f:
+                history = json.load(f)
+            lines = [self._encode({'_meta': {'migrated': legacy_file.name}})]
+            lines.extend(self._encode(r) for r in history)
+            self._create_segment(0, lines)
+            count = len(history)
+
+        os.replace(legacy_file, legacy_file.with_name(legacy_file.name + ".migrated"))
+        _fsync_dir(legacy_file.parent)
+        return count
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,282 @@
+import mmap
+import os
+import struct
+import threading
+import numpy as np
+from utils import hr_codec
+
+# Aufzeichnung einer Trainingseinheit (.gpsr)
+#
+#   Dateikopf: Magic, Version, Startzeit (Unix, float64)
+#   Blöcke:    Stream-ID (1 = Puls, 2 = IMU), Anzahl, Zeit des ersten
+#              Messwerts in s ab Startzeit (float64), danach die Spalten
+#              Zeitabstände in µs zum Vorgänger (uint32, erster Wert 0)
+#              und Messwerte (Puls uint16 in BPM, IMU 3 x int16 in IMU_LSB)
+#
+# Alle Werte little-endian. Ein Block wird erst geschrieben, wenn er
+# vollständig ist; vorab reservierter Platz ist mit Nullen gefüllt, daher
+# endet das Lesen an der ersten Stream-ID 0 oder einem abgeschnittenen Block.
+MAGIC = b'GPSR'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sB3xd')
+BLOCK_HEADER = struct.Struct('<B3xId')
+DELTA_DTYPE = np.dtype('<u4')
+MAX_DELTA_US = np.iinfo(DELTA_DTYPE).max
+
+HEART_RATE = 1
+IMU = 2
+IMU_LSB = 0.002  # m/s² pro Stufe, Bereich ±65 m/s²
+STREAM_DTYPES = {
+    HEART_RATE: np.dtype('<u2'),
+    IMU: np.dtype(('<i2', (3,)))
+}
+
+class _StreamBuffer:
+    """Noch nicht geschriebener Block eines Streams"""
+    def __init__(self, stream, block_size, channels):
+        self.stream = stream
+        self.timestamps = np.empty(block_size, dtype=np.float64)
+        self.values = np.empty((block_size, channels) if channels > 1 else block_size, dtype=np.float64)
+        self.count = 0
+        self.total = 0
+
+    def full(self):
+        return self.count == len(self.timestamps)
+
+def _quantize(stream, values):
+    if stream == HEART_RATE:
+        return np.clip(np.rint(values), 0, 65535).astype(STREAM_DTYPES[HEART_RATE])
+    return np.clip(np.rint(np.asarray(values) / IMU_LSB), -32768, 32767).astype('<i2')
+
+class SessionRecorder:
+    """
+    Zeichnet Puls und IMU-Rohdaten einer Einheit kompakt auf
+
+    Messwerte werden in festen Arrays pro Stream gesammelt und als Block
+    in eine per mmap eingeblendete Datei angehängt, die in großen Schritten
+    wächst. Im Speicher liegt damit nur der jeweils offene Block; ein Puls-
+    wert belegt 6 Bytes, ein IMU-Messwert 10 Bytes auf der SD-Karte.
+
+    Puls kommt aus der Laufzeit, IMU aus dem Abtast-Thread; ein Lock
+    schützt Puffer und Datei.
+    """
+    def __init__(self, path, start_time, hr_block=64, imu_block=1024, grow_bytes=1024 * 1024):
+        self.path = str(path)
+        self.start_time = float(start_time)
+        self.grow_bytes = grow_bytes
+        self.lock = threading.Lock()
+        self.closed = False
+
+        self._buffers = {
+            HEART_RATE: _StreamBuffer(HEART_RATE, hr_block, 1),
+            IMU: _StreamBuffer(IMU, imu_block, 3)
+        }
+        self.hr_sum = 0.0
+
+        self._file = open(self.path, 'w+b')
+        self._map = None
+        self._capacity = 0
+        self.size = 0
+        self._append(FILE_HEADER.pack(MAGIC, VERSION, self.start_time))
+
+    @property
+    def hr_count(self):
+        return self._buffers[HEART_RATE].total
+
+    @property
+    def imu_count(self):
+        return self._buffers[IMU].total
+
+    def add_heart_rate(self, timestamp, value):
+        """Ein Pulswert mit Unix-Zeitstempel"""
+        with self.lock:
+            if self.closed:
+                return
+            buffer = self._buffers[HEART_RATE]
+            buffer.timestamps[buffer.count] = timestamp - self.start_time
+            buffer.values[buffer.count] = value
+            buffer.count += 1
+            buffer.total += 1
+            self.hr_sum += value
+            if buffer.full():
+                self._write_block(buffer)
+
+    def add_motion(self, timestamps, block):
+        """
+        Ein Burst von Beschleunigungswerten
+
+        Args:
+            timestamps: Unix-Zeitstempel (Array)
+            block: n x 3 in m/s²
+        """
+        with self.lock:
+            if self.closed:
+                return
+            buffer = self._buffers[IMU]
+            relative = np.asarray(timestamps, dtype=np.float64) - self.start_time
+            position = 0
+            while position < len(relative):
+                take = min(len(relative) - position, len(buffer.timestamps) - buffer.count)
+                end = buffer.count + take
+                buffer.timestamps[buffer.count:end] = relative[position:position + take]
+                buffer.values[buffer.count:end] = block[position:position + take]
+                buffer.count = end
+                buffer.total += take
+                position += take
+                if buffer.full():
+                    self._write_block(buffer)
+
+    def _write_block(self, buffer):
+        count = buffer.count
+        buffer.count = 0
+        if not count:
+            return
+        relative = buffer.timestamps[:count]
+        values = _quantize(buffer.stream, buffer.values[:count])
+        # Abstände aus gerundeten absoluten µs, damit sich keine Rundungsfehler
+        # aufsummieren; zu große Lücken beginnen einen neuen Block
+        micros = np.rint((relative - relative[0]) * 1e6).astype(np.int64)
+        deltas = np.diff(micros, prepend=micros[0])
+        splits = np.flatnonzero((deltas < 0) | (deltas > MAX_DELTA_US))
+        bounds = [0, *splits.tolist(), count]
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if start == end:
+                continue
+            part = deltas[start:end].copy()
+            part[0] = 0
+            self._append(
+                BLOCK_HEADER.pack(buffer.stream, end - start, float(relative[start])),
+                part.astype(DELTA_DTYPE).tobytes(),
+                values[start:end].tobytes()
+            )
+
+    def _append(self, *chunks):
+        length = sum(len(chunk) for chunk in chunks)
+        self._reserve(self.size + length)
+        for chunk in chunks:
+            self._map[self.size:self.size + len(chunk)] = chunk
+            self.size += len(chunk)
+
+    def _reserve(self, needed):
+        """Vergrößert Datei und Einblendung in Schritten von grow_bytes"""
+        if needed <= self._capacity:
+            return
+        capacity = -(-needed // self.grow_bytes) * self.grow_bytes
+        if self._map is not None:
+            self._map.close()
+        self._file.truncate(capacity)
+        self._map = mmap.mmap(self._file.fileno(), capacity)
+        self._capacity = capacity
+
+    def flush(self):
+        """Schreibt offene Blöcke und synchronisiert die Einblendung auf die Karte"""
+        with self.lock:
+            if self.closed:
+                return
+            for buffer in self._buffers.values():
+                self._write_block(buffer)
+            self._map.flush()
+
+    def close(self):
+        """Schreibt offene Blöcke und kürzt die Datei auf die belegte Größe"""
+        self.flush()
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._map.close()
+            self._map = None
+            self._file.truncate(self.size)
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+class SessionReader:
+    """
+    Liest eine Aufzeichnung ohne die Messwerte zu kopieren
+
+    blocks() liefert numpy-Sichten direkt auf die eingeblendete Datei;
+    sie bleiben gültig, solange der Reader offen ist.
+    """
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = b''
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < FILE_HEADER.size:
+                raise ValueError("Aufzeichnung ohne Dateikopf")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.start_time = FILE_HEADER.unpack_from(self._map)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("Unbekanntes Aufzeichnungsformat")
+            self.index = self._index(size)
+        except Exception:
+            # Ungültige Datei: Handle und Einblendung nicht offen lassen
+            self.close()
+            raise
+
+    def _index(self, size):
+        """(Stream, Anzahl, Zeit des ersten Werts, Offset der Abstände) aller vollständigen Blöcke"""
+        index = []
+        position = FILE_HEADER.size
+        while position + BLOCK_HEADER.size <= size:
+            stream, count, t0 = BLOCK_HEADER.unpack_from(self._map, position)
+            dtype = STREAM_DTYPES.get(stream)
+            end = position + BLOCK_HEADER.size + count * (DELTA_DTYPE.itemsize + (dtype.itemsize if dtype else 0))
+            if dtype is None or count == 0 or end > size:
+                break
+            index.append((stream, count, t0, position + BLOCK_HEADER.size))
+            position = end
+        return index
+
+    def blocks(self, stream):
+        """Je Block (Zeit des ersten Werts in s ab Start, Abstände in µs, Rohwerte) als Sichten"""
+        dtype = STREAM_DTYPES[stream]
+        for block_stream, count, t0, offset in self.index:
+            if block_stream != stream:
+                continue
+            deltas = np.frombuffer(self._map, dtype=DELTA_DTYPE, count=count, offset=offset)
+            values = np.frombuffer(self._map, dtype=dtype, count=count,
+                                   offset=offset + count * DELTA_DTYPE.itemsize)
+            yield t0, deltas, values
+
+    def count(self, stream):
+        return sum(count for block_stream, count, _, _ in self.index if block_stream == stream)
+
+    def _series(self, stream):
+        timestamps = []
+        values = []
+        for t0, deltas, raw in self.blocks(stream):
+            timestamps.append(self.start_time + t0 + np.cumsum(deltas, dtype=np.int64) / 1e6)
+            values.append(raw)
+        if not timestamps:
+            shape = (0, 3) if stream == IMU else (0,)
+            return np.zeros(0), np.zeros(shape, dtype=STREAM_DTYPES[stream].base)
+        return np.concatenate(timestamps), np.concatenate(values)
+
+    def heart_rate(self):
+        """Unix-Zeitstempel und Puls (uint16) aller Pulswerte"""
+        return self._series(HEART_RATE)
+
+    def motion(self):
+        """Unix-Zeitstempel und Beschleunigung (n x 3, m/s²)"""
+        timestamps, raw = self._series(IMU)
+        return timestamps, raw * IMU_LSB
+
+    def heart_rate_blob(self):
+        """Pulswerte im Format von utils/hr_codec.py, wie es die API speichert"""
+        return hr_codec.encode(*self.heart_rate())
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            try:
+                self._map.close()
+            except BufferError:
+                # Es existieren noch Sichten; die Einblendung endet mit ihnen
+                pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
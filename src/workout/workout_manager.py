@@ -1,14 +1,61 @@
+import base64
 import json
 import os
+import uuid
 from datetime import datetime
+from pathlib import Path
+from utils.clock import SYSTEM_CLOCK
+from workout.progress_journal import ProgressJournal
+from workout.history_index import HistoryIndex, summarize
+from workout.session_recorder import SessionRecorder
+
+RECORDING_SUFFIX = ".gpsr"
 
 class WorkoutManager:
-    def __init__(self):
+    def __init__(self, workout_data_dir=None, state_dir=None, clock=None, max_recordings=20):
+        """
+        Args:
+            workout_data_dir: Verzeichnis der Trainingspläne, Standard data/workouts
+            state_dir: Ablage für Journal, Index und Aufzeichnungen, Standard wie
+                workout_data_dir (für Wiedergaben ein temporäres Verzeichnis)
+            clock: Uhr für das Datum gespeicherter Workouts
+            max_recordings: So viele Sensor-Aufzeichnungen bleiben auf der Karte
+        """
         self.current_workout = None
         self.current_exercise_index = 0
         self.current_set = 1
-        self.workout_data_dir = os.path.join(os.path.dirname(__file__), '../../data/workouts')
-        os.makedirs(self.workout_data_dir, exist_ok=True)
+        self.load_listeners = []
+        self.clock = clock or SYSTEM_CLOCK
+        self.workout_data_dir = workout_data_dir or \
+            os.path.join(os.path.dirname(__file__), '../../data/workouts')
+        self.state_dir = state_dir or self.workout_data_dir
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.recording_dir = os.path.join(self.state_dir, 'sessions')
+        self.max_recordings = max_recordings
+
+        # Append-only Journal statt progress.json; Altbestand wird einmalig übernommen
+        self.journal = ProgressJournal(os.path.join(self.state_dir, 'journal'))
+        try:
+            self.journal.migrate_legacy(os.path.join(self.state_dir, 'progress.json'))
+        except Exception as e:
+            print(f"Fehler bei der Migration von progress.json: {e}")
+
+        # Kompakter Index für Historienabfragen ohne Herzfrequenzdaten
+        self.history_index = HistoryIndex(os.path.join(self.state_dir, 'history_index.jsonl'))
+        self._check_history_index()
+
+    def _check_history_index(self):
+        """Baut den Index neu auf, wenn er fehlt oder hinter dem Journal zurückliegt"""
+        try:
+            last = self.journal.last_record()
+            if last is None:
+                return
+            indexed = self.history_index.last(1)
+            if not indexed or indexed[0].get('id') != last.get('id') \
+                    or indexed[0].get('timestamp') != last.get('date'):
+                self.history_index.rebuild(self.journal)
+        except Exception as e:
+            print(f"Fehler beim Aufbau des Historien-Index: {e}")
         
     def load_workout(self, workout_name):
         """Lädt einen Trainingsplan"""
@@ -18,10 +65,20 @@ class WorkoutManager:
                 self.current_workout = json.load(f)
             self.current_exercise_index = 0
             self.current_set = 1
-            return True
         except Exception as e:
             print(f"Fehler beim Laden des Workouts: {e}")
             return False
+
+        for listener in self.load_listeners:
+            try:
+                listener(self.current_workout)
+            except Exception as e:
+                print(f"Fehler im Workout-Listener: {e}")
+        return True
+
+    def add_load_listener(self, callback):
+        """Registriert einen Callback, der nach erfolgreichem load_workout aufgerufen wird"""
+        self.load_listeners.append(callback)
             
     def get_current_exercise(self):
         """Gibt die aktuelle Übung zurück"""
@@ -52,31 +109,83 @@ class WorkoutManager:
             return True
         return False
         
-    def save_progress(self, heart_rate_data):
-        """Speichert den Trainingsfortschritt"""
+    def start_recording(self):
+        """
+        Beginnt eine Sensor-Aufzeichnung (Puls und IMU) für die nächste Einheit
+        Ältere Aufzeichnungen über max_recordings hinaus werden gelöscht.
+        """
+        os.makedirs(self.recording_dir, exist_ok=True)
+        recordings = sorted(Path(self.recording_dir).glob(f"*{RECORDING_SUFFIX}"))
+        for path in recordings[:max(0, len(recordings) - self.max_recordings + 1)]:
+            try:
+                path.unlink()
+            except OSError as e:
+                print(f"Fehler beim Löschen der Aufzeichnung {path}: {e}")
+
+        now = self.clock.time()
+        name = f"{datetime.fromtimestamp(now).strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        return SessionRecorder(os.path.join(self.recording_dir, name + RECORDING_SUFFIX), now)
+
+    def save_progress(self, heart_rate_data, summary=None, recording=None):
+        """
+        Speichert den Trainingsfortschritt
+
+        Args:
+            heart_rate_data: Herzfrequenz gepackt im Format von hr_codec (bytes)
+                oder als Liste von {'timestamp', 'value'}-Dicts
+            summary: Optionale Summen (total_sets, total_reps, duration_mins, avg_heart_rate)
+            recording: Pfad der Sensor-Aufzeichnung der Einheit
+        """
         if not self.current_workout:
             return
             
         progress = {
-            'date': datetime.now().isoformat(),
+            'id': uuid.uuid4().hex,
+            'date': datetime.fromtimestamp(self.clock.time()).isoformat(),
             'workout_name': self.current_workout['name'],
             'completed_exercises': self.current_exercise_index + 1,
-            'heart_rate_data': heart_rate_data
+            'summary': summary or {}
         }
+        if isinstance(heart_rate_data, (bytes, bytearray)):
+            # Gepackt statt als JSON-Liste: ca. 8 statt 45 Bytes pro Messwert
+            progress['heart_rate_packed'] = base64.b64encode(heart_rate_data).decode('ascii')
+        else:
+            progress['heart_rate_data'] = heart_rate_data
+        if recording:
+            progress['recording'] = os.path.basename(recording)
         
-        # Speichere in JSON-Datei
-        progress_file = os.path.join(self.workout_data_dir, 'progress.json')
         try:
-            if os.path.exists(progress_file):
-                with open(progress_file, 'r') as f:
-                    history = json.load(f)
-            else:
-                history = []
-                
-            history.append(progress)
-            
-            with open(progress_file, 'w') as f:
-                json.dump(history, f, indent=2)
+            self.journal.append(progress)
+            self.history_index.append(summarize(progress))
+            # Keine Kompaktierung hier: sie würde die ganze versiegelte
+            # Historie neu schreiben und den Aufwand pro Speichern sprengen
                 
         except Exception as e:
             print(f"Fehler beim Speichern des Fortschritts: {e}")
+            
+        return progress
+
+    def get_workout_history(self, limit=3):
+        """Die letzten Workouts aus dem Index, neueste zuerst"""
+        try:
+            return self.history_index.last(limit)
+        except Exception as e:
+            print(f"Fehler beim Lesen der Historie: {e}")
+            return []
+
+    def get_workout_history_range(self, start, end):
+        """
+        Workouts in einem Zeitraum aus dem Index, chronologisch
+
+        Args:
+            start, end: datetime oder ISO-String
+        """
+        if isinstance(start, datetime):
+            start = start.isoformat()
+        if isinstance(end, datetime):
+            end = end.isoformat()
+        try:
+            return self.history_index.between(start, end)
+        except Exception as e:
+            print(f"Fehler beim Lesen der Historie: {e}")
+            return []
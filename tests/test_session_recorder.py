@@ -0,0 +1,90 @@
+import os
+import numpy as np
+import pytest
+from utils import hr_codec
+from workout.session_recorder import (BLOCK_HEADER, DELTA_DTYPE, FILE_HEADER, HEART_RATE, IMU,
+                                      IMU_LSB, SessionReader, SessionRecorder)
+
+START = 1.7e9
+
+def _record(path, hr_block=16, imu_block=64):
+    """Puls mit 1 Hz und IMU mit 200 Hz über 10 s, IMU in Bursts zu 4 Messwerten"""
+    hr_timestamps = START + np.arange(10.0)
+    hr_values = 100 + np.arange(10) * 3
+    imu_timestamps = START + np.arange(2000) / 200
+    imu = np.stack([np.sin(np.arange(2000) / 10), np.cos(np.arange(2000) / 10),
+                    np.full(2000, 9.81)], axis=1)
+
+    recorder = SessionRecorder(path, START, hr_block=hr_block, imu_block=imu_block)
+    for timestamp, value in zip(hr_timestamps, hr_values):
+        recorder.add_heart_rate(timestamp, value)
+    for position in range(0, len(imu_timestamps), 4):
+        recorder.add_motion(imu_timestamps[position:position + 4], imu[position:position + 4])
+    return recorder, (hr_timestamps, hr_values), (imu_timestamps, imu)
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'session.gpsr'
+    recorder, (hr_timestamps, hr_values), (imu_timestamps, imu) = _record(path)
+    recorder.close()
+
+    assert os.path.getsize(path) == recorder.size
+    with SessionReader(path) as reader:
+        timestamps, values = reader.heart_rate()
+        np.testing.assert_allclose(timestamps, hr_timestamps, atol=1e-6)
+        np.testing.assert_array_equal(values, hr_values)
+
+        timestamps, motion = reader.motion()
+        np.testing.assert_allclose(timestamps, imu_timestamps, atol=1e-6)
+        np.testing.assert_allclose(motion, imu, atol=IMU_LSB / 2 + 1e-9)
+
+        _, decoded_values, _ = hr_codec.decode(reader.heart_rate_blob())
+        np.testing.assert_array_equal(decoded_values, hr_values)
+
+def test_truncated_mid_block(tmp_path):
+    path = tmp_path / 'session.gpsr'
+    recorder, (_, hr_values), (imu_timestamps, imu) = _record(path)
+    recorder.close()
+
+    with SessionReader(path) as reader:
+        blocks = list(reader.index)
+    # Mitten im letzten Block abschneiden, wie bei einem Stromausfall beim Schreiben
+    _, count, _, offset = blocks[-1]
+    with open(path, 'r+b') as f:
+        f.truncate(offset + count * DELTA_DTYPE.itemsize // 2)
+
+    kept_hr = sum(c for s, c, _, _ in blocks[:-1] if s == HEART_RATE)
+    kept_imu = sum(c for s, c, _, _ in blocks[:-1] if s == IMU)
+    assert kept_hr + kept_imu < len(hr_values) + len(imu)
+    with SessionReader(path) as reader:
+        assert reader.index == blocks[:-1]
+        _, values = reader.heart_rate()
+        np.testing.assert_array_equal(values, hr_values[:kept_hr])
+        timestamps, motion = reader.motion()
+        assert len(timestamps) == kept_imu
+        np.testing.assert_allclose(timestamps, imu_timestamps[:kept_imu], atol=1e-6)
+        np.testing.assert_allclose(motion, imu[:kept_imu], atol=IMU_LSB / 2 + 1e-9)
+
+def test_unclosed_file_ignores_padding(tmp_path):
+    path = tmp_path / 'session.gpsr'
+    recorder, (_, hr_values), _ = _record(path)
+    recorder.flush()
+    try:
+        # Ohne close() ist die Datei auf grow_bytes aufgefüllt
+        assert os.path.getsize(path) > recorder.size
+        with SessionReader(path) as reader:
+            assert reader.count(HEART_RATE) == len(hr_values)
+            assert reader.count(IMU) == 2000
+    finally:
+        recorder.close()
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / 'other.gpsr'
+    path.write_bytes(b'XXXX' + bytes(FILE_HEADER.size + BLOCK_HEADER.size))
+    with pytest.raises(ValueError):
+        SessionReader(path)
+
+def test_rejects_file_without_header(tmp_path):
+    path = tmp_path / 'empty.gpsr'
+    path.write_bytes(b'GPSR')
+    with pytest.raises(ValueError):
+        SessionReader(path)